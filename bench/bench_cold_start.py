@@ -0,0 +1,144 @@
+"""
+BENCHMARK DÉMARRAGE À FROID : SCRIPTS SÉPARÉS VS `celcat pipeline`
+==================================================================
+Compare, sur le scénario du workflow quotidien (archive de 2 semaines dont
+une modifiée, master pluriannuel, manifeste et cache ICS déjà présents) :
+
+    scripts    html_to_json.py -> merge_and_compare.py -> json_to_ics.py
+               (trois interpréteurs, mise à jour et master relus depuis le disque)
+    pipeline   celcat.py pipeline (un interpréteur, événements en mémoire)
+
+Chaque essai part d'une copie neuve du dossier de travail ; les sorties
+des deux modes (master JSON, ICS hors horodatages) sont comparées.
+Le temps d'import de chaque module d'étape est aussi mesuré dans un
+interpréteur neuf.
+
+Usage:
+    python bench/bench_cold_start.py
+    python bench/bench_cold_start.py --weeks 520 --repeat 7
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'src'))
+sys.path.insert(0, SRC_DIR)
+
+UPDATE_WEEKS = 2
+MODULES = ('celcat', 'merge_and_compare', 'json_to_ics', 'html_to_json', 'scraper_complet')
+
+SCRIPTS = (
+    ('html_to_json.py', '--output', 'temp_update.json', '--parser', 'lxml'),
+    ('merge_and_compare.py',),
+    ('json_to_ics.py', '--input', 'json/emploi_du_temps_complet.json'),
+)
+PIPELINE = (('celcat.py', 'pipeline', '--parser', 'lxml', '--update-output', 'temp_update.json'),)
+
+
+def prepare(workdir, nb_weeks):
+    """Master de nb_weeks semaines, cache ICS rempli, archive du jour (2 semaines, une modifiée)."""
+    from events import event_to_json
+    from html_to_json import convert_archive
+    from json_to_ics import VeventCache, write_ics_stream
+    from week_generator import WeekGenerator
+
+    history = os.path.join(workdir, "history")
+    files = WeekGenerator(density=5, seed=nb_weeks).write_weeks(history, nb_weeks)
+    master = convert_archive(files, 1, 'lxml')
+    os.makedirs(os.path.join(workdir, "json"))
+    with open(os.path.join(workdir, "json", "emploi_du_temps_complet.json"), 'w', encoding='utf-8') as f:
+        json.dump(master, f, ensure_ascii=False, indent=4, default=event_to_json)
+    write_ics_stream(master, os.path.join(workdir, "mon_emploi_du_temps_fixed.ics"),
+                     VeventCache(os.path.join(workdir, "json", "ics_cache.json")))
+
+    archive = os.path.join(workdir, "archives_html")
+    os.makedirs(archive)
+    for index, path in enumerate(files[:UPDATE_WEEKS]):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        if index == 0:
+            html = html.replace("Porte ", "Porte 1", 1)
+        with open(os.path.join(archive, os.path.basename(path)), 'w', encoding='utf-8') as f:
+            f.write(html)
+    shutil.rmtree(history)
+    return len(master)
+
+
+def run_mode(commands, template, rundir):
+    """Copie neuve du dossier de travail puis exécution chronométrée des commandes."""
+    shutil.rmtree(rundir, ignore_errors=True)
+    shutil.copytree(template, rundir)
+    env = dict(os.environ, METRICS_DIR='', METRICS_SUMMARY='0')
+    env.pop('GITHUB_OUTPUT', None)
+    started = time.perf_counter()
+    for command in commands:
+        subprocess.run([sys.executable, os.path.join(SRC_DIR, command[0]), *command[1:]],
+                       cwd=rundir, env=env, check=True, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def outputs(rundir):
+    """Master JSON et ICS (sans DTSTAMP / LAST-MODIFIED, qui dépendent de l'heure)."""
+    with open(os.path.join(rundir, "json", "emploi_du_temps_complet.json"), 'rb') as f:
+        master = f.read()
+    with open(os.path.join(rundir, "mon_emploi_du_temps_fixed.ics"), 'r', encoding='utf-8') as f:
+        ics = [line for line in f if not line.startswith(('DTSTAMP', 'LAST-MODIFIED'))]
+    return master, ics
+
+
+def import_time(module):
+    """Durée de l'import d'un module dans un interpréteur neuf (secondes)."""
+    code = (f"import sys, time; sys.path.insert(0, {SRC_DIR!r}); started = time.perf_counter(); "
+            f"import {module}; print(time.perf_counter() - started)")
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Démarrage à froid : scripts séparés vs celcat pipeline.")
+    parser.add_argument('--weeks', type=int, default=260, help="Semaines du master (défaut: 260)")
+    parser.add_argument('--repeat', type=int, default=5, help="Essais par mode (défaut: 5)")
+    args = parser.parse_args()
+
+    print(f"⏱️ Import à froid des modules d'étape (meilleur de {args.repeat})")
+    for module in MODULES:
+        try:
+            best = min(import_time(module) for _ in range(args.repeat))
+            print(f"   {module:<20} {best * 1000:7.0f} ms")
+        except subprocess.CalledProcessError:
+            print(f"   {module:<20}       - (dépendance absente)")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        template = os.path.join(workdir, "template")
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            nb_events = prepare(template, args.weeks)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        print(f"\n🧪 Master de {args.weeks} semaines ({nb_events} événements), mise à jour de {UPDATE_WEEKS} semaines")
+
+        results = {}
+        for mode, commands in (('scripts', SCRIPTS), ('pipeline', PIPELINE)):
+            rundir = os.path.join(workdir, mode)
+            times = [run_mode(commands, template, rundir) for _ in range(args.repeat)]
+            results[mode] = (times, outputs(rundir))
+            print(f"   {mode:<10} {len(commands)} processus  médiane {statistics.median(times) * 1000:7.0f} ms"
+                  f"   min {min(times) * 1000:7.0f} ms")
+
+        before = statistics.median(results['scripts'][0])
+        after = statistics.median(results['pipeline'][0])
+        print(f"   {'gain':<10} {(after - before) / before:+.1%}")
+        same = results['scripts'][1] == results['pipeline'][1]
+        print(f"   sorties identiques (master JSON, ICS hors horodatages) : {'oui' if same else 'NON'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+BENCHMARK JSON → ICS
+====================
+Compare le débit de l'écriture ICS en flux (ics_writer) et de l'ancien
+chemin ics.Calendar sur un grand nombre d'événements synthétiques, et
+vérifie que les deux calendriers sont sémantiquement équivalents.
+
+Usage:
+    python bench/bench_ics.py --events 10000 --check
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from json_to_ics import write_ics_legacy, write_ics_stream
+
+_SLOTS = [("08:00", "10:00"), ("10:15", "12:15"), ("2:00 PM", "4:00 PM"), ("16:15", ""), ("00:00", "")]
+
+
+def synthetic_events(count, seed=0):
+    """Événements au format JSON du projet, répartis sur les jours ouvrés."""
+    rng = random.Random(seed)
+    day = date(2024, 9, 2)
+    events = []
+    while len(events) < count:
+        if day.weekday() < 5:
+            for start, end in rng.sample(_SLOTS, 3):
+                events.append({
+                    'date': day.isoformat(), 'start_time': start, 'end_time': end,
+                    'title': rng.choice(["Cours", "TD; groupe 2", "Examen, session 1"]),
+                    'course_code': f"0{rng.randint(10, 99)}",
+                    'course_name': rng.choice(["Anglais", "Pharmacologie et toxicologie clinique vétérinaire"]),
+                    'location': rng.choice(["Amphi A", "Salle TD 3", "e-learning"]),
+                    'teacher': rng.choice(["DUPONT Jean", "MARTIN Clémence"]),
+                    'type': rng.choice(["CM", "TD", "TP"]),
+                    'groups': ["VET3", "classe A"][:rng.randint(0, 2)],
+                })
+        day += timedelta(days=1)
+    return events[:count]
+
+
+def semantic_view(path):
+    """Ensemble (titre, début UTC, fin UTC, lieu, description, journée) via la bibliothèque ics."""
+    from ics import Calendar
+
+    with open(path, 'r', encoding='utf-8') as f:
+        calendar = Calendar(f.read())
+    return sorted(
+        (e.name, e.begin.to('utc').isoformat(), e.end.to('utc').isoformat(),
+         e.location or '', e.description or '', e.all_day)
+        for e in calendar.events
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la génération ICS.")
+    parser.add_argument('--events', type=int, default=10000, help="Nombre d'événements (défaut: 10000)")
+    parser.add_argument('--check', action='store_true', help="Vérifier l'équivalence sémantique des sorties")
+    args = parser.parse_args()
+
+    data = synthetic_events(args.events)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, writer in (('stream', write_ics_stream), ('ics', write_ics_legacy)):
+            path = os.path.join(tmp, f"{name}.ics")
+            started = time.perf_counter()
+            count = writer(data, path)
+            elapsed = time.perf_counter() - started
+            results[name] = path
+            print(f"{name:<8} {count:>7} événements en {elapsed:7.2f}s  "
+                  f"({count / elapsed:>9.0f} évén./s, {os.path.getsize(path) / 1024:.0f} Kio)")
+
+        if args.check:
+            if semantic_view(results['stream']) == semantic_view(results['ics']):
+                print("✅ Calendriers sémantiquement équivalents")
+            else:
+                print("❌ Les calendriers diffèrent")
+                sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+BENCHMARK MÉMOIRE : DICTS VS ÉVÉNEMENTS COMPACTS
+================================================
+Compare le pic mémoire du pipeline avec les événements en dicts
+(CELCAT_COMPACT_EVENTS=0) et en Event compacts (__slots__ + chaînes
+internées, défaut) sur un jeu synthétique pluriannuel (week_generator).
+
+Chaque mesure tourne dans un processus neuf :
+
+    load           lecture du master JSON (merge_and_compare.load_json)
+    html_to_json   conversion entièrement servie par le manifeste (convert_archive)
+    merge          master + mise à jour de 2 semaines (merge_window)
+    json_to_ics    lecture du master puis écriture en flux (write_ics_stream)
+
+Le pic du tas Python est mesuré avec tracemalloc, le temps et le pic de
+mémoire résidente dans une seconde exécution sans tracemalloc.
+
+Usage:
+    python bench/bench_memory.py
+    python bench/bench_memory.py --weeks 260 --density 6
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+MODES = (('dict', '0'), ('compact', '1'))
+STAGES = ('load', 'html_to_json', 'merge', 'json_to_ics')
+DEFAULT_WEEKS = 520  # 10 ans
+
+
+def prepare(workdir, nb_weeks, density):
+    """Archive synthétique, manifeste rempli, master JSON et mise à jour quotidienne."""
+    from bench_suite import daily_update
+    from events import event_to_json
+    from html_to_json import ParseManifest, convert_archive
+    from week_generator import WeekGenerator
+
+    folder = os.path.join(workdir, "archives_html")
+    files = WeekGenerator(density=density, seed=nb_weeks).write_weeks(folder, nb_weeks)
+    manifest = ParseManifest(os.path.join(workdir, "manifest.json"), 'lxml')
+    events = convert_archive(files, 1, 'lxml', manifest)
+
+    with open(os.path.join(workdir, "master.json"), 'w', encoding='utf-8') as f:
+        json.dump(events, f, ensure_ascii=False, indent=4, default=event_to_json)
+    with open(os.path.join(workdir, "update.json"), 'w', encoding='utf-8') as f:
+        json.dump(daily_update(events), f, ensure_ascii=False, indent=4, default=event_to_json)
+    return len(events), os.path.getsize(os.path.join(workdir, "master.json"))
+
+
+def run_stage(stage, workdir):
+    """Exécute une étape ; retourne les objets produits (gardés en vie pendant la mesure)."""
+    from events import EventIndex
+    from html_to_json import ParseManifest, convert_archive, list_week_files
+    from json_to_ics import write_ics_stream
+    from merge_and_compare import extract_events, load_json, merge_window
+
+    master_path = os.path.join(workdir, "master.json")
+    if stage == 'load':
+        return extract_events(load_json(master_path))
+    if stage == 'html_to_json':
+        files = list_week_files(os.path.join(workdir, "archives_html"))
+        manifest = ParseManifest(os.path.join(workdir, "manifest.json"), 'lxml')
+        return manifest, convert_archive(files, 1, 'lxml', manifest)
+    if stage == 'merge':
+        master = extract_events(load_json(master_path))
+        update = list(EventIndex(extract_events(load_json(os.path.join(workdir, "update.json")))))
+        return merge_window(master, update)
+    if stage == 'json_to_ics':
+        events = extract_events(load_json(master_path))
+        write_ics_stream(events, os.path.join(workdir, f"calendar_{os.getpid()}.ics"))
+        return events
+    raise ValueError(stage)
+
+
+def child(stage, workdir, trace):
+    """Mesure d'une étape dans le processus courant (appelé par measure())."""
+    from metrics import peak_rss
+
+    # Les étapes affichent leur progression : seule la mesure est écrite sur stdout
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        if trace:
+            tracemalloc.start()
+        started = time.perf_counter()
+        result = run_stage(stage, workdir)
+        elapsed = time.perf_counter() - started
+        measure = {'seconds': elapsed, 'peak_rss': peak_rss()}
+        if trace:
+            measure['retained'], measure['peak_heap'] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        del result
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    print(json.dumps(measure))
+
+
+def measure(stage, mode_value, workdir):
+    """Pic du tas (tracemalloc), données retenues, temps et pic RSS d'une étape."""
+    env = dict(os.environ, CELCAT_COMPACT_EVENTS=mode_value, METRICS_DIR='')
+    result = {}
+    for trace in (True, False):
+        command = [sys.executable, os.path.abspath(__file__), '--child', stage, '--workdir', workdir]
+        if trace:
+            command.append('--trace')
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        result.update(json.loads(output.strip().splitlines()[-1]))
+    return result
+
+
+def mib(value):
+    return f"{value / (1024 * 1024):8.1f}" if value is not None else "       -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pic mémoire du pipeline : dicts vs événements compacts.")
+    parser.add_argument('--weeks', type=int, default=DEFAULT_WEEKS, help=f"Semaines synthétiques (défaut: {DEFAULT_WEEKS})")
+    parser.add_argument('--density', type=float, default=5, help="Événements par jour ouvré (défaut: 5)")
+    parser.add_argument('--stages', default=",".join(STAGES), help=f"Étapes mesurées (défaut: {','.join(STAGES)})")
+    parser.add_argument('--child', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    parser.add_argument('--trace', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.workdir, args.trace)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"🧪 Génération de {args.weeks} semaines synthétiques...", flush=True)
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        try:
+            nb_events, master_bytes = prepare(workdir, args.weeks, args.density)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        print(f"   {nb_events} événements, master JSON {master_bytes / (1024 * 1024):.1f} Mio\n")
+
+        print(f"{'étape':<13} {'mode':<8} {'pic tas':>8} {'retenu':>8} {'pic RSS':>8} {'temps':>9}   (Mio)")
+        for stage in [s.strip() for s in args.stages.split(",") if s.strip()]:
+            results = {}
+            for mode, value in MODES:
+                results[mode] = r = measure(stage, value, workdir)
+                print(f"{stage:<13} {mode:<8} {mib(r['peak_heap'])} {mib(r['retained'])} "
+                      f"{mib(r['peak_rss'])} {r['seconds'] * 1000:7.0f}ms", flush=True)
+            before, after = results['dict']['peak_heap'], results['compact']['peak_heap']
+            print(f"{'':<13} {'gain':<8} {(after - before) / before:+8.1%}\n")
+
+
+if __name__ == "__main__":
+    main()
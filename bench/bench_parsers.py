@@ -0,0 +1,79 @@
+"""
+BENCHMARK DES BACKENDS DE PARSING HTML
+======================================
+Mesure le temps de parsing par semaine de extract_celcat_data() pour
+chaque backend (html.parser, lxml) et vérifie que leurs sorties sont
+identiques sur les semaines archivées.
+
+Usage:
+    python bench/bench_parsers.py --input archives_html --repeat 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from html_to_json import PARSER_BACKENDS, extract_celcat_data, list_week_files
+
+
+def time_parse(html_content, backend, repeat):
+    """Meilleur temps (secondes) sur repeat parsings, et le résultat."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = extract_celcat_data(html_content, backend)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare les backends de parsing sur les archives HTML.")
+    parser.add_argument('--input', default='archives_html', help="Dossier des archives (défaut: archives_html)")
+    parser.add_argument('--repeat', type=int, default=3, help="Répétitions par semaine (défaut: 3)")
+    args = parser.parse_args()
+
+    files = list_week_files(args.input)
+    if not files:
+        print(f"Aucun fichier week_*.html dans '{args.input}'.")
+        sys.exit(1)
+
+    timings = {backend: [] for backend in PARSER_BACKENDS}
+    mismatches = []
+
+    print(f"{'semaine':<28}" + "".join(f"{b:>14}" for b in PARSER_BACKENDS) + "   événements")
+    for file_path in files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+
+        results = {}
+        for backend in PARSER_BACKENDS:
+            elapsed, results[backend] = time_parse(html_content, backend, args.repeat)
+            timings[backend].append(elapsed)
+
+        reference = results[PARSER_BACKENDS[0]]
+        if any(results[b] != reference for b in PARSER_BACKENDS[1:]):
+            mismatches.append(os.path.basename(file_path))
+
+        print(f"{os.path.basename(file_path):<28}"
+              + "".join(f"{timings[b][-1] * 1000:>12.2f}ms" for b in PARSER_BACKENDS)
+              + f"   {len(reference)}")
+
+    print("-" * (28 + 14 * len(PARSER_BACKENDS) + 14))
+    base = statistics.mean(timings[PARSER_BACKENDS[0]])
+    for backend in PARSER_BACKENDS:
+        mean = statistics.mean(timings[backend])
+        print(f"{backend:<12} moyenne {mean * 1000:8.2f} ms/semaine  "
+              f"médiane {statistics.median(timings[backend]) * 1000:8.2f} ms  (x{base / mean:.1f})")
+
+    if mismatches:
+        print(f"❌ Sorties différentes sur {len(mismatches)} semaine(s) : {', '.join(mismatches)}")
+        sys.exit(1)
+    print(f"✅ Sorties identiques sur {len(files)} semaine(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""
+SUITE DE BENCHMARKS DU PIPELINE
+===============================
+Mesure les trois étapes hors navigateur sur des archives synthétiques
+(week_generator) de 1, 26, 260 et 2600 semaines :
+
+    html_to_json   conversion d'un dossier week_*.html (convert_archive)
+    merge          remplacement d'une fenêtre de 2 semaines dans le master (merge_window)
+    merge_sqlite   même mise à jour dans le magasin SQLite (EventStore.replace_window)
+    json_to_ics    écriture du calendrier en flux (write_ics_stream)
+
+Chaque exécution est ajoutée à un fichier de résultats (JSON) et comparée
+à la précédente (ou à --baseline).
+
+Usage:
+    python bench/bench_suite.py
+    python bench/bench_suite.py --sizes 1,26 --repeat 3 --label "lxml + manifest"
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'src'))
+
+from event_store import EventStore
+from html_to_json import PARSER_BACKENDS, convert_archive
+from json_to_ics import write_ics_stream
+from merge_and_compare import merge_window
+from week_generator import WeekGenerator
+
+DEFAULT_SIZES = (1, 26, 260, 2600)
+DEFAULT_RESULTS = os.path.join(BENCH_DIR, "results.json")
+STAGES = ('html_to_json', 'merge', 'merge_sqlite', 'json_to_ics')
+UPDATE_WEEKS = 2
+
+
+def git_revision():
+    """Commit courant (court), ou None hors dépôt git."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def best_of(repeat, func):
+    """Meilleur temps (s) sur repeat exécutions, et le résultat de la dernière."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def daily_update(master, weeks=UPDATE_WEEKS):
+    """Simule une mise à jour quotidienne : les premières semaines, dont un événement sur dix modifié."""
+    dates = sorted({e['date'] for e in master if e.get('date')})
+    if not dates:
+        return []
+    last_date = dates[min(len(dates), weeks * 5) - 1]
+    update = []
+    for index, event in enumerate(e for e in master if e.get('date') and e['date'] <= last_date):
+        event = dict(event)
+        if index % 10 == 0:
+            event['location'] = "Salle modifiée"
+        update.append(event)
+    return update
+
+
+def store_merge(store_path, update, repeat):
+    """Meilleur temps de replace_window, chaque essai sur une copie neuve du magasin."""
+    best = None
+    for _ in range(repeat):
+        run_path = f"{store_path}.run"
+        shutil.copyfile(store_path, run_path)
+        started = time.perf_counter()
+        with EventStore(run_path) as store:
+            store.replace_window(update)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_size(nb_weeks, workdir, repeat, backend):
+    """Mesure les trois étapes pour une archive de nb_weeks semaines."""
+    folder = os.path.join(workdir, f"weeks_{nb_weeks}")
+    files = WeekGenerator(seed=nb_weeks).write_weeks(folder, nb_weeks)
+
+    timings = {}
+    timings['html_to_json'], events = best_of(repeat, lambda: convert_archive(files, 1, backend))
+    update = daily_update(events)
+    timings['merge'], _ = best_of(repeat, lambda: merge_window(events, update))
+    store_path = os.path.join(workdir, f"events_{nb_weeks}.sqlite")
+    with EventStore(store_path) as store:
+        store.replace_all(events)
+    timings['merge_sqlite'] = store_merge(store_path, update, repeat)
+    ics_path = os.path.join(workdir, f"calendar_{nb_weeks}.ics")
+    timings['json_to_ics'], _ = best_of(repeat, lambda: write_ics_stream(events, ics_path))
+
+    return {
+        'weeks': nb_weeks,
+        'events': len(events),
+        'html_bytes': sum(os.path.getsize(f) for f in files),
+        'seconds': timings,
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def find_baseline(history, label):
+    """Exécution de référence : la dernière portant label, ou la dernière tout court."""
+    for run in reversed(history):
+        if label is None or run.get('label') == label:
+            return run
+    return None
+
+
+def print_report(run, baseline):
+    """Tableau des temps par étape et par taille, avec l'écart relatif à la référence."""
+    previous = {}
+    if baseline:
+        previous = {r['weeks']: r['seconds'] for r in baseline['results']}
+        print(f"Référence : {baseline['run_at']} ({baseline.get('label') or baseline.get('git') or '-'})")
+
+    print(f"{'semaines':>9} {'événements':>11}  " + "  ".join(f"{stage:>22}" for stage in STAGES))
+    for result in run['results']:
+        cells = []
+        for stage in STAGES:
+            seconds = result['seconds'].get(stage)
+            if seconds is None:
+                cells.append(f"{'-':>22}")
+                continue
+            cell = f"{seconds * 1000:9.1f} ms"
+            before = previous.get(result['weeks'], {}).get(stage)
+            if before:
+                cell += f" ({(seconds - before) / before:+6.1%})"
+            else:
+                cell += " " * 10
+            cells.append(f"{cell:>22}")
+        print(f"{result['weeks']:>9} {result['events']:>11}  " + "  ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks HTML→JSON, merge et JSON→ICS.")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Tailles d'archive en semaines (défaut: 1,26,260,2600)")
+    parser.add_argument('--repeat', type=int, default=1, help="Répétitions par mesure, meilleur temps retenu")
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default='lxml', help="Backend de parsing (défaut: lxml)")
+    parser.add_argument('--results', default=DEFAULT_RESULTS, help="Historique des résultats (défaut: bench/results.json)")
+    parser.add_argument('--label', default=None, help="Nom de l'exécution (ex: nom de la branche)")
+    parser.add_argument('--baseline', default=None, help="Comparer à la dernière exécution portant ce label")
+    parser.add_argument('--no-save', action='store_true', help="Ne pas ajouter l'exécution à l'historique")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    run = {
+        'run_at': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'parser': args.parser,
+        'repeat': args.repeat,
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for nb_weeks in sizes:
+            print(f"⏱️  {nb_weeks} semaine(s)...", flush=True)
+            # Les étapes affichent leur progression : on ne garde que le tableau final
+            with open(os.devnull, 'w') as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    run['results'].append(run_size(nb_weeks, workdir, args.repeat, args.parser))
+                finally:
+                    sys.stdout = stdout
+
+    history = load_history(args.results)
+    print_report(run, find_baseline(history, args.baseline))
+
+    if not args.no_save:
+        history.append(run)
+        with open(args.results, 'w', encoding='utf-8') as f:
+            json.dump(history, f, indent=2)
+        print(f"💾 Résultats ajoutés à '{args.results}'")
+
+
+if __name__ == "__main__":
+    main()
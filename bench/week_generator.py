@@ -0,0 +1,210 @@
+"""
+GÉNÉRATEUR DE SEMAINES CELCAT SYNTHÉTIQUES
+==========================================
+Produit des pages HTML « agendaWeek » FullCalendar au format attendu par
+extract_celcat_data() (html_to_json) et parse_event() (scraper) :
+
+    th.fc-day-header.fc-mon[data-date]          en-têtes des jours
+    .fc-time-grid .fc-content-skeleton td        une colonne par jour
+    a.fc-time-grid-event[style="left: x%"]       événements
+    .fc-time[data-full="8:00 AM - 10:00 AM"]     horaires (AM/PM ou 24h)
+
+La densité d'événements, les variantes de texte et la part d'horaires
+AM/PM sont paramétrables ; la génération est déterministe (seed).
+
+Usage:
+    python bench/week_generator.py archives_html --weeks 26 --density 4 --ampm 0.7
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from html import escape
+
+# Ordre des classes de jours de FullCalendar (utilisé par parse_event pour les colonnes)
+DAY_CLASSES = ('fc-sun', 'fc-mon', 'fc-tue', 'fc-wed', 'fc-thu', 'fc-fri', 'fc-sat')
+COLUMN_WIDTH = 100 / 7
+
+TITLES = ("Cours", "TD", "TP", "Examen final", "Évaluation continue", "Conférence", "Rattrapage")
+COURSES = (
+    ("065", "Anglais"),
+    ("012", "Pharmacologie et toxicologie"),
+    ("031", "Anatomie comparée des carnivores"),
+    ("047", "Santé publique vétérinaire"),
+    ("102", "Médecine interne — équine"),
+    ("", "Stage clinique"),
+)
+LOCATIONS = ("Amphi A", "Amphi Bourgelat", "Salle TD 3", "Salle TP 12", "Porte 4", "Espace Santé", "e-learning")
+TEACHERS = ("DUPONT Jean", "MARTIN Clémence", "Lefèvre Anne", "N'GUYEN Minh", "O'BRIEN Sean")
+TYPES = ("CM", "TD", "TP", "Examen", "Evaluation")
+GROUPS = ("VET3 [VET3]", "classe A", "classe B [VET3-B]", "Groupe TP 2", "Option équine")
+
+# Créneaux (heure de début, durée en minutes)
+SLOTS = ((8, 0, 120), (10, 15, 120), (13, 30, 90), (14, 0, 120), (15, 15, 105), (16, 30, 90), (18, 0, 60))
+
+
+def format_time(hour, minute, ampm):
+    """Heure au format de data-full : "2:00 PM" ou "14:00"."""
+    if ampm:
+        suffix = "AM" if hour < 12 else "PM"
+        return f"{(hour - 1) % 12 + 1}:{minute:02d} {suffix}"
+    return f"{hour:02d}:{minute:02d}"
+
+
+class WeekGenerator:
+    """
+    Générateur de pages de semaine.
+
+    Args:
+        density: nombre moyen d'événements par jour ouvré
+        ampm: part des événements dont data-full est au format AM/PM (0 à 1)
+        weekend: générer aussi des événements le samedi
+        text_lines: (min, max) lignes de texte par événement (1 à 7)
+        time_in_text: part des événements qui répètent l'horaire dans le texte
+        boilerplate_kb: taille approximative du gabarit de page (menus, scripts)
+        inline_tags: fc-time / fc-title en <span> (attendu par parse_event)
+            au lieu de <div> (rendu FullCalendar, attendu par extract_celcat_data)
+        seed: graine du générateur aléatoire
+    """
+
+    def __init__(self, density=4, ampm=0.5, weekend=False, text_lines=(3, 7),
+                 time_in_text=0.2, boilerplate_kb=20, inline_tags=False, seed=0):
+        self.density = density
+        self.ampm = ampm
+        self.weekend = weekend
+        self.text_lines = text_lines
+        self.time_in_text = time_in_text
+        self.boilerplate_kb = boilerplate_kb
+        self.inline_tags = inline_tags
+        self.rng = random.Random(seed)
+
+    # --- Événements ---
+
+    def _text_lines(self, start, end):
+        rng = self.rng
+        code, name = rng.choice(COURSES)
+        lines = [
+            rng.choice(TITLES),
+            f"{code} {name}".strip(),
+            rng.choice(LOCATIONS),
+            rng.choice(TEACHERS),
+            rng.choice(TYPES),
+        ]
+        lines.extend(rng.sample(GROUPS, 2))
+        low, high = self.text_lines
+        lines = lines[:rng.randint(low, high)]
+        if rng.random() < self.time_in_text:
+            # Celcat répète parfois l'horaire dans le texte (filtré par TIME_LINE_RE)
+            lines.insert(0, f"{start} - {end}")
+        return lines
+
+    def _event_html(self, column, hour, minute, duration):
+        ampm = self.rng.random() < self.ampm
+        end_total = hour * 60 + minute + duration
+        start = format_time(hour, minute, ampm)
+        end = format_time(end_total // 60, end_total % 60, ampm)
+        short = f"{hour}:{minute:02d} - {end_total // 60}:{end_total % 60:02d}"
+
+        tag = "span" if self.inline_tags else "div"
+        body = "<br>".join(escape(line) for line in self._text_lines(start, end))
+        top = (hour - 7) * 44 + minute * 44 // 60
+        return (
+            f'<a class="fc-time-grid-event fc-v-event fc-event fc-start fc-end" '
+            f'style="top: {top}px; bottom: -{top + duration * 44 // 60}px; z-index: 1; '
+            f'left: {column * COLUMN_WIDTH:.4f}%; right: 0%;">'
+            f'<div class="fc-content">'
+            f'<{tag} class="fc-time" data-start="{hour}:{minute:02d}" data-full="{start} - {end}">'
+            f'<span>{short}</span></{tag}>'
+            f'<{tag} class="fc-title">{body}</{tag}>'
+            f'</div><div class="fc-bg"></div></a>'
+        )
+
+    def _day_events(self, column):
+        count = max(0, round(self.rng.gauss(self.density, self.density / 3)))
+        slots = sorted(self.rng.sample(SLOTS, min(count, len(SLOTS))))
+        return "".join(self._event_html(column, *slot) for slot in slots)
+
+    # --- Page ---
+
+    def _boilerplate(self):
+        item = '<li class="menu-item"><a href="/calendar/Home/Index?view=week">Emploi du temps</a></li>'
+        nav = item * max(1, self.boilerplate_kb * 512 // len(item))
+        script = "var celcatConfig = {lang: 'fr', view: 'agendaWeek'};" * max(1, self.boilerplate_kb * 512 // 52)
+        return f'<nav class="navbar"><ul>{nav}</ul></nav><script>{script}</script>'
+
+    def week_html(self, monday):
+        """Page complète de la semaine commençant au lundi monday."""
+        days = [monday + timedelta(days=offset) for offset in range(-1, 6)]  # dimanche → samedi
+        headers = "".join(
+            f'<th class="fc-day-header fc-widget-header {DAY_CLASSES[column]}" data-date="{day.isoformat()}">'
+            f'<span>{day.strftime("%a %d/%m")}</span></th>'
+            for column, day in enumerate(days)
+        )
+
+        columns = []
+        for column in range(7):
+            working_day = 1 <= column <= 5 or (self.weekend and column == 6)
+            events = self._day_events(column) if working_day else ""
+            columns.append(
+                '<td><div class="fc-content-col">'
+                '<div class="fc-event-container fc-helper-container"></div>'
+                f'<div class="fc-event-container">{events}</div>'
+                '</div></td>'
+            )
+
+        return (
+            '<!DOCTYPE html><html lang="fr"><head><meta charset="utf-8"><title>Celcat Calendar</title></head>'
+            f'<body>{self._boilerplate()}'
+            '<div id="calendar" class="fc fc-unthemed fc-ltr"><div class="fc-view-container">'
+            '<div class="fc-view fc-agendaWeek-view fc-agenda-view"><table>'
+            '<thead class="fc-head"><tr><td class="fc-head-container fc-widget-header">'
+            '<div class="fc-row fc-widget-header"><table><thead><tr>'
+            f'<th class="fc-axis fc-widget-header"></th>{headers}'
+            '</tr></thead></table></div></td></tr></thead>'
+            '<tbody class="fc-body"><tr><td class="fc-widget-content">'
+            '<div class="fc-time-grid-container"><div class="fc-time-grid">'
+            '<div class="fc-bg"><table><tbody><tr><td class="fc-axis fc-widget-content"></td></tr></tbody></table></div>'
+            '<div class="fc-content-skeleton"><table><tbody><tr>'
+            f'<td class="fc-axis"></td>{"".join(columns)}'
+            '</tr></tbody></table></div>'
+            '</div></div></td></tr></tbody></table></div></div></div>'
+            '</body></html>'
+        )
+
+    def write_weeks(self, folder, nb_weeks, start=date(2024, 9, 2)):
+        """Écrit nb_weeks fichiers week_YYYY-MM-DD.html. Retourne la liste des chemins."""
+        os.makedirs(folder, exist_ok=True)
+        monday = start - timedelta(days=start.weekday())
+        paths = []
+        for offset in range(nb_weeks):
+            week_start = monday + timedelta(weeks=offset)
+            path = os.path.join(folder, f"week_{week_start.isoformat()}.html")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.week_html(week_start))
+            paths.append(path)
+        return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère des semaines Celcat synthétiques (HTML FullCalendar).")
+    parser.add_argument('folder', help="Dossier de sortie (ex: archives_html)")
+    parser.add_argument('--weeks', type=int, default=26, help="Nombre de semaines (défaut: 26)")
+    parser.add_argument('--start', default="2024-09-02", help="Première semaine (défaut: 2024-09-02)")
+    parser.add_argument('--density', type=float, default=4, help="Événements par jour ouvré (défaut: 4)")
+    parser.add_argument('--ampm', type=float, default=0.5, help="Part des horaires AM/PM (défaut: 0.5)")
+    parser.add_argument('--weekend', action='store_true', help="Générer aussi des événements le samedi")
+    parser.add_argument('--boilerplate-kb', type=int, default=20, help="Taille du gabarit de page (défaut: 20)")
+    parser.add_argument('--inline-tags', action='store_true', help="fc-time / fc-title en <span> (parse_event)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generator = WeekGenerator(
+        density=args.density, ampm=args.ampm, weekend=args.weekend,
+        boilerplate_kb=args.boilerplate_kb, inline_tags=args.inline_tags, seed=args.seed,
+    )
+    paths = generator.write_weeks(args.folder, args.weeks, date.fromisoformat(args.start))
+    print(f"✅ {len(paths)} semaine(s) générée(s) dans '{args.folder}'")
+
+
+if __name__ == "__main__":
+    main()
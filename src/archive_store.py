@@ -0,0 +1,270 @@
+"""
+STOCKAGE DÉDOUBLONNÉ ET COMPRESSÉ DES ARCHIVES HTML
+===================================================
+Magasin adressé par contenu pour les pages hebdomadaires : chaque page
+est découpée en morceaux (découpage dépendant du contenu, aux frontières
+de balises), chaque morceau est stocké une seule fois, compressé, sous
+son empreinte SHA-256. Le gabarit commun aux semaines et aux exécutions
+n'est donc stocké qu'une fois, et l'historique des snapshots coûte peu.
+
+Structure :
+    archives_store/
+        index.json              snapshots par nom de fichier (liste de morceaux)
+                                et pages de la dernière exécution (last_run)
+        objects/ab/abcdef...    morceaux compressés (zlib)
+
+Les pages sont nommées d'après le lundi de leur semaine (week_filename) ;
+html_to_json ne convertit que les pages de la dernière exécution
+(run_names), pas les semaines plus anciennes restées dans l'historique.
+
+Usage:
+    python src/archive_store.py import archives_html   # importe des week_*.html
+    python src/archive_store.py export archives_html   # restaure la dernière version
+    python src/archive_store.py stats
+"""
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+DEFAULT_STORE_DIR = "archives_store"
+INDEX_VERSION = 1
+
+# Découpage : une frontière est posée après une balise dont le CRC32 vérifie
+# le masque (1 chance sur 64), avec des tailles de morceau bornées
+CHUNK_MASK = 0x3F
+MIN_CHUNK = 2 * 1024
+MAX_CHUNK = 64 * 1024
+COMPRESSION_LEVEL = 9
+
+_TAG_START_RE = re.compile(r'<')
+
+
+def week_filename(week_date):
+    """Nom de la page d'une semaine, d'après son lundi : un seul nom par semaine, quel que soit le jour du run."""
+    monday = week_date - timedelta(days=week_date.weekday())
+    return f"week_{monday.strftime('%Y-%m-%d')}.html"
+
+
+def chunk_html(html_content):
+    """
+    Découpe une page en morceaux dont les frontières ne dépendent que du
+    contenu local : une modification ne change que le(s) morceau(x) qui
+    la contiennent, le reste de la page se dédoublonne.
+    """
+    chunks = []
+    chunk_start = 0
+    token_start = 0
+    for match in _TAG_START_RE.finditer(html_content, 1):
+        pos = match.start()
+        token = html_content[token_start:pos]
+        token_start = pos
+        size = pos - chunk_start
+        if size >= MAX_CHUNK or (
+            size >= MIN_CHUNK and (zlib.crc32(token.encode('utf-8')) & CHUNK_MASK) == 0
+        ):
+            chunks.append(html_content[chunk_start:pos])
+            chunk_start = pos
+    if chunk_start < len(html_content):
+        chunks.append(html_content[chunk_start:])
+    return chunks
+
+
+class ArchiveStore:
+    """Magasin de snapshots HTML adressé par contenu (utilisable depuis plusieurs threads)."""
+
+    def __init__(self, root=DEFAULT_STORE_DIR, run_id=None):
+        """
+        Args:
+            root: Dossier du magasin
+            run_id: Identifiant de l'exécution qui écrit (les pages qu'elle
+                enregistre, même inchangées, forment last_run)
+        """
+        self.root = root
+        self.run_id = run_id
+        self.objects_dir = os.path.join(root, "objects")
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        self.snapshots = {}
+        self.last_run = None
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.snapshots = data.get('snapshots', {})
+            self.last_run = data.get('last_run')
+
+    # --- Objets ---
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _put_chunk(self, chunk):
+        """Stocke un morceau s'il est nouveau. Retourne (empreinte, octets écrits)."""
+        data = chunk.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, COMPRESSION_LEVEL)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        return digest, len(compressed)
+
+    def _get_chunk(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return zlib.decompress(f.read()).decode('utf-8')
+
+    # --- Snapshots ---
+
+    def put(self, name, html_content, taken_at=None):
+        """
+        Enregistre un snapshot de la page name (ex: week_2025-03-03.html).
+        Un contenu identique au dernier snapshot n'est pas dupliqué.
+
+        Returns:
+            dict avec le snapshot et les octets réellement écrits
+        """
+        digest = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+
+        with self._lock:
+            history = self.snapshots.setdefault(name, [])
+            if history and history[-1]['sha256'] == digest:
+                if self._mark_run(name):
+                    self._save_index()
+                return {'snapshot': history[-1], 'new_bytes': 0, 'unchanged': True}
+
+        new_bytes = 0
+        chunk_ids = []
+        for chunk in chunk_html(html_content):
+            chunk_id, written = self._put_chunk(chunk)
+            chunk_ids.append(chunk_id)
+            new_bytes += written
+
+        snapshot = {
+            'taken_at': (taken_at or datetime.now()).isoformat(timespec='seconds'),
+            'sha256': digest,
+            'size': len(html_content.encode('utf-8')),
+            'chunks': chunk_ids,
+        }
+        with self._lock:
+            self.snapshots.setdefault(name, []).append(snapshot)
+            self._mark_run(name)
+            self._save_index()
+        return {'snapshot': snapshot, 'new_bytes': new_bytes, 'unchanged': False}
+
+    def _mark_run(self, name):
+        """Ajoute name aux pages de l'exécution courante (sous verrou). Retourne True si l'index change."""
+        if self.run_id is None:
+            return False
+        if self.last_run is None or self.last_run.get('id') != self.run_id:
+            self.last_run = {'id': self.run_id, 'pages': []}
+        if name in self.last_run['pages']:
+            return False
+        self.last_run['pages'].append(name)
+        return True
+
+    def _save_index(self):
+        data = {'version': INDEX_VERSION, 'snapshots': self.snapshots}
+        if self.last_run is not None:
+            data['last_run'] = self.last_run
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def names(self, pattern="week_*.html"):
+        """Noms des pages archivées, triés (filtrés par motif glob)."""
+        regex = re.compile(fnmatch.translate(pattern))
+        return sorted(name for name in self.snapshots if regex.match(name))
+
+    def run_names(self, pattern="week_*.html"):
+        """
+        Pages enregistrées par la dernière exécution (triées, filtrées par
+        motif glob) ; toutes les pages pour un index sans last_run.
+        """
+        if not self.last_run:
+            return self.names(pattern)
+        regex = re.compile(fnmatch.translate(pattern))
+        return sorted(name for name in self.last_run['pages'] if regex.match(name) and name in self.snapshots)
+
+    def latest(self, name):
+        """Dernier snapshot de name (dict) ou None."""
+        history = self.snapshots.get(name)
+        return history[-1] if history else None
+
+    def read(self, name, index=-1):
+        """Contenu HTML d'un snapshot (par défaut le plus récent)."""
+        snapshot = self.snapshots[name][index]
+        return "".join(self._get_chunk(chunk_id) for chunk_id in snapshot['chunks'])
+
+    def iter_latest(self, pattern="week_*.html"):
+        """Itère (nom, html) sur la dernière version de chaque page, sans rien écrire sur disque."""
+        for name in self.names(pattern):
+            yield name, self.read(name)
+
+    def stats(self):
+        """Volumes logique (pages complètes) et physique (morceaux compressés)."""
+        logical = sum(s['size'] for history in self.snapshots.values() for s in history)
+        stored = 0
+        objects = 0
+        for path in glob.glob(os.path.join(self.objects_dir, "*", "*")):
+            stored += os.path.getsize(path)
+            objects += 1
+        return {
+            'pages': len(self.snapshots),
+            'snapshots': sum(len(history) for history in self.snapshots.values()),
+            'objects': objects,
+            'logical_bytes': logical,
+            'stored_bytes': stored,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Magasin dédoublonné des archives HTML Celcat.")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help=f"Dossier du magasin (défaut: {DEFAULT_STORE_DIR})")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_import = sub.add_parser('import', help="Importer les week_*.html d'un dossier")
+    p_import.add_argument('folder')
+    p_export = sub.add_parser('export', help="Restaurer la dernière version de chaque page dans un dossier")
+    p_export.add_argument('folder')
+    sub.add_parser('stats', help="Afficher les volumes stockés")
+    args = parser.parse_args()
+
+    run_id = datetime.now().isoformat(timespec='seconds') if args.command == 'import' else None
+    store = ArchiveStore(args.store, run_id=run_id)
+
+    if args.command == 'import':
+        files = sorted(glob.glob(os.path.join(args.folder, "week_*.html")))
+        for file_path in files:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                result = store.put(os.path.basename(file_path), f.read())
+            state = "inchangé" if result['unchanged'] else f"+{result['new_bytes']} octets"
+            print(f" -> {os.path.basename(file_path)} : {state}")
+    elif args.command == 'export':
+        os.makedirs(args.folder, exist_ok=True)
+        for name, html_content in store.iter_latest():
+            with open(os.path.join(args.folder, name), 'w', encoding='utf-8') as f:
+                f.write(html_content)
+        print(f"✅ {len(store.names())} page(s) restaurée(s) dans '{args.folder}'")
+
+    stats = store.stats()
+    ratio = stats['logical_bytes'] / stats['stored_bytes'] if stats['stored_bytes'] else 0
+    print(f"📦 {stats['pages']} pages, {stats['snapshots']} snapshots, {stats['objects']} morceaux : "
+          f"{stats['logical_bytes'] / 1024:.0f} Kio → {stats['stored_bytes'] / 1024:.0f} Kio (x{ratio:.1f})")
+
+
+if __name__ == "__main__":
+    main()
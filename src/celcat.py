@@ -0,0 +1,140 @@
+"""
+COMMANDE UNIQUE CELCAT
+======================
+Point d'entrée de toutes les étapes, avec des sous-commandes qui délèguent
+aux scripts existants (mêmes options) :
+
+    python src/celcat.py scrape [...]      scraper_complet.py
+    python src/celcat.py convert [...]     html_to_json.py
+    python src/celcat.py merge             merge_and_compare.py
+    python src/celcat.py ics [...]         json_to_ics.py
+    python src/celcat.py store [...]       event_store.py
+    python src/celcat.py daemon [...]      scraper_daemon.py
+
+et un mode pipeline qui enchaîne conversion, fusion et ICS dans un seul
+interpréteur, les événements passant d'une étape à l'autre en mémoire
+(pas de temp_update.json relu ni de master JSON re-parsé) :
+
+    python src/celcat.py pipeline --parser lxml
+    python src/celcat.py pipeline --scrape --parser lxml --update-output temp_update.json
+
+Les modules de chaque étape ne sont importés qu'au moment où elle
+s'exécute : `celcat merge` ne charge ni Selenium, ni bs4, ni lxml.
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+
+# Sous-commande -> (module, description) ; la sous-commande reçoit les options du script
+COMMANDS = {
+    'scrape': ('scraper_complet', "Scrape l'emploi du temps et archive le HTML"),
+    'convert': ('html_to_json', "Convertit les archives HTML en JSON"),
+    'merge': ('merge_and_compare', "Fusionne temp_update.json dans le master"),
+    'ics': ('json_to_ics', "Génère le fichier ICS"),
+    'store': ('event_store', "Magasin SQLite des événements"),
+    'daemon': ('scraper_daemon', "Démon de scraping"),
+}
+
+
+def run_command(name, argv):
+    """Exécute le main() du script de la sous-commande avec ses propres arguments."""
+    module = importlib.import_module(COMMANDS[name][0])
+    entry = getattr(module, 'main', None) or module.run
+    sys.argv = [f"celcat {name}"] + list(argv)
+    return entry()
+
+
+def run_pipeline(args):
+    """Conversion -> fusion -> ICS dans le même processus, événements en mémoire."""
+    started = time.perf_counter()
+
+    if args.scrape:
+        print("🕷️ Étape scrape")
+        run_command('scrape', args.scrape_args)
+
+    # 1. Conversion des archives (manifeste de html_to_json)
+    from events import event_to_json
+    from html_to_json import load_archive_events
+    from metrics import metrics
+
+    print("\n📄 Étape convert")
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    metrics.start("html_to_json", parser=args.parser, jobs=jobs, source=args.store or args.input, pipeline=True)
+    update = load_archive_events(args.input, args.store, jobs, args.parser)
+    if args.update_output:
+        with metrics.span("write_json"), open(args.update_output, 'w', encoding='utf-8') as f:
+            json.dump(update, f, ensure_ascii=False, indent=4, default=event_to_json)
+    metrics.finish()
+
+    # 2. Fusion dans le master (JSON ou magasin SQLite)
+    import merge_and_compare
+
+    print("\n🔄 Étape merge")
+    changed, master = merge_and_compare.run(new_data=update)
+    del update
+
+    # 3. ICS : seulement si le master a changé (comme le workflow), ou si demandé
+    if changed or args.force_ics or not os.path.exists(args.ics_output):
+        from json_to_ics import DEFAULT_CACHE_PATH, VeventCache, write_ics_stream
+
+        print("\n📅 Étape ics")
+        metrics.start("json_to_ics", engine='stream', cache=True, store=master is None, pipeline=True)
+        store = None
+        if master is None:
+            from event_store import EventStore
+            store = EventStore(merge_and_compare.EVENT_STORE_PATH)
+            data = store.iter_events()
+        else:
+            data = master
+        with metrics.span("write_ics"):
+            count = write_ics_stream(data, args.ics_output, VeventCache(args.ics_cache or DEFAULT_CACHE_PATH))
+        if store is not None:
+            store.close()
+        metrics.incr("events_written", count)
+        metrics.finish()
+        print(f"Succès ! Le fichier '{args.ics_output}' a été créé avec {count} événements.")
+    else:
+        print("\n📅 Étape ics ignorée (aucun changement)")
+
+    print(f"\n⏱️ Pipeline terminé en {time.perf_counter() - started:.2f}s")
+    return changed
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(prog="celcat", description="Emploi du temps CELCAT : scraping, conversion, fusion et ICS.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, (module, description) in COMMANDS.items():
+        sub.add_parser(name, help=f"{description} ({module}.py)", add_help=False)
+
+    p_pipeline = sub.add_parser('pipeline', help="convert -> merge -> ics en mémoire, dans un seul processus")
+    p_pipeline.add_argument('--scrape', action='store_true',
+                            help="Lancer d'abord le scraper dans le même processus (options après --scrape-args)")
+    p_pipeline.add_argument('--input', default='archives_html', help="Dossier des archives HTML (défaut: archives_html)")
+    p_pipeline.add_argument('--store', default=None, help="Magasin d'archives (archive_store.py) au lieu de --input")
+    p_pipeline.add_argument('--jobs', type=int, default=1, help="Processus de parsing (défaut: 1, 0 = tous les cœurs)")
+    p_pipeline.add_argument('--parser', choices=('html.parser', 'lxml'),
+                            default=os.environ.get('CELCAT_PARSER', 'html.parser'),
+                            help="Backend de parsing (défaut: $CELCAT_PARSER ou html.parser)")
+    p_pipeline.add_argument('--update-output', default=None,
+                            help="Écrire aussi la mise à jour convertie (ex: temp_update.json, pour l'artifact)")
+    p_pipeline.add_argument('--ics-output', default='mon_emploi_du_temps_fixed.ics',
+                            help="Fichier ICS (défaut: mon_emploi_du_temps_fixed.ics)")
+    p_pipeline.add_argument('--ics-cache', default=None, help="Cache des VEVENT (défaut: celui de json_to_ics)")
+    p_pipeline.add_argument('--force-ics', action='store_true', help="Régénérer l'ICS même sans changement")
+    p_pipeline.add_argument('--scrape-args', nargs=argparse.REMAINDER, default=[],
+                            help="Options transmises au scraper (à placer en dernier)")
+
+    # Les sous-commandes déléguées gardent leurs propres options (et --help)
+    if argv and argv[0] in COMMANDS:
+        return run_command(argv[0], argv[1:])
+
+    args = parser.parse_args(argv)
+    return run_pipeline(args)
+
+
+if __name__ == "__main__":
+    main()
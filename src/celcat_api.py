@@ -0,0 +1,160 @@
+"""
+INGESTION DIRECTE DES DONNÉES CELCAT (GetCalendarData)
+======================================================
+Récupère les événements en JSON depuis l'endpoint calendar-data de CELCAT,
+en réutilisant les cookies de la session Selenium authentifiée, sans passer
+par le rendu FullCalendar ni par BeautifulSoup. Une plage de plusieurs mois
+est couverte en quelques requêtes HTTP.
+"""
+import html
+import re
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, parse_qs, urljoin
+
+import requests
+
+from html_to_json import parse_content_lines
+
+# Chemin de l'endpoint, relatif à la racine de l'application CELCAT (ex: /calendar/)
+CALENDAR_DATA_PATH = "Home/GetCalendarData"
+
+# Paramètre "et" de l'URL du calendrier -> resType attendu par GetCalendarData
+RES_TYPES = {
+    'module': 100,
+    'staff': 101,
+    'room': 102,
+    'group': 103,
+    'student': 104,
+}
+
+# Nombre de jours demandés par requête (26 semaines = 4 requêtes)
+DEFAULT_CHUNK_DAYS = 56
+# Réponses transitoires après lesquelles GetCalendarData (lecture seule) est redemandé
+RETRY_STATUSES = (502, 503, 504)
+RETRY_BACKOFF = 0.5
+
+_BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+
+def description_to_lines(description):
+    """Découpe la description HTML d'un événement CELCAT en lignes de texte."""
+    if not description:
+        return []
+    text = _BR_RE.sub('\n', description)
+    text = html.unescape(_TAG_RE.sub('', text))
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def map_calendar_event(raw):
+    """
+    Convertit un événement brut de GetCalendarData vers le schéma JSON du
+    projet (date, start_time, end_time, title, course_code, ...).
+    """
+    start = raw.get('start') or ''
+    end = raw.get('end') or ''
+
+    event = {'date': start[:10]}
+    if raw.get('allDay'):
+        # Convention de json_to_ics : 00:00 = toute la journée
+        event['start_time'] = "00:00"
+        event['end_time'] = ""
+    else:
+        event['start_time'] = start[11:16]
+        event['end_time'] = end[11:16] if end[:10] == start[:10] else ""
+
+    event.update(parse_content_lines(description_to_lines(raw.get('description', ''))))
+    return event
+
+
+class CelcatDataFetcher:
+    """Client HTTP pour l'endpoint GetCalendarData de CELCAT."""
+
+    def __init__(self, calendar_url, session=None, chunk_days=DEFAULT_CHUNK_DAYS, timeout=30, retries=0):
+        """
+        Args:
+            calendar_url: URL du calendrier (contient fid0=..., et=student, ...)
+            session: requests.Session déjà authentifiée (cookies)
+            chunk_days: Nombre de jours demandés par requête
+            timeout: Timeout HTTP (secondes)
+            retries: Nouvelles tentatives d'une requête sur erreur réseau ou 502/503/504
+        """
+        self.calendar_url = calendar_url
+        self.session = session or requests.Session()
+        self.chunk_days = chunk_days
+        self.timeout = timeout
+        self.retries = retries
+
+        parsed = urlparse(calendar_url)
+        query = parse_qs(parsed.query)
+
+        self.endpoint = urljoin(calendar_url, CALENDAR_DATA_PATH)
+        fid_keys = sorted((k for k in query if re.fullmatch(r'fid\d+', k)), key=lambda k: int(k[3:]))
+        self.federation_ids = [query[k][0] for k in fid_keys]
+        self.res_type = RES_TYPES.get(query.get('et', ['student'])[0], RES_TYPES['student'])
+
+    @classmethod
+    def from_driver(cls, driver, calendar_url, **kwargs):
+        """Crée un fetcher qui réutilise les cookies et le User-Agent du navigateur Selenium."""
+        session = requests.Session()
+        for cookie in driver.get_cookies():
+            session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+        try:
+            session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent;")
+        except Exception:
+            pass
+        return cls(calendar_url, session=session, **kwargs)
+
+    def fetch_raw(self, start, end):
+        """Récupère les événements bruts entre start (inclus) et end (exclu)."""
+        payload = {
+            'start': start.strftime('%Y-%m-%d'),
+            'end': end.strftime('%Y-%m-%d'),
+            'resType': self.res_type,
+            'calView': 'agendaWeek',
+            'federationIds[]': self.federation_ids,
+            'colourScheme': 3,
+        }
+        # POST en lecture seule : il peut être rejoué sans effet de bord
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                response = self.session.post(
+                    self.endpoint, data=payload, timeout=self.timeout,
+                    headers={'X-Requested-With': 'XMLHttpRequest'}
+                )
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                continue
+            if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                break
+        response.raise_for_status()
+        return response.json()
+
+    def fetch_events(self, start_date, nb_weeks):
+        """
+        Récupère nb_weeks semaines à partir du lundi de start_date et
+        retourne les événements triés au format du projet.
+        """
+        if isinstance(start_date, datetime):
+            start_date = start_date.date()
+        range_start = start_date - timedelta(days=start_date.weekday())
+        range_end = range_start + timedelta(weeks=nb_weeks)
+
+        events = []
+        chunk_start = range_start
+        while chunk_start < range_end:
+            chunk_end = min(chunk_start + timedelta(days=self.chunk_days), range_end)
+            raw_events = self.fetch_raw(chunk_start, chunk_end)
+            print(f"   🌐 {chunk_start} → {chunk_end} : {len(raw_events)} événements reçus")
+            events.extend(map_calendar_event(raw) for raw in raw_events)
+            chunk_start = chunk_end
+
+        events.sort(key=lambda x: (x.get('date', ''), x.get('start_time', '')))
+        return events
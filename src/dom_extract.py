@@ -0,0 +1,145 @@
+"""
+EXTRACTION DES ÉVÉNEMENTS DANS LE NAVIGATEUR
+============================================
+Lit les événements affichés directement dans la page avec un seul
+execute_script : parcours compact de la grille FullCalendar rendue, avec
+les dates exactes lues dans l'objet événement que FullCalendar attache à
+chaque élément (données jQuery 'fc-seg'). Le navigateur ne renvoie
+qu'un petit JSON (dates, horaires et lignes de texte), au lieu de
+transférer tout le HTML puis de le re-parser avec BeautifulSoup.
+
+Les champs sont construits comme dans html_to_json (parse_content_lines),
+la colonne d'un événement est son td dans la grille (pas le left:% du style).
+Si le script échoue ou ne trouve pas la grille, l'appelant se replie sur
+le parser HTML (extract_celcat_data).
+"""
+import os
+
+from html_to_json import convert_to_24h, parse_content_lines
+
+# Mode d'extraction du scraper : "html" (page_source + parser) ou "script"
+EXTRACT_MODES = ('html', 'script')
+DEFAULT_EXTRACT_MODE = os.environ.get('CELCAT_EXTRACT', 'html').strip().lower()
+
+_CLIENT_EVENTS_JS = """
+function hasClass(el, name) {
+    return (' ' + (el.getAttribute('class') || '') + ' ').replace(/\\s+/g, ' ').indexOf(' ' + name + ' ') >= 0;
+}
+function first(el, tag, name) {
+    var found = el.getElementsByTagName(tag);
+    for (var i = 0; i < found.length; i++) {
+        if (hasClass(found[i], name)) { return found[i]; }
+    }
+    return null;
+}
+function textLines(el, lines) {
+    for (var i = 0; i < el.childNodes.length; i++) {
+        var node = el.childNodes[i];
+        if (node.nodeType === 3) {
+            var text = node.nodeValue.trim();
+            if (text) { lines.push(text); }
+        } else if (node.nodeType === 1 && node.tagName !== 'SCRIPT' && node.tagName !== 'STYLE') {
+            textLines(node, lines);
+        }
+    }
+    return lines;
+}
+function fmt(value) {
+    // Moment FullCalendar v3 (event.start / dateProfile.start)
+    if (!value) { return null; }
+    if (typeof value.format === 'function') { return value.format('YYYY-MM-DDTHH:mm'); }
+    return null;
+}
+function segRange(el) {
+    var $ = window.jQuery;
+    var seg = $ ? $(el).data('fc-seg') : null;
+    if (!seg) { return [null, null]; }
+    var event = seg.event
+        || (seg.footprint && seg.footprint.eventInstance && seg.footprint.eventInstance.dateProfile);
+    return event ? [fmt(event.start), fmt(event.end)] : [null, null];
+}
+
+var dates = [];
+var headers = document.querySelectorAll('th.fc-day-header');
+for (var h = 0; h < headers.length; h++) { dates.push(headers[h].getAttribute('data-date')); }
+
+var grid = document.querySelectorAll('.fc-time-grid .fc-content-skeleton td');
+if (!headers.length || !grid.length) { return null; }
+
+var columns = [];
+var column = 0;
+for (var c = 0; c < grid.length; c++) {
+    var td = grid[c];
+    if (!first(td, 'div', 'fc-event-container')) { continue; }
+    var events = [];
+    var links = td.getElementsByTagName('a');
+    for (var e = 0; e < links.length; e++) {
+        var link = links[e];
+        if (!hasClass(link, 'fc-time-grid-event')) { continue; }
+        var time = first(link, 'div', 'fc-time');
+        var content = first(link, 'div', 'fc-content');
+        var range = segRange(link);
+        events.push({
+            time: time ? time.getAttribute('data-full') : null,
+            start: range[0],
+            end: range[1],
+            lines: content ? textLines(content, []) : null
+        });
+    }
+    columns.push({column: column, events: events});
+    column++;
+}
+return {dates: dates, columns: columns};
+"""
+
+
+def payload_to_events(payload):
+    """
+    Convertit le JSON renvoyé par le script en événements au format de
+    html_to_json (mêmes clés, même ordre de colonnes et d'événements).
+    """
+    dates_map = {index: date for index, date in enumerate(payload['dates']) if date}
+
+    events_list = []
+    for column in payload['columns']:
+        current_date = dates_map.get(column['column'])
+        if current_date is None:
+            continue
+
+        for item in column['events']:
+            event_data = {}
+            times = item['time'].split('-') if item.get('time') is not None else None
+            if item.get('start'):
+                # Dates exactes de l'objet événement FullCalendar
+                event_data['date'] = item['start'][:10]
+                event_data['start_time'] = item['start'][11:16]
+                if item.get('end'):
+                    event_data['end_time'] = item['end'][11:16]
+                else:
+                    # Fin absente de l'objet FullCalendar : celle de data-full, comme le parser HTML
+                    event_data['end_time'] = convert_to_24h(times[1]) if times and len(times) > 1 else ""
+            elif times is not None:
+                event_data['date'] = current_date
+                event_data['start_time'] = convert_to_24h(times[0])
+                event_data['end_time'] = convert_to_24h(times[1]) if len(times) > 1 else ""
+
+            if item.get('lines') is not None:
+                event_data.update(parse_content_lines(item['lines']))
+
+            events_list.append(event_data)
+
+    return events_list
+
+
+def extract_client_events(driver):
+    """
+    Événements de la semaine affichée, lus dans le navigateur.
+
+    Returns:
+        Liste d'événements (format html_to_json), ou None si la grille
+        n'est pas rendue. Les erreurs WebDriver / JavaScript sont propagées.
+    """
+    payload = driver.execute_script(_CLIENT_EVENTS_JS)
+    if not payload:
+        return None
+    return payload_to_events(payload)
@@ -0,0 +1,91 @@
+"""
+MOTEUR DE DIFF DES ÉVÉNEMENTS
+=============================
+Compare deux listes d'événements par identité (event_key) et produit un
+changeset : événements ajoutés, supprimés et modifiés (même identité,
+contenu différent). L'ordre des événements n'est pas significatif.
+"""
+from events import event_fingerprint, event_key
+
+
+def _group_by_key(events):
+    groups = {}
+    for event in events:
+        groups.setdefault(event_key(event), []).append(event)
+    return groups
+
+
+class Changeset:
+    """Résultat d'un diff : listes added, removed et modified (paires avant/après)."""
+
+    def __init__(self, added=None, removed=None, modified=None):
+        self.added = added or []
+        self.removed = removed or []
+        self.modified = modified or []
+
+    @property
+    def has_changes(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def summary(self):
+        return {
+            'added': len(self.added),
+            'removed': len(self.removed),
+            'modified': len(self.modified),
+        }
+
+    def to_dict(self):
+        return {
+            'summary': self.summary(),
+            'added': self.added,
+            'removed': self.removed,
+            'modified': [{'before': before, 'after': after} for before, after in self.modified],
+        }
+
+    def __repr__(self):
+        s = self.summary()
+        return f"Changeset(+{s['added']} -{s['removed']} ~{s['modified']})"
+
+
+def diff_events(old_events, new_events):
+    """
+    Diff par identité entre old_events et new_events.
+
+    Les événements de même identité sont comparés par empreinte de contenu ;
+    si plusieurs partagent une identité, les surplus sont comptés comme
+    ajoutés ou supprimés.
+    """
+    old_groups = _group_by_key(old_events)
+    new_groups = _group_by_key(new_events)
+    changeset = Changeset()
+
+    for key, old_list in old_groups.items():
+        new_list = new_groups.get(key)
+        if new_list is None:
+            changeset.removed.extend(old_list)
+            continue
+
+        # Apparier d'abord les événements strictement identiques
+        remaining_new = {}
+        for event in new_list:
+            remaining_new.setdefault(event_fingerprint(event), []).append(event)
+        unmatched_old = []
+        for event in old_list:
+            same = remaining_new.get(event_fingerprint(event))
+            if same:
+                same.pop()
+            else:
+                unmatched_old.append(event)
+        unmatched_new = [e for events in remaining_new.values() for e in events]
+
+        # Puis les événements restants de même identité : modifiés
+        for before, after in zip(unmatched_old, unmatched_new):
+            changeset.modified.append((before, after))
+        changeset.removed.extend(unmatched_old[len(unmatched_new):])
+        changeset.added.extend(unmatched_new[len(unmatched_old):])
+
+    for key, new_list in new_groups.items():
+        if key not in old_groups:
+            changeset.added.extend(new_list)
+
+    return changeset
@@ -0,0 +1,198 @@
+"""
+MAGASIN SQLITE DES ÉVÉNEMENTS
+=============================
+Alternative optionnelle au master JSON : les événements sont stockés dans
+une base SQLite indexée par date et par identité. La mise à jour
+quotidienne ne lit et ne remplace que la fenêtre de dates scrapée, dans
+une seule transaction ; l'ICS est généré en flux depuis une requête triée.
+L'import / export JSON garde le format du master (même ordre, mêmes octets).
+
+Ordre des événements : (date, heure de début, ordre d'insertion), comme
+le tri stable du master JSON.
+
+Usage:
+    python src/event_store.py import json/emploi_du_temps_complet.json
+    python src/event_store.py export json/emploi_du_temps_complet.json
+    python src/event_store.py stats
+
+Variable d'environnement :
+    EVENT_STORE=json/events.sqlite    utilisé par merge_and_compare.py et json_to_ics.py
+"""
+import argparse
+import json
+import os
+import sqlite3
+
+from event_diff import diff_events
+from events import event_fingerprint, event_key_digest, event_object_hook, event_to_json
+
+DEFAULT_STORE_PATH = "json/events.sqlite"
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    identity TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_date ON events (date, start_time, id);
+CREATE INDEX IF NOT EXISTS events_by_identity ON events (identity);
+"""
+
+
+def _sort_key(event):
+    return (event.get('date') or '', event.get('start_time') or '')
+
+
+def _row(event):
+    data = event.to_dict() if hasattr(event, 'to_dict') else event
+    return (
+        event.get('date') or '',
+        event.get('start_time') or '',
+        event_key_digest(event),
+        event_fingerprint(event),
+        json.dumps(data, ensure_ascii=False),
+    )
+
+
+class EventStore:
+    """Événements du master dans une base SQLite (fenêtres de dates remplacées en transaction)."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            raise RuntimeError(f"Magasin d'événements '{path}' : schéma v{version} non supporté")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Lecture ---
+
+    def iter_events(self, start=None, end=None):
+        """Événements triés, éventuellement restreints aux dates [start, end] (requête indexée)."""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(end)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = self.conn.execute(f"SELECT data FROM events{where} ORDER BY date, start_time, id", params)
+        for (data,) in cursor:
+            yield json.loads(data, object_hook=event_object_hook)
+
+    def date_range(self):
+        """(première date, dernière date) des événements datés, ou (None, None)."""
+        return self.conn.execute("SELECT MIN(date), MAX(date) FROM events WHERE date != ''").fetchone()
+
+    # --- Écriture ---
+
+    def replace_all(self, events):
+        """Remplace tout le contenu (import). Retourne le nombre d'événements."""
+        rows = [_row(event) for event in sorted(events, key=_sort_key)]
+        with self.conn:
+            self.conn.execute("DELETE FROM events")
+            self.conn.executemany(
+                "INSERT INTO events (date, start_time, identity, fingerprint, data) VALUES (?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def replace_window(self, new_events, keep_dates=()):
+        """
+        Remplace la plage de dates couverte par new_events, comme merge_window()
+        pour le master JSON, mais en ne lisant que cette plage (les dates de
+        keep_dates absentes de new_events sont conservées).
+
+        Returns:
+            (changeset, (min_date, max_date)) ou None si new_events ne
+            contient aucune date. La base n'est écrite que s'il y a des changements.
+        """
+        new_dates = [e['date'] for e in new_events if e.get('date')]
+        if not new_dates:
+            return None
+        min_date, max_date = min(new_dates), max(new_dates)
+
+        old_window = list(self.iter_events(min_date, max_date))
+        keep = set(keep_dates).difference(new_dates)
+        kept = [e for e in old_window if e.get('date') in keep] if keep else []
+        new_window = sorted(list(new_events) + kept, key=_sort_key)
+        changeset = diff_events(old_window, new_window)
+        if changeset.has_changes:
+            rows = [_row(event) for event in new_window]
+            # Suppression de la fenêtre et insertion de la nouvelle version : une seule transaction
+            with self.conn:
+                self.conn.execute("DELETE FROM events WHERE date BETWEEN ? AND ?", (min_date, max_date))
+                self.conn.executemany(
+                    "INSERT INTO events (date, start_time, identity, fingerprint, data) VALUES (?, ?, ?, ?, ?)", rows
+                )
+        return changeset, (min_date, max_date)
+
+    # --- Compatibilité JSON ---
+
+    def import_json(self, path):
+        """Charge un master JSON (liste ou {"events": [...]})."""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f, object_hook=event_object_hook)
+        events = data.get('events', []) if isinstance(data, dict) else data
+        return self.replace_all(events)
+
+    def export_json(self, path):
+        """Écrit le master JSON (même format que merge_and_compare)."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        events = list(self.iter_events())
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(events, f, indent=4, ensure_ascii=False, default=event_to_json)
+        return len(events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Magasin SQLite des événements (import / export du master JSON).")
+    parser.add_argument('--store', default=os.environ.get('EVENT_STORE') or DEFAULT_STORE_PATH,
+                        help=f"Base SQLite (défaut: $EVENT_STORE ou {DEFAULT_STORE_PATH})")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_import = sub.add_parser('import', help="Remplacer le contenu par un master JSON")
+    p_import.add_argument('json_path')
+    p_export = sub.add_parser('export', help="Écrire le master JSON")
+    p_export.add_argument('json_path')
+    sub.add_parser('stats', help="Afficher le contenu du magasin")
+    args = parser.parse_args()
+
+    with EventStore(args.store) as store:
+        if args.command == 'import':
+            count = store.import_json(args.json_path)
+            print(f"📥 {count} événements importés depuis '{args.json_path}'")
+        elif args.command == 'export':
+            count = store.export_json(args.json_path)
+            print(f"📤 {count} événements exportés dans '{args.json_path}'")
+
+        first, last = store.date_range()
+        size = os.path.getsize(args.store)
+        print(f"🗄️ {len(store)} événements ({first or '-'} → {last or '-'}), {size / 1024:.0f} Kio")
+
+
+if __name__ == "__main__":
+    main()
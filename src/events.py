@@ -0,0 +1,236 @@
+"""
+IDENTITÉ DES ÉVÉNEMENTS ET INDEX DE DÉDOUBLONNAGE
+=================================================
+Clé canonique d'un événement (date, horaires, code, lieu, groupes) et
+index ordonné basé sur un dict : insertion et test d'appartenance en O(1),
+ordre d'insertion conservé. L'index ne retire que les doublons exacts
+(contenu complet identique) : deux cours dans le même créneau avec un
+titre ou un enseignant différent sont gardés. Partagé par le scraper et
+merge_and_compare.
+
+Représentation compacte : Event stocke les champs dans des __slots__ et
+interne les chaînes répétées (enseignants, salles, cours, groupes...) ; il
+se lit comme un dict (event['date'], event.get('groups')) et se
+sérialise à l'identique du schéma JSON (default=event_to_json).
+CELCAT_COMPACT_EVENTS=0 revient aux dicts.
+"""
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+# Champs qui identifient un événement (les groupes sont ajoutés en tuple)
+EVENT_KEY_FIELDS = ('date', 'start_time', 'end_time', 'course_code', 'location')
+# Champs du schéma JSON des événements (ordre de html_to_json)
+EVENT_FIELDS = ('date', 'start_time', 'end_time', 'title', 'course_code', 'course_name',
+                'location', 'teacher', 'type', 'groups')
+COMPACT_EVENTS = os.environ.get('CELCAT_COMPACT_EVENTS', '1') != '0'
+
+
+def event_key(event):
+    """Clé d'identité hashable d'un événement au format JSON du projet."""
+    return tuple(event.get(field) or '' for field in EVENT_KEY_FIELDS) + (
+        tuple(event.get('groups') or ()),
+    )
+
+
+def event_content_key(event):
+    """Clé hashable du contenu complet de l'événement (tous les champs, groupes en tuple)."""
+    return tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value) for name, value in event.items()
+    ))
+
+
+def event_key_digest(event):
+    """Empreinte SHA-1 (hex) de l'identité de l'événement."""
+    return hashlib.sha1(json.dumps(event_key(event), ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def event_uid(event, domain="celcat-calendar"):
+    """UID iCalendar déterministe dérivé de l'identité de l'événement."""
+    return f"{event_key_digest(event)}@{domain}"
+
+
+def event_fingerprint(event):
+    """Empreinte du contenu complet de l'événement (tous les champs)."""
+    if isinstance(event, Event):
+        event = event.to_dict()
+    canonical = json.dumps(event, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class EventIndex:
+    """
+    Collection d'événements sans doublons exacts (event_content_key), dans l'ordre d'insertion.
+    Les événements sont conservés sous forme d'Event (sauf CELCAT_COMPACT_EVENTS=0).
+    """
+
+    def __init__(self, events=()):
+        self._events = {}
+        self.extend(events)
+
+    def add(self, event):
+        """Ajoute l'événement s'il est nouveau. Retourne True s'il a été ajouté."""
+        key = event_content_key(event)
+        if key in self._events:
+            return False
+        self._events[key] = Event.from_dict(event) if COMPACT_EVENTS else event
+        return True
+
+    def extend(self, events):
+        """Ajoute plusieurs événements. Retourne le nombre d'ajouts."""
+        return sum(1 for event in events if self.add(event))
+
+    def get(self, key, default=None):
+        return self._events.get(key, default)
+
+    def discard(self, event):
+        """Retire l'événement de même contenu s'il est présent."""
+        self._events.pop(event_content_key(event), None)
+
+    def keys(self):
+        return self._events.keys()
+
+    def __contains__(self, event):
+        return event_content_key(event) in self._events
+
+    def __iter__(self):
+        return iter(self._events.values())
+
+    def __len__(self):
+        return len(self._events)
+
+    def __repr__(self):
+        return f"EventIndex({len(self)} événements)"
+
+
+class InternTable:
+    """Table d'internement : une seule instance de chaque valeur répétée (chaînes, tuples de groupes)."""
+
+    def __init__(self):
+        self.values = {}
+
+    def __call__(self, value):
+        if isinstance(value, list):
+            value = tuple(self(v) for v in value)
+        try:
+            return self.values.setdefault(value, value)
+        except TypeError:
+            # Valeur non hashable (champ inattendu) : conservée telle quelle
+            return value
+
+    def __len__(self):
+        return len(self.values)
+
+    def clear(self):
+        self.values.clear()
+
+
+_INTERN = InternTable()
+
+
+def clear_interned():
+    """
+    Vide la table d'internement du processus. Les Event existants gardent
+    leurs valeurs ; à appeler entre deux lots d'un processus de longue durée
+    (démon) pour ne pas retenir toutes les chaînes déjà rencontrées.
+    """
+    _INTERN.clear()
+_FIELD_SET = frozenset(EVENT_FIELDS)
+_SCALAR_FIELDS = tuple(name for name in EVENT_FIELDS if name != 'groups')
+
+
+class Event(Mapping):
+    """
+    Événement compact : un slot par champ du schéma, valeurs internées.
+
+    Se comporte comme un dict en lecture ; les groupes sont rendus sous
+    forme de tuple. to_dict() restitue le dict d'origine (mêmes clés, même
+    ordre) et les clés inconnues du schéma sont conservées dans _extra.
+    """
+
+    __slots__ = EVENT_FIELDS + ('_keys', '_extra')
+
+    def __init__(self, fields=(), intern=_INTERN):
+        if not isinstance(fields, dict):
+            fields = dict(fields)
+        get = fields.get
+        shared = intern.values.setdefault
+        # Tuple des clés présentes, dans l'ordre d'origine (partagé entre événements de même forme)
+        keys = tuple(fields)
+        self._keys = shared(keys, keys)
+        for name in _SCALAR_FIELDS:
+            value = get(name)
+            try:
+                value = shared(value, value)
+            except TypeError:
+                pass
+            setattr(self, name, value)
+        groups = get('groups')
+        self.groups = None if groups is None else intern(groups)
+        self._extra = None
+        if not _FIELD_SET.issuperset(keys):
+            self._extra = {name: fields[name] for name in keys if name not in _FIELD_SET}
+
+    @classmethod
+    def from_dict(cls, data):
+        return data if isinstance(data, cls) else cls(data)
+
+    def to_dict(self):
+        """Dict au format JSON du projet (groupes en liste)."""
+        data = {}
+        for name in self._keys:
+            if name in _FIELD_SET:
+                value = getattr(self, name)
+                data[name] = list(value) if name == 'groups' and isinstance(value, tuple) else value
+            else:
+                data[name] = self._extra[name]
+        return data
+
+    def __getitem__(self, name):
+        if name not in self._keys:
+            raise KeyError(name)
+        return getattr(self, name) if name in _FIELD_SET else self._extra[name]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, name):
+        return name in self._keys
+
+    def __eq__(self, other):
+        if isinstance(other, Event):
+            other = other.to_dict()
+        return isinstance(other, Mapping) and self.to_dict() == dict(other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (Event, (self.to_dict(),))
+
+    def __repr__(self):
+        return f"Event({self.to_dict()!r})"
+
+
+def compact_events(events):
+    """Liste d'Event (ou les événements tels quels si CELCAT_COMPACT_EVENTS=0)."""
+    if not COMPACT_EVENTS:
+        return list(events)
+    return [Event.from_dict(event) for event in events]
+
+
+def event_object_hook(obj):
+    """object_hook de json.load : convertit à la volée les objets événements en Event."""
+    if COMPACT_EVENTS and obj and 'events' not in obj and not obj.keys() - _FIELD_SET:
+        return Event(obj)
+    return obj
+
+
+def event_to_json(obj):
+    """default de json.dump : sérialise un Event au format du schéma."""
+    if isinstance(obj, Event):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -1,10 +1,28 @@
 import argparse
+import hashlib
 import json
 import re
 import os
 import glob
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-from bs4 import BeautifulSoup
+from functools import lru_cache, partial
+from lxml import etree, html as lxml_html
+
+from archive_store import ArchiveStore
+from events import compact_events, event_object_hook, event_to_json
+from metrics import metrics
+
+# Backends de parsing disponibles : "html.parser" (BeautifulSoup, historique)
+# et "lxml" (XPath sur l'arbre lxml, sans construire de soupe complète)
+PARSER_BACKENDS = ('html.parser', 'lxml')
+DEFAULT_BACKEND = os.environ.get('CELCAT_PARSER', 'html.parser')
+
+# À incrémenter à chaque changement de la logique d'extraction :
+# invalide les événements mis en cache dans le manifeste
+PARSER_VERSION = 1
+MANIFEST_FILENAME = "manifest.json"
 
 def clean_text(text):
     """Fonction utilitaire pour nettoyer le texte (espaces, retours ligne)."""
@@ -32,10 +50,145 @@ def convert_to_24h(time_str):
             continue
     return time_str  # Retourne l'original si conversion impossible
 
-def extract_celcat_data(html_content):
+# Lignes qui ne sont que des horaires. Ex: "9:00 AM", "14:00", "8:30 AM - 5:00 PM"
+TIME_LINE_RE = re.compile(r'^\d{1,2}:\d{2}(\s*[AaPp][Mm])?(\s*-\s*\d{1,2}:\d{2}(\s*[AaPp][Mm])?)?$')
+
+def parse_content_lines(raw_lines):
+    """
+    Transforme les lignes de texte d'un événement Celcat en champs
+    (title, course_code, course_name, location, teacher, type, groups).
+    """
+    event_data = {}
+
+    lines = []
+    for line in raw_lines:
+        # REGEX CRITIQUE : Ignore les lignes qui ne sont que des horaires
+        # Cela empêche le décalage des données quand l'heure est affichée dans le texte
+        if TIME_LINE_RE.match(line):
+            continue
+        lines.append(line)
+
+    # Maintenant que les lignes d'heures sont filtrées, l'ordre est rétabli
+    if len(lines) >= 1:
+        event_data['title'] = clean_text(lines[0])
+
+    if len(lines) >= 2:
+        raw_course = clean_text(lines[1])
+        # Tente de séparer Code et Nom (ex: "065 Anglais")
+        match = re.match(r'^([\w\d]+)\s+(.*)', raw_course)
+        if match:
+            event_data['course_code'] = match.group(1)
+            event_data['course_name'] = match.group(2)
+        else:
+            event_data['course_code'] = ""
+            event_data['course_name'] = raw_course
+
+    if len(lines) >= 3:
+        event_data['location'] = clean_text(lines[2])
+
+    if len(lines) >= 4:
+        event_data['teacher'] = clean_text(lines[3])
+
+    if len(lines) >= 5:
+        event_data['type'] = clean_text(lines[4])
+
+    if len(lines) >= 6:
+        # Regroupe tout le reste comme "groupes"
+        event_data['groups'] = [clean_text(l) for l in lines[5:]]
+
+    return event_data
+
+def _has_class(name):
+    """Prédicat XPath équivalent à class_=name de BeautifulSoup (jeton de classe)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+_XP_DAY_HEADERS = etree.XPath(f"//th[{_has_class('fc-day-header')}]")
+_XP_CONTENT_COLS = etree.XPath(
+    f"//*[{_has_class('fc-time-grid')}]//*[{_has_class('fc-content-skeleton')}]//td"
+)
+_XP_HAS_EVENT_CONTAINER = etree.XPath(f"boolean(.//div[{_has_class('fc-event-container')}])")
+_XP_EVENTS = etree.XPath(f".//a[{_has_class('fc-time-grid-event')}]")
+_XP_TIME_DIV = etree.XPath(f"(.//div[{_has_class('fc-time')}])[1]")
+_XP_CONTENT_DIV = etree.XPath(f"(.//div[{_has_class('fc-content')}])[1]")
+# Équivalent de stripped_strings : nœuds texte hors <script>/<style> (commentaires exclus)
+_XP_STRINGS = etree.XPath(".//text()[not(parent::script or parent::style)]")
+
+def _week_parts(tag_name, attrs):
+    """SoupStrainer : ne garde que les en-têtes de jours et la grille horaire."""
+    classes = attrs.get('class') or ''
+    if isinstance(classes, str):
+        classes = classes.split()
+    return ((tag_name == 'th' and 'fc-day-header' in classes)
+            or (tag_name == 'div' and 'fc-time-grid' in classes))
+
+def make_week_soup(html_content, backend=None):
+    """
+    Construit la soupe d'une page de semaine.
+    Avec le backend "lxml", seuls les en-têtes fc-day-header et la grille
+    fc-time-grid sont conservés (SoupStrainer), le reste de la page est ignoré.
+    """
+    # bs4 n'est importé que par les chemins qui l'utilisent (le backend lxml pur s'en passe)
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    if (backend or DEFAULT_BACKEND) == 'lxml':
+        return BeautifulSoup(html_content, 'lxml', parse_only=SoupStrainer(_week_parts))
+    return BeautifulSoup(html_content, 'html.parser')
+
+def _extract_celcat_data_lxml(html_content):
+    """Version lxml/XPath de extract_celcat_data (même sortie)."""
+    root = lxml_html.fromstring(html_content)
+
+    events_list = []
+
+    dates_map = {}
+    for index, header in enumerate(_XP_DAY_HEADERS(root)):
+        date_val = header.get('data-date')
+        if date_val:
+            dates_map[index] = date_val
+
+    current_col_index = 0
+
+    for td in _XP_CONTENT_COLS(root):
+        if not _XP_HAS_EVENT_CONTAINER(td):
+            continue
+
+        if current_col_index not in dates_map:
+            current_col_index += 1
+            continue
+
+        current_date = dates_map[current_col_index]
+
+        for event in _XP_EVENTS(td):
+            event_data = {}
+
+            time_div = _XP_TIME_DIV(event)
+            if time_div and time_div[0].get('data-full') is not None:
+                times = time_div[0].get('data-full').split('-')
+                event_data['date'] = current_date
+                event_data['start_time'] = convert_to_24h(times[0])
+                event_data['end_time'] = convert_to_24h(times[1]) if len(times) > 1 else ""
+
+            content_div = _XP_CONTENT_DIV(event)
+            if content_div:
+                raw_lines = [s.strip() for s in _XP_STRINGS(content_div[0]) if s.strip()]
+                event_data.update(parse_content_lines(raw_lines))
+
+            events_list.append(event_data)
+
+        current_col_index += 1
+
+    return events_list
+
+def extract_celcat_data(html_content, backend=None):
     """
     Extrait les événements d'une page HTML et retourne une LISTE de dictionnaires.
+    backend : "html.parser" (défaut) ou "lxml" (voir PARSER_BACKENDS).
     """
+    if (backend or DEFAULT_BACKEND) == 'lxml':
+        return _extract_celcat_data_lxml(html_content)
+
+    from bs4 import BeautifulSoup
+
     soup = BeautifulSoup(html_content, 'html.parser')
     
     events_list = []
@@ -85,43 +238,7 @@ def extract_celcat_data(html_content):
             if content_div:
                 # On récupère toutes les chaînes de caractères brutes
                 raw_lines = [s.strip() for s in content_div.stripped_strings if s.strip()]
-                
-                lines = []
-                for line in raw_lines:
-                    # REGEX CRITIQUE : Ignore les lignes qui ne sont que des horaires
-                    # Ex: "9:00 AM", "14:00", "8:30 AM - 5:00 PM"
-                    # Cela empêche le décalage des données quand l'heure est affichée dans le texte
-                    if re.match(r'^\d{1,2}:\d{2}(\s*[AaPp][Mm])?(\s*-\s*\d{1,2}:\d{2}(\s*[AaPp][Mm])?)?$', line):
-                        continue
-                    lines.append(line)
-
-                # Maintenant que les lignes d'heures sont filtrées, l'ordre est rétabli
-                if len(lines) >= 1:
-                    event_data['title'] = clean_text(lines[0])
-                
-                if len(lines) >= 2:
-                    raw_course = clean_text(lines[1])
-                    # Tente de séparer Code et Nom (ex: "065 Anglais")
-                    match = re.match(r'^([\w\d]+)\s+(.*)', raw_course)
-                    if match:
-                        event_data['course_code'] = match.group(1)
-                        event_data['course_name'] = match.group(2)
-                    else:
-                        event_data['course_code'] = ""
-                        event_data['course_name'] = raw_course
-                
-                if len(lines) >= 3:
-                    event_data['location'] = clean_text(lines[2])
-                
-                if len(lines) >= 4:
-                    event_data['teacher'] = clean_text(lines[3])
-                
-                if len(lines) >= 5:
-                    event_data['type'] = clean_text(lines[4])
-                
-                if len(lines) >= 6:
-                    # Regroupe tout le reste comme "groupes"
-                    event_data['groups'] = [clean_text(l) for l in lines[5:]]
+                event_data.update(parse_content_lines(raw_lines))
 
             events_list.append(event_data)
             
@@ -129,47 +246,272 @@ def extract_celcat_data(html_content):
 
     return events_list
 
-# --- Bloc principal ---
-if __name__ == "__main__":
+def list_week_files(input_folder):
+    """Liste triée des fichiers week_*.html d'un dossier d'archives."""
+    files = glob.glob(os.path.join(input_folder, "week_*.html"))
+    files.sort()
+    return files
+
+def parse_week_file(file_path, backend=None):
+    """
+    Lit et parse un fichier de semaine.
+    Retourne (file_path, événements, erreur) : l'erreur est capturée pour
+    qu'un fichier invalide n'interrompe pas le pool de processus.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            html_content = f.read()
+        return file_path, extract_celcat_data(html_content, backend), None
+    except Exception as e:
+        return file_path, [], str(e)
+
+@lru_cache(maxsize=None)
+def _open_store(store_root):
+    """Magasin ouvert une seule fois par processus (l'index n'est lu qu'une fois)."""
+    return ArchiveStore(store_root)
+
+def parse_store_week(name, store_root, backend=None):
+    """
+    Comme parse_week_file, mais lit la dernière version de la page dans le
+    magasin d'archives (pas de fichier extrait sur disque).
+    """
+    try:
+        html_content = _open_store(store_root).read(name)
+        return name, extract_celcat_data(html_content, backend), None
+    except Exception as e:
+        return name, [], str(e)
+
+def iter_parsed_weeks(files, jobs=1, backend=None, store_root=None):
+    """
+    Parse les fichiers et produit les résultats dans l'ordre des fichiers.
+    Avec jobs > 1, le parsing (CPU) est réparti sur un pool de processus.
+    Avec store_root, files sont des noms de pages du magasin d'archives.
+    """
+    if store_root:
+        parse = partial(parse_store_week, store_root=store_root, backend=backend or DEFAULT_BACKEND)
+    else:
+        parse = partial(parse_week_file, backend=backend or DEFAULT_BACKEND)
+
+    if jobs <= 1 or len(files) <= 1:
+        yield from map(parse, files)
+        return
+
+    chunksize = max(1, len(files) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # executor.map restitue les résultats dans l'ordre de soumission
+        yield from executor.map(parse, files, chunksize=chunksize)
+
+def file_sha256(file_path):
+    """Empreinte SHA-256 du contenu d'un fichier."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ParseManifest:
+    """
+    Manifeste des fichiers déjà convertis : empreinte du contenu et
+    événements extraits, pour ne re-parser que les semaines modifiées.
+    Tout le cache est invalidé si PARSER_VERSION ou le backend change.
+    """
+
+    def __init__(self, path, backend=None):
+        self.path = path
+        self.version = f"{PARSER_VERSION}:{backend or DEFAULT_BACKEND}"
+        self.entries = {}
+        self.hits = 0
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                # Événements en cache directement chargés sous forme compacte (Event)
+                data = json.load(f, object_hook=event_object_hook)
+            if data.get('parser_version') == self.version:
+                self.entries = data.get('files', {})
+            else:
+                print(f"♻️ Version du parser modifiée, cache '{path}' invalidé.")
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Manifeste illisible '{path}' ({e}), conversion complète.")
+
+    def lookup(self, file_path, digest=None):
+        """
+        Événements en cache si le fichier est inchangé, sinon None.
+        digest : empreinte déjà connue (snapshot du magasin), sans lecture disque.
+        """
+        entry = self.entries.get(os.path.basename(file_path))
+        if not entry:
+            return None
+
+        if digest is not None:
+            if entry.get('sha256') != digest:
+                return None
+            self.hits += 1
+            return entry['events']
+
+        stat = os.stat(file_path)
+        # Raccourci : même taille et même date de modification -> pas besoin de hacher
+        if entry.get('size') != stat.st_size or entry.get('mtime_ns') != stat.st_mtime_ns:
+            if entry.get('size') != stat.st_size or entry.get('sha256') != file_sha256(file_path):
+                return None
+            entry['mtime_ns'] = stat.st_mtime_ns
+
+        self.hits += 1
+        return entry['events']
+
+    def store(self, file_path, events, digest=None):
+        if digest is not None:
+            self.entries[os.path.basename(file_path)] = {'sha256': digest, 'events': events}
+            return
+        stat = os.stat(file_path)
+        self.entries[os.path.basename(file_path)] = {
+            'sha256': file_sha256(file_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'events': events,
+        }
+
+    def prune(self, files):
+        """Oublie les fichiers qui ne sont plus dans l'archive."""
+        names = {os.path.basename(f) for f in files}
+        self.entries = {name: e for name, e in self.entries.items() if name in names}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'parser_version': self.version, 'files': self.entries}, f, ensure_ascii=False,
+                      default=event_to_json)
+        os.replace(tmp_path, self.path)
+
+def convert_archive(files, jobs=1, backend=None, manifest=None, store=None):
+    """
+    Parse toutes les semaines et retourne la liste triée des événements.
+    Avec un ParseManifest, seuls les fichiers modifiés sont re-parsés.
+    Avec un ArchiveStore, files sont des noms de pages du magasin.
+    """
+    all_weeks_data = []
+    week_results = {}
+    digests = {name: store.latest(name)['sha256'] for name in files} if store else {}
+
+    to_parse = []
+    with metrics.span("cache_lookup"):
+        for file_path in files:
+            cached = manifest.lookup(file_path, digests.get(file_path)) if manifest else None
+            if cached is None:
+                to_parse.append(file_path)
+            else:
+                week_results[file_path] = cached
+
+    metrics.incr("files", len(files))
+    if manifest and manifest.hits:
+        metrics.incr("cache_hits", manifest.hits)
+        print(f" -> {manifest.hits} fichier(s) inchangé(s) repris du cache.")
+
+    store_root = store.root if store else None
+    with metrics.span("parse", jobs=jobs, files=len(to_parse)):
+        # Durée par semaine : temps écoulé jusqu'au résultat (temps d'attente du pool si jobs > 1)
+        last = time.perf_counter()
+        for file_path, week_events, error in iter_parsed_weeks(to_parse, jobs, backend, store_root):
+            now = time.perf_counter()
+            metrics.record("parse/week", now - last, file=os.path.basename(file_path))
+            last = now
+            if error:
+                metrics.incr("parse_failures")
+                print(f"ERREUR sur le fichier {file_path}: {error}")
+                continue
+            # Mêmes objets compacts pour le résultat et le manifeste
+            week_events = compact_events(week_events)
+            week_results[file_path] = week_events
+            metrics.observe("events_per_week", len(week_events))
+            if manifest:
+                manifest.store(file_path, week_events, digests.get(file_path))
+            print(f" -> {os.path.basename(file_path)} : {len(week_events)} événements extraits.")
+
+    for file_path in files:
+        all_weeks_data.extend(week_results.get(file_path, []))
+
+    if manifest:
+        with metrics.span("manifest_save"):
+            manifest.prune(files)
+            manifest.save()
+
+    # Tri par date et heure
+    all_weeks_data.sort(key=lambda x: (x.get('date', ''), x.get('start_time', '')))
+    metrics.incr("events", len(all_weeks_data))
+    return all_weeks_data
+
+def load_archive_events(input_folder, store_root=None, jobs=1, backend=None, manifest_path=None, use_cache=True):
+    """
+    Événements de toutes les semaines d'un dossier d'archives (ou des pages
+    de la dernière exécution d'un magasin si store_root), via le manifeste
+    de conversion sauf use_cache=False.
+    """
+    store = ArchiveStore(store_root) if store_root else None
+    files = store.run_names() if store else list_week_files(input_folder)
+    source = store_root or input_folder
+
+    print(f"Traitement de {len(files)} fichiers trouvés dans '{source}' ({jobs} processus, parser {backend or DEFAULT_BACKEND})...")
+
+    manifest = None
+    if use_cache:
+        manifest = ParseManifest(manifest_path or os.path.join(source, MANIFEST_FILENAME), backend or DEFAULT_BACKEND)
+
+    return convert_archive(files, jobs, backend, manifest, store)
+
+def main():
     parser = argparse.ArgumentParser(description="Convertit les archives HTML Celcat en JSON.")
     parser.add_argument(
         '--output', default='emploi_du_temps_complet.json',
         help="Fichier JSON de sortie (défaut: emploi_du_temps_complet.json)"
     )
+    parser.add_argument(
+        '--input', default='archives_html',
+        help="Dossier des archives HTML (défaut: archives_html)"
+    )
+    parser.add_argument(
+        '--store', default=None,
+        help="Lire les pages dans un magasin d'archives (archive_store.py) au lieu de --input"
+    )
+    parser.add_argument(
+        '--jobs', type=int, default=1,
+        help="Nombre de processus de parsing (défaut: 1, 0 = tous les cœurs)"
+    )
+    parser.add_argument(
+        '--parser', choices=PARSER_BACKENDS, default=DEFAULT_BACKEND,
+        help="Backend de parsing (défaut: $CELCAT_PARSER ou html.parser)"
+    )
+    parser.add_argument(
+        '--manifest', default=None,
+        help=f"Manifeste du cache de conversion (défaut: <input>/{MANIFEST_FILENAME})"
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help="Re-parser tous les fichiers sans lire ni écrire le manifeste"
+    )
     args = parser.parse_args()
 
-    input_folder = "archives_html"
+    input_folder = args.store or args.input
     output_file = args.output
-    
-    all_weeks_data = []
-    
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+
     if not os.path.exists(input_folder):
         print(f"Le dossier '{input_folder}' n'existe pas.")
         exit(1)
 
-    search_pattern = os.path.join(input_folder, "week_*.html")
-    files = glob.glob(search_pattern)
-    files.sort()
-
-    print(f"Traitement de {len(files)} fichiers trouvés dans '{input_folder}'...")
+    metrics.start("html_to_json", parser=args.parser, jobs=jobs, source=input_folder)
 
-    for file_path in files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                html_content = f.read()
-            
-            week_events = extract_celcat_data(html_content)
-            all_weeks_data.extend(week_events)
-            
-            print(f" -> {os.path.basename(file_path)} : {len(week_events)} événements extraits.")
-            
-        except Exception as e:
-            print(f"ERREUR sur le fichier {file_path}: {e}")
+    started = time.perf_counter()
+    all_weeks_data = load_archive_events(args.input, args.store, jobs, args.parser, args.manifest,
+                                         use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - started
 
-    # Tri par date et heure
-    all_weeks_data.sort(key=lambda x: (x.get('date', ''), x.get('start_time', '')))
+    with metrics.span("write_json"), open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(all_weeks_data, f, ensure_ascii=False, indent=4, default=event_to_json)
 
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(all_weeks_data, f, ensure_ascii=False, indent=4)
+    print(f"Extraction terminée en {elapsed:.2f}s ! Données sauvegardées dans '{output_file}'.")
+    metrics.finish()
 
-    print(f"Extraction terminée ! Données sauvegardées dans '{output_file}'.")
+# --- Bloc principal ---
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+BACKEND HTTP SANS NAVIGATEUR
+============================
+Alternative à Chrome + Selenium : connexion à CELCAT par un POST du
+formulaire de login (champs cachés / jeton CSRF repris de la page), puis
+récupération des données par l'endpoint GetCalendarData, le tout sur une
+session requests à connexions persistantes (keep-alive, pool de connexions,
+relances sur erreurs réseau). Seuls les GET sont relancés par la session :
+le POST du login n'est jamais rejoué, GetCalendarData (lecture seule) est
+relancé explicitement par CelcatDataFetcher.
+
+Usage:
+    client = CelcatHttpClient(login_url, username, password)
+    if client.login():
+        events = client.fetch_events(datetime.now(), nb_weeks=26)
+"""
+from urllib.parse import urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from celcat_api import CelcatDataFetcher
+
+BACKENDS = ('browser', 'http')
+DEFAULT_POOL_SIZE = 4
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/130.0 Safari/537.36"
+)
+
+# Mêmes candidats que login() côté Selenium : name="username", puis champ texte, puis id
+_USERNAME_NAMES = ('username', 'Username', 'UserName', 'Name', 'login', 'user')
+_TEXT_TYPES = ('text', 'email', '')
+
+
+class LoginFormError(Exception):
+    """La page ne contient pas de formulaire de connexion exploitable."""
+
+
+def find_login_form(html_content, page_url):
+    """
+    Repère le formulaire de connexion d'une page.
+
+    Returns:
+        (action_url, champs, nom_identifiant, nom_mot_de_passe) où champs
+        contient tous les champs du formulaire avec leur valeur par défaut
+        (champs cachés, jeton CSRF...), ou None si aucun champ mot de passe
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    password_input = soup.find('input', attrs={'type': 'password'})
+    if password_input is None:
+        return None
+
+    form = password_input.find_parent('form') or soup
+    fields = {}
+    username_name = None
+    for field in form.find_all('input'):
+        name = field.get('name')
+        if not name:
+            continue
+        field_type = (field.get('type') or '').lower()
+        if field_type in ('checkbox', 'radio') and not field.has_attr('checked'):
+            continue
+        if field_type in ('submit', 'button', 'image'):
+            continue
+        fields[name] = field.get('value', '')
+
+    for name in _USERNAME_NAMES:
+        if name in fields:
+            username_name = name
+            break
+    if username_name is None:
+        text_input = form.find(
+            lambda tag: tag.name == 'input' and tag.get('name')
+            and (tag.get('type') or '').lower() in _TEXT_TYPES
+        )
+        username_input = text_input or form.find('input', id='username')
+        if username_input is None or not username_input.get('name'):
+            raise LoginFormError("champ identifiant introuvable")
+        username_name = username_input['name']
+
+    password_name = password_input.get('name')
+    if not password_name:
+        raise LoginFormError("champ mot de passe sans attribut name")
+
+    action = form.get('action') if form is not soup else None
+    return urljoin(page_url, action or page_url), fields, username_name, password_name
+
+
+class CelcatHttpClient:
+    """Client CELCAT sans navigateur, sur une session HTTP persistante."""
+
+    def __init__(self, login_url, username, password, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        """
+        Args:
+            login_url: URL du calendrier (redirige vers la page de connexion)
+            pool_size: Connexions conservées par hôte
+            timeout: Timeout HTTP (secondes)
+        """
+        self.login_url = login_url
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.calendar_url = login_url
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        retry = Retry(total=DEFAULT_RETRIES, backoff_factor=0.5, status_forcelist=(502, 503, 504),
+                      allowed_methods=frozenset({'GET'}))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def login(self):
+        """Se connecte par POST du formulaire de connexion. Retourne True si la session est ouverte."""
+        print(f"\n🔐 Connexion HTTP à {self.login_url}...")
+        try:
+            response = self.session.get(self.login_url, timeout=self.timeout)
+            response.raise_for_status()
+
+            form = find_login_form(response.text, response.url)
+            if form is None:
+                # Cookies déjà valides : le calendrier s'affiche directement
+                print("✅ Déjà connecté")
+                self._remember_calendar_url(response.url)
+                return True
+
+            action_url, fields, username_name, password_name = form
+            fields[username_name] = self.username
+            fields[password_name] = self.password
+
+            response = self.session.post(action_url, data=fields, timeout=self.timeout,
+                                         headers={'Referer': response.url})
+            response.raise_for_status()
+
+            if find_login_form(response.text, response.url) is not None:
+                print("❌ Identifiants refusés (formulaire de connexion toujours affiché)")
+                return False
+
+            self._remember_calendar_url(response.url)
+            print("✅ Connexion réussie!")
+            return True
+
+        except (requests.RequestException, LoginFormError) as e:
+            print(f"❌ Erreur lors de la connexion HTTP: {e}")
+            return False
+
+    def _remember_calendar_url(self, url):
+        # L'URL finale (après redirection) porte les paramètres fid du calendrier
+        if 'fid' in urlparse(url).query:
+            self.calendar_url = url
+
+    @property
+    def current_url(self):
+        """Même interface que le driver Selenium pour SessionCache.save()."""
+        return self.calendar_url
+
+    def restore_cookies(self, cookies):
+        """Charge des cookies au format Selenium (cache de session)."""
+        for cookie in cookies:
+            self.session.cookies.set(
+                cookie['name'], cookie['value'],
+                domain=cookie.get('domain'), path=cookie.get('path', '/')
+            )
+
+    def get_cookies(self):
+        """Cookies de la session au format Selenium (name, value, domain, path, expiry)."""
+        cookies = []
+        for cookie in self.session.cookies:
+            entry = {'name': cookie.name, 'value': cookie.value, 'domain': cookie.domain, 'path': cookie.path}
+            if cookie.expires:
+                entry['expiry'] = cookie.expires
+            cookies.append(entry)
+        return cookies
+
+    def fetch_page(self, url):
+        """Récupère une page (HTML brut, sans exécution du JavaScript)."""
+        response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+    def data_fetcher(self):
+        """CelcatDataFetcher partageant la session (cookies et connexions) du client."""
+        return CelcatDataFetcher(self.calendar_url, session=self.session, timeout=self.timeout,
+                                 retries=DEFAULT_RETRIES)
+
+    def fetch_events(self, start_date, nb_weeks):
+        """Événements de nb_weeks semaines au format du projet (endpoint GetCalendarData)."""
+        return self.data_fetcher().fetch_events(start_date, nb_weeks)
+
+    def close(self):
+        self.session.close()
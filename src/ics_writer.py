@@ -0,0 +1,177 @@
+"""
+ÉCRITURE ICS EN FLUX (RFC 5545)
+===============================
+Émetteur iCalendar natif : chaque VEVENT est écrit directement dans le
+fichier de sortie, sans construire d'objets ics.Event ni garder tout le
+calendrier en mémoire. Gère l'échappement des textes, le pliage des
+lignes à 75 octets, le fuseau Europe/Paris (VTIMEZONE) et les événements
+sur la journée entière.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+CRLF = "\r\n"
+MAX_LINE_OCTETS = 75
+PRODID = "-//CELCAT Calendar Auto-Sync//FR"
+TZID = "Europe/Paris"
+
+# Définition du fuseau Europe/Paris (règles UE en vigueur depuis 1996)
+VTIMEZONE_PARIS = (
+    "BEGIN:VTIMEZONE",
+    f"TZID:{TZID}",
+    "BEGIN:DAYLIGHT",
+    "TZOFFSETFROM:+0100",
+    "TZOFFSETTO:+0200",
+    "TZNAME:CEST",
+    "DTSTART:19700329T020000",
+    "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU",
+    "END:DAYLIGHT",
+    "BEGIN:STANDARD",
+    "TZOFFSETFROM:+0200",
+    "TZOFFSETTO:+0100",
+    "TZNAME:CET",
+    "DTSTART:19701025T030000",
+    "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+)
+
+
+def escape_text(value):
+    """Échappe une valeur TEXT (RFC 5545 §3.3.11)."""
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line):
+    """
+    Plie une ligne de contenu à 75 octets (RFC 5545 §3.1) sans couper de
+    caractère UTF-8 multi-octets. Retourne la ligne terminée par CRLF.
+    """
+    data = line.encode("utf-8")
+    if len(data) <= MAX_LINE_OCTETS:
+        return line + CRLF
+
+    parts = []
+    start = 0
+    limit = MAX_LINE_OCTETS
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Reculer tant qu'on est au milieu d'un caractère multi-octets, ou devant
+        # un espace : certains clients suppriment tous les blancs en tête de
+        # ligne de continuation
+        cut = end
+        while start < cut < len(data) and ((data[cut] & 0xC0) == 0x80 or data[cut] == 0x20):
+            cut -= 1
+        if cut == start:
+            # Segment composé uniquement d'espaces : simple coupure sur un caractère
+            cut = end
+            while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+                cut -= 1
+        end = cut
+        parts.append(data[start:end].decode("utf-8"))
+        start = end
+        # Les lignes de continuation commencent par un espace
+        limit = MAX_LINE_OCTETS - 1
+    return (CRLF + " ").join(parts) + CRLF
+
+
+def format_utc(value):
+    """DATE-TIME UTC, ex: 20240902T060000Z."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y%m%dT%H%M%SZ")
+
+
+def format_local(value):
+    """DATE-TIME local (heure murale), ex: 20240902T080000."""
+    return value.strftime("%Y%m%dT%H%M%S")
+
+
+class IcsWriter:
+    """
+    Écrit un VCALENDAR en flux dans un fichier.
+
+    Usage:
+        with IcsWriter(path) as writer:
+            writer.write_event(uid=..., summary=..., begin=..., end=...)
+    """
+
+    def __init__(self, path, method="PUBLISH"):
+        self.path = path
+        self.method = method
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        # newline='' : les CRLF sont écrits tels quels
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        self._write("BEGIN:VCALENDAR")
+        self._write("VERSION:2.0")
+        self._write(f"PRODID:{PRODID}")
+        if self.method:
+            self._write(f"METHOD:{self.method}")
+        for line in VTIMEZONE_PARIS:
+            self._write(line)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._write("END:VCALENDAR")
+        self._file.close()
+
+    def _write(self, line):
+        self._file.write(fold_line(line))
+
+    def write_event(self, uid, summary, begin, end=None, location="", description="",
+                    dtstamp=None, last_modified=None, all_day=False):
+        """
+        Écrit un VEVENT.
+
+        Args:
+            begin/end: datetime en heure de Paris (aware ou naïf), ou date si all_day
+            all_day: événement sur la journée (DTEND = lendemain si end absent)
+        """
+        self._file.write(render_event(
+            uid, summary, begin, end, location, description, dtstamp, last_modified, all_day
+        ))
+        self.count += 1
+
+    def write_raw(self, block):
+        """Écrit un bloc VEVENT déjà sérialisé (lignes pliées, CRLF)."""
+        self._file.write(block)
+        self.count += 1
+
+
+def render_event(uid, summary, begin, end=None, location="", description="",
+                 dtstamp=None, last_modified=None, all_day=False):
+    """Sérialise un VEVENT complet (lignes pliées, CRLF)."""
+    dtstamp = dtstamp or datetime.now(timezone.utc)
+
+    lines = ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTAMP:{format_utc(dtstamp)}"]
+
+    if all_day:
+        day = begin.date() if isinstance(begin, datetime) else begin
+        end_day = end if isinstance(end, date) and not isinstance(end, datetime) else day + timedelta(days=1)
+        lines.append(f"DTSTART;VALUE=DATE:{day.strftime('%Y%m%d')}")
+        lines.append(f"DTEND;VALUE=DATE:{end_day.strftime('%Y%m%d')}")
+    else:
+        lines.append(f"DTSTART;TZID={TZID}:{format_local(begin)}")
+        if end is not None:
+            lines.append(f"DTEND;TZID={TZID}:{format_local(end)}")
+
+    lines.append(f"SUMMARY:{escape_text(summary)}")
+    if location:
+        lines.append(f"LOCATION:{escape_text(location)}")
+    if description:
+        lines.append(f"DESCRIPTION:{escape_text(description)}")
+    if last_modified is not None:
+        lines.append(f"LAST-MODIFIED:{format_utc(last_modified)}")
+    lines.append("END:VEVENT")
+
+    return "".join(fold_line(line) for line in lines)
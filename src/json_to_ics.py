@@ -1,8 +1,20 @@
 import argparse
 import json
+import os
+import time
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
-from ics import Calendar, Event
+
+from event_store import EventStore
+from events import event_fingerprint, event_object_hook, event_uid
+from ics_writer import IcsWriter, render_event
+from metrics import metrics
+
+PARIS_TZ = ZoneInfo("Europe/Paris")
+ICS_ENGINES = ('stream', 'ics')
+DEFAULT_CACHE_PATH = 'json/ics_cache.json'
+# À incrémenter quand le rendu d'un VEVENT change : invalide le cache
+RENDER_VERSION = 1
 
 
 def extract_events(data):
@@ -38,129 +50,236 @@ def parse_time(time_str):
     
     return None
 
-def main():
-    parser = argparse.ArgumentParser(description="Convertit un fichier JSON d'emploi du temps en ICS.")
-    parser.add_argument(
-        '--input', default='emploi_du_temps_complet.json',
-        help="Fichier JSON source (défaut: emploi_du_temps_complet.json)"
-    )
-    parser.add_argument(
-        '--output', default='mon_emploi_du_temps_fixed.ics',
-        help="Fichier ICS de sortie (défaut: mon_emploi_du_temps_fixed.ics)"
-    )
-    args = parser.parse_args()
+def build_event(item):
+    """
+    Prépare les champs ICS d'un événement JSON (titre, lieu, description, dates).
+    Retourne None si l'événement n'a pas de date/heure exploitable.
+    """
+    # --- Extraction des variables ---
+    course_code = item.get('course_code', '')
+    course_name = item.get('course_name', '')
+    title_raw = item.get('title', '')
+    location = item.get('location', '')
+    teacher = item.get('teacher', '')
+    event_type = item.get('type', '')  # Récupération du type (CM, TD, etc.)
 
-    input_filename = args.input
-    output_filename = args.output
+    event = {'all_day': False, 'end': None}
 
-    # 1. Chargement du fichier JSON
-    try:
-        with open(input_filename, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
-    except FileNotFoundError:
-        print(f"Erreur : Le fichier '{input_filename}' est introuvable.")
-        exit()
+    # --- MODIFICATION DU TITRE ---
+    # Format : "{course_code} {type} - {course_name} - {title_raw}"
+    event['name'] = f"{course_code} {event_type} - {course_name} - {title_raw}"
 
-    data = extract_events(raw_data)
+    # --- Lieu avec Professeur ---
+    if teacher:
+        event['location'] = f"{location} - {teacher}"
+    else:
+        event['location'] = location
 
-    # Création du calendrier
-    cal = Calendar()
+    # --- Description ---
+    description_lines = [
+        f"Matière: {course_name}",
+        f"Type: {event_type}",
+        f"Intervenant: {teacher}",
+        f"Salle: {location}",
+        f"Code: {course_code}",
+        f"Groupes: {', '.join(item.get('groups', []))}"
+    ]
+    event['description'] = "\n".join(description_lines)
 
-    # Aide à la compatibilité
+    # --- Gestion des Dates et Heures ---
+    date_str = item.get('date')
+    start_str = item.get('start_time')
+    end_str = item.get('end_time')
+
+    if not date_str or not start_str:
+        return None
+
+    # Gestion "Toute la journée"
+    if start_str == "00:00":
+        try:
+            event['begin'] = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError as err:
+            print(f"Erreur de format de date pour '{date_str}': {err}")
+            return None
+        event['all_day'] = True
+        return event
+
+    # Conversion date + heure
     try:
-        cal.method = "PUBLISH"
-    except AttributeError:
-        pass
+        # Parser la date (format YYYY-MM-DD)
+        try:
+            date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError as err:
+            print(f"Erreur de format de date pour '{date_str}': {err}")
+            return None
 
-    now = datetime.now()
+        # Parser l'heure de début
+        start_time = parse_time(start_str)
+        if not start_time:
+            print(f"Erreur: impossible de parser l'heure de début '{start_str}' pour l'événement '{event['name']}'")
+            return None
 
-    for item in data:
-        e = Event()
+        # Créer le datetime de début
+        dt_start = datetime.combine(date_obj, start_time)
+        event['begin'] = dt_start.replace(tzinfo=PARIS_TZ)
 
-        # --- Extraction des variables ---
-        course_code = item.get('course_code', '')
-        course_name = item.get('course_name', '')
-        title_raw = item.get('title', '')
-        location = item.get('location', '')
-        teacher = item.get('teacher', '')
-        event_type = item.get('type', '')  # Récupération du type (CM, TD, etc.)
-
-        # --- MODIFICATION DU TITRE ---
-        # Format : "{course_code} {type} - {course_name} - {title_raw}"
-        e.name = f"{course_code} {event_type} - {course_name} - {title_raw}"
-
-        # --- Lieu avec Professeur ---
-        if teacher:
-            e.location = f"{location} - {teacher}"
+        # Parser l'heure de fin
+        end_time = parse_time(end_str) if end_str else None
+        if end_time:
+            dt_end = datetime.combine(date_obj, end_time)
+            event['end'] = dt_end.replace(tzinfo=PARIS_TZ)
         else:
-            e.location = location
-
-        # --- Description ---
-        description_lines = [
-            f"Matière: {course_name}",
-            f"Type: {event_type}",
-            f"Intervenant: {teacher}",
-            f"Salle: {location}",
-            f"Code: {course_code}",
-            f"Groupes: {', '.join(item.get('groups', []))}"
-        ]
-        e.description = "\n".join(description_lines)
-
-        # --- Gestion des Dates et Heures ---
-        date_str = item.get('date')
-        start_str = item.get('start_time')
-        end_str = item.get('end_time')
-
-        if not date_str or not start_str:
-            continue
+            # Pas d'heure de fin exploitable, utiliser 1h par défaut
+            event['end'] = event['begin'] + timedelta(hours=1)
+
+        if event['end'] < event['begin']:
+            raise ValueError("l'heure de fin précède l'heure de début")
+
+    except Exception as err:
+        print(f"Erreur de traitement pour l'événement '{event['name']}': {err}")
+        return None
+
+    return event
 
-        # Gestion "Toute la journée"
-        if start_str == "00:00":
-            e.begin = date_str
-            e.make_all_day()
-            e.created = now
-            e.last_modified = now
-            cal.events.add(e)
-            continue
 
-        # Conversion date + heure
+class VeventCache:
+    """
+    Cache des blocs VEVENT déjà sérialisés, indexés par l'empreinte du
+    contenu de l'événement et son UID (des événements identiques reçoivent
+    des UID suffixés, chacun garde son bloc). Un événement inchangé réutilise son bloc tel
+    quel (mêmes UID, DTSTAMP et LAST-MODIFIED) : le fichier ICS ne change
+    que pour les événements ajoutés ou modifiés.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.blocks = {}
+        self.used = {}
+        self.hits = 0
+
         try:
-            paris_tz = ZoneInfo("Europe/Paris")
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == RENDER_VERSION:
+                self.blocks = data.get('blocks', {})
+        except FileNotFoundError:
+            pass
+        except (ValueError, OSError) as e:
+            print(f"⚠️ Cache ICS illisible '{path}' ({e}), régénération complète.")
+
+    @staticmethod
+    def _key(fingerprint, uid):
+        return f"{fingerprint} {uid}"
+
+    def get(self, fingerprint, uid):
+        key = self._key(fingerprint, uid)
+        entry = self.blocks.get(key)
+        if entry is None:
+            return None
+        self.hits += 1
+        self.used[key] = entry
+        return entry['block']
+
+    def put(self, fingerprint, uid, block):
+        self.used[self._key(fingerprint, uid)] = {'uid': uid, 'block': block}
+
+    def save(self):
+        """Enregistre uniquement les blocs du calendrier courant."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': RENDER_VERSION, 'blocks': self.used}, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def iter_uids(data):
+    """
+    Associe à chaque événement un UID stable. Deux événements de même
+    identité reçoivent un suffixe (-2, -3...) pour garder des UID uniques.
+    """
+    seen = {}
+    for item in data:
+        uid = event_uid(item)
+        seen[uid] = seen.get(uid, 0) + 1
+        if seen[uid] > 1:
+            name, domain = uid.split('@', 1)
+            uid = f"{name}-{seen[uid]}@{domain}"
+        yield item, uid
+
 
-            # Parser la date (format YYYY-MM-DD)
-            try:
-                date_obj = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except ValueError as err:
-                print(f"Erreur de format de date pour '{date_str}': {err}")
+def write_ics_stream(data, output_filename, cache=None):
+    """
+    Écrit le calendrier en flux avec IcsWriter. Retourne le nombre d'événements.
+    Avec un VeventCache, seuls les événements nouveaux ou modifiés sont rendus.
+    """
+    now = datetime.now(ZoneInfo("UTC"))
+
+    with IcsWriter(output_filename) as writer:
+        for item, uid in iter_uids(data):
+            fingerprint = event_fingerprint(item) if cache is not None else None
+            block = cache.get(fingerprint, uid) if cache is not None else None
+            if block is not None:
+                writer.write_raw(block)
                 continue
 
-            # Parser l'heure de début
-            start_time = parse_time(start_str)
-            if not start_time:
-                print(f"Erreur: impossible de parser l'heure de début '{start_str}' pour l'événement '{e.name}'")
+            event = build_event(item)
+            if event is None:
                 continue
+            block = render_event(
+                uid=uid,
+                summary=event['name'],
+                begin=event['begin'],
+                end=event['end'],
+                location=event['location'],
+                description=event['description'],
+                dtstamp=now,
+                last_modified=now,
+                all_day=event['all_day'],
+            )
+            if cache is not None:
+                cache.put(fingerprint, uid, block)
+            writer.write_raw(block)
+        count = writer.count
+
+    if cache is not None:
+        cache.save()
+        print(f"♻️ {cache.hits}/{count} VEVENT repris du cache, {count - cache.hits} (re)générés.")
+    return count
+
 
-            # Créer le datetime de début
-            dt_start = datetime.combine(date_obj, start_time)
-            e.begin = dt_start.replace(tzinfo=paris_tz)
-
-            # Parser l'heure de fin
-            if end_str:
-                end_time = parse_time(end_str)
-                if end_time:
-                    dt_end = datetime.combine(date_obj, end_time)
-                    e.end = dt_end.replace(tzinfo=paris_tz)
-                else:
-                    # Si le parsing échoue, utiliser 1h par défaut
-                    e.end = e.begin + timedelta(hours=1)
-            else:
-                # Pas d'heure de fin fournie, utiliser 1h par défaut
-                e.end = e.begin + timedelta(hours=1)
-
-        except Exception as err:
-            print(f"Erreur de traitement pour l'événement '{e.name}': {err}")
+def write_ics_legacy(data, output_filename):
+    """Ancien chemin : construit un ics.Calendar puis le sérialise en une fois."""
+    from ics import Calendar, Event
+
+    # Création du calendrier
+    cal = Calendar()
+
+    # Aide à la compatibilité
+    try:
+        cal.method = "PUBLISH"
+    except AttributeError:
+        pass
+
+    now = datetime.now()
+
+    for item, uid in iter_uids(data):
+        event = build_event(item)
+        if event is None:
             continue
 
+        e = Event()
+        e.uid = uid
+        e.name = event['name']
+        e.location = event['location']
+        e.description = event['description']
+        e.begin = event['begin'] if not event['all_day'] else event['begin'].isoformat()
+        if event['all_day']:
+            e.make_all_day()
+        else:
+            e.end = event['end']
+
         # Metadata
         e.created = now
         e.last_modified = now
@@ -168,11 +287,80 @@ def main():
         # Ajout au calendrier
         cal.events.add(e)
 
-    # 3. Sauvegarde
     with open(output_filename, 'w', encoding='utf-8') as f:
         f.writelines(cal.serialize())
 
-    print(f"Succès ! Le fichier '{output_filename}' a été créé avec {len(cal.events)} événements.")
+    return len(cal.events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convertit un fichier JSON d'emploi du temps en ICS.")
+    parser.add_argument(
+        '--input', default='emploi_du_temps_complet.json',
+        help="Fichier JSON source (défaut: emploi_du_temps_complet.json)"
+    )
+    parser.add_argument(
+        '--output', default='mon_emploi_du_temps_fixed.ics',
+        help="Fichier ICS de sortie (défaut: mon_emploi_du_temps_fixed.ics)"
+    )
+    parser.add_argument(
+        '--engine', choices=ICS_ENGINES, default='stream',
+        help="stream : écriture RFC 5545 native en flux (défaut) ; ics : bibliothèque ics"
+    )
+    parser.add_argument(
+        '--cache', default=DEFAULT_CACHE_PATH,
+        help=f"Cache des VEVENT déjà rendus (défaut: {DEFAULT_CACHE_PATH})"
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help="Rendre tous les événements sans utiliser le cache"
+    )
+    parser.add_argument(
+        '--store', default=os.environ.get('EVENT_STORE') or None,
+        help="Lire les événements dans le magasin SQLite (event_store.py) au lieu de --input (défaut: $EVENT_STORE)"
+    )
+    args = parser.parse_args()
+
+    input_filename = args.input
+    output_filename = args.output
+    metrics.start("json_to_ics", engine=args.engine, cache=not args.no_cache, store=bool(args.store))
+
+    # 1. Chargement : fichier JSON, ou requête triée sur le magasin SQLite (lue en flux)
+    store = None
+    if args.store:
+        store = EventStore(args.store)
+        data = store.iter_events()
+        metrics.incr("events_in", len(store))
+    else:
+        try:
+            with metrics.span("load_json"), open(input_filename, 'r', encoding='utf-8') as f:
+                raw_data = json.load(f, object_hook=event_object_hook)
+        except FileNotFoundError:
+            print(f"Erreur : Le fichier '{input_filename}' est introuvable.")
+            exit()
+
+        data = extract_events(raw_data)
+        metrics.incr("events_in", len(data))
+
+    # 2. Génération et sauvegarde
+    started = time.perf_counter()
+    cache = None
+    with metrics.span("write_ics"):
+        if args.engine == 'ics':
+            count = write_ics_legacy(data, output_filename)
+        else:
+            cache = None if args.no_cache else VeventCache(args.cache)
+            count = write_ics_stream(data, output_filename, cache)
+    elapsed = time.perf_counter() - started
+    if store is not None:
+        store.close()
+
+    metrics.incr("events_written", count)
+    if cache is not None:
+        metrics.incr("cache_hits", cache.hits)
+    metrics.incr("ics_bytes", os.path.getsize(output_filename))
+    print(f"Succès ! Le fichier '{output_filename}' a été créé avec {count} événements ({elapsed:.2f}s).")
+    metrics.finish()
 
 
 if __name__ == "__main__":
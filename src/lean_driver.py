@@ -0,0 +1,201 @@
+"""
+NAVIGATEUR CHROME ALLÉGÉ POUR LE SCRAPING
+=========================================
+Seul le DOM FullCalendar est utilisé : en mode "lean", les images, polices,
+médias et scripts de mesure d'audience sont bloqués via le protocole
+DevTools (Network.setBlockedURLs), les fonctionnalités inutiles de Chrome
+sont désactivées et la page est rendue dès le DOMContentLoaded (les
+attentes du WaitEngine portent ensuite sur le calendrier lui-même).
+
+Le chemin de chromedriver est résolu sans requête réseau quand c'est
+possible : CHROMEDRIVER_PATH, puis chromedriver dans le PATH, puis le
+chemin mis en cache lors d'une précédente installation par webdriver-manager.
+Un chromedriver du PATH ou du cache n'est retenu que si sa version majeure
+est celle de Chrome (sinon la session ne démarre pas) ; à défaut,
+webdriver-manager installe le bon.
+
+Variables d'environnement :
+    CELCAT_DRIVER=full|lean     mode du navigateur (défaut: full)
+    CELCAT_BLOCK_CSS=1          bloque aussi les feuilles de style (mode lean)
+    CHROMEDRIVER_PATH=...       chromedriver épinglé
+"""
+import os
+import re
+import shutil
+import subprocess
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+
+DRIVER_MODES = ('full', 'lean')
+DEFAULT_DRIVER_MODE = os.environ.get('CELCAT_DRIVER', 'full').strip().lower()
+# FullCalendar mesure la grille pour positionner les événements : les feuilles
+# de style ne sont bloquées que sur demande
+BLOCK_STYLESHEETS = os.environ.get('CELCAT_BLOCK_CSS', '0') == '1'
+DRIVER_PATH_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "celcat", "chromedriver_path")
+CHROME_BINARIES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser')
+
+# Ressources inutiles à l'extraction (motifs Network.setBlockedURLs, * = joker)
+BLOCKED_URL_PATTERNS = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*matomo*", "*piwik*", "*hotjar*", "*xiti*",
+)
+STYLESHEET_PATTERNS = ("*.css",)
+
+# Options communes aux deux modes (navigateur historique)
+BASE_CHROME_ARGS = (
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-blink-features=AutomationControlled',
+)
+# Fonctionnalités de Chrome inutiles pour une session de scraping
+LEAN_CHROME_ARGS = (
+    '--window-size=1280,1024',
+    '--disable-gpu',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-translate',
+    '--disable-features=Translate,MediaRouter,OptimizationHints,InterestFeedContentSuggestions',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+    '--blink-settings=imagesEnabled=false',
+)
+
+_PAGE_LOAD_JS = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = 0;
+for (var i = 0; i < resources.length; i++) { bytes += resources[i].transferSize || 0; }
+return {
+    dom_content_loaded_ms: nav ? Math.round(nav.domContentLoadedEventEnd) : null,
+    load_ms: nav ? Math.round(nav.loadEventEnd) : null,
+    resources: resources.length,
+    transfer_bytes: bytes + (nav ? nav.transferSize || 0 : 0)
+};
+"""
+
+
+def major_version(binary):
+    """Version majeure affichée par `binary --version` (ex: 120), ou None."""
+    try:
+        output = subprocess.run([binary, '--version'], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = re.search(r'(\d+)\.\d+', output)
+    return int(match.group(1)) if match else None
+
+
+def chrome_major_version():
+    """Version majeure du Chrome installé, ou None s'il est introuvable."""
+    for name in CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return major_version(path)
+    return None
+
+
+def resolve_chromedriver(cache_path=DRIVER_PATH_CACHE):
+    """
+    Chemin de chromedriver, en évitant la recherche réseau de webdriver-manager :
+    CHROMEDRIVER_PATH, PATH, chemin en cache, puis installation (mise en cache).
+    Les chromedrivers du PATH et du cache doivent avoir la version majeure de Chrome.
+    """
+    pinned = os.environ.get('CHROMEDRIVER_PATH')
+    if pinned:
+        return pinned
+
+    candidates = [shutil.which('chromedriver')]
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            candidates.append(f.read().strip())
+    except OSError:
+        pass
+
+    chrome = None
+    for candidate in candidates:
+        if not candidate or not os.path.exists(candidate):
+            continue
+        chrome = chrome or chrome_major_version()
+        driver = major_version(candidate)
+        if chrome is not None and driver == chrome:
+            return candidate
+        print(f"   ⚠️ chromedriver {driver} ignoré ({candidate}) : Chrome {chrome or 'introuvable'}")
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    installed = ChromeDriverManager().install()
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            f.write(installed)
+    except OSError as e:
+        print(f"⚠️ Impossible de mettre en cache le chemin de chromedriver : {e}")
+    return installed
+
+
+def build_options(headless=True, mode=None):
+    """Options Chrome du mode demandé ("full" = navigateur historique)."""
+    mode = mode or DEFAULT_DRIVER_MODE
+    options = webdriver.ChromeOptions()
+
+    if headless:
+        options.add_argument('--headless')
+    for arg in BASE_CHROME_ARGS:
+        options.add_argument(arg)
+
+    if mode == 'lean':
+        for arg in LEAN_CHROME_ARGS:
+            options.add_argument(arg)
+        # Rendre la main dès le DOMContentLoaded : les attentes portent sur le calendrier
+        options.page_load_strategy = 'eager'
+        options.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+            'profile.default_content_setting_values.notifications': 2,
+        })
+    else:
+        options.add_argument('--window-size=1920,1080')
+    return options
+
+
+def enable_resource_blocking(driver, block_stylesheets=None):
+    """Bloque les ressources non essentielles via DevTools. Retourne False si indisponible."""
+    patterns = list(BLOCKED_URL_PATTERNS)
+    if BLOCK_STYLESHEETS if block_stylesheets is None else block_stylesheets:
+        patterns.extend(STYLESHEET_PATTERNS)
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        return True
+    except (WebDriverException, AttributeError) as e:
+        print(f"⚠️ Blocage des ressources indisponible ({e})")
+        return False
+
+
+def create_driver(headless=True, mode=None):
+    """Démarre Chrome dans le mode demandé ("full" ou "lean")."""
+    mode = mode or DEFAULT_DRIVER_MODE
+    if mode not in DRIVER_MODES:
+        raise ValueError(f"Mode de navigateur inconnu : {mode} (attendu : {', '.join(DRIVER_MODES)})")
+
+    service = Service(resolve_chromedriver())
+    driver = webdriver.Chrome(service=service, options=build_options(headless, mode))
+    if mode == 'lean':
+        enable_resource_blocking(driver)
+    return driver
+
+
+def page_load_stats(driver):
+    """Durées de chargement (Navigation Timing) et volume transféré de la page courante."""
+    try:
+        return driver.execute_script(_PAGE_LOAD_JS) or {}
+    except WebDriverException:
+        return {}
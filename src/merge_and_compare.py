@@ -1,16 +1,30 @@
 import json
 import os
 import sys
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from events import EventIndex, event_object_hook, event_to_json
+from event_diff import diff_events
+from event_store import EventStore
+from metrics import metrics
+from week_fingerprint import load_skipped_dates
 
 # Chemins des fichiers
 MASTER_JSON_PATH = 'json/emploi_du_temps_complet.json'
 NEW_DATA_PATH = 'temp_update.json' # Le fichier généré par ton scraper léger
+CHANGESET_PATH = 'changeset.json' # Détail des changements (artifact du workflow)
+# Magasin SQLite optionnel : seule la fenêtre mise à jour est lue et réécrite
+EVENT_STORE_PATH = os.environ.get('EVENT_STORE', '')
+# Avec EVENT_STORE, réécrire aussi le master JSON (compatibilité)
+EVENT_STORE_EXPORT = os.environ.get('EVENT_STORE_EXPORT', '0') == '1'
 
 def load_json(path):
     if not os.path.exists(path):
         return []
     with open(path, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        # Événements convertis en Event (compacts, chaînes internées) pendant la lecture
+        return json.load(f, object_hook=event_object_hook)
 
 def extract_events(data):
     """Retourne la liste d'événements que data soit un dict avec 'events' ou une liste."""
@@ -18,62 +32,167 @@ def extract_events(data):
         return data.get('events', [])
     return data
 
-def run():
-    # 1. Charger les données
-    master_data = extract_events(load_json(MASTER_JSON_PATH))
-    new_data = extract_events(load_json(NEW_DATA_PATH))
+def sort_key(event):
+    return (event.get('date', ''), event.get('start_time', ''))
 
-    if not new_data:
-        print("Aucune nouvelle donnée scrapée.")
-        # Écrit dans GITHUB_OUTPUT que rien n'a changé
-        with open(os.environ['GITHUB_OUTPUT'], 'a') as fh:
-            print(f"changed=false", file=fh)
+def write_github_output(**values):
+    """Écrit des variables dans GITHUB_OUTPUT (ou les affiche hors GitHub Actions)."""
+    output_path = os.environ.get('GITHUB_OUTPUT')
+    if not output_path:
+        for name, value in values.items():
+            print(f"[output] {name}={value}")
         return
-
-    # 2. Snapshot de l'état original pour comparaison
-    original_dump = json.dumps(master_data, sort_keys=True)
-
-    # 3. Déterminer la plage de dates couverte par les nouvelles données
+    with open(output_path, 'a') as fh:
+        for name, value in values.items():
+            print(f"{name}={value}", file=fh)
+
+def find_date_window(master_data, min_date, max_date):
+    """
+    Indices [lo, hi) des événements du master (trié) dont la date est dans
+    [min_date, max_date]. Recherche dichotomique : seule la fenêtre est parcourue.
+    Les événements sans date (triés en tête) ne sont jamais dans la fenêtre.
+    """
+    date_of = lambda e: e.get('date') or ''
+    lo = bisect_left(master_data, min_date, key=date_of)
+    hi = bisect_right(master_data, max_date, lo=lo, key=date_of)
+    return lo, hi
+
+def merge_window(master_data, new_data, keep_dates=()):
+    """
+    Remplace la plage de dates couverte par new_data dans master_data.
+    Les événements du master aux dates de keep_dates (semaines ignorées car
+    inchangées) sont conservés, sauf si new_data contient ces dates.
+
+    Returns:
+        (master mis à jour, changeset, (min_date, max_date)) ou None si
+        new_data ne contient aucune date
+    """
     new_dates = [e['date'] for e in new_data if e.get('date')]
     if not new_dates:
-        print("Aucune date trouvée dans les nouvelles données.")
-        with open(os.environ['GITHUB_OUTPUT'], 'a') as fh:
-            print(f"changed=false", file=fh)
-        return
+        return None
 
     min_date = min(new_dates)
     max_date = max(new_dates)
-    print(f"Plage de mise à jour : {min_date} → {max_date}")
 
-    # 4. Supprimer du master les événements qui tombent dans cette plage de dates
-    # Events without a date are preserved (treated as outside any range)
-    filtered_master = [
-        e for e in master_data
-        if not e.get('date') or not (min_date <= e['date'] <= max_date)
-    ]
+    # Le master est écrit trié ; on ne re-trie que s'il ne l'est pas
+    if any(sort_key(a) > sort_key(b) for a, b in zip(master_data, master_data[1:])):
+        master_data = sorted(master_data, key=sort_key)
+
+    lo, hi = find_date_window(master_data, min_date, max_date)
+    keep = set(keep_dates).difference(new_dates)
+    kept = [e for e in master_data[lo:hi] if e.get('date') in keep] if keep else []
+    new_window = sorted(list(new_data) + kept, key=sort_key)
+
+    with metrics.span("diff"):
+        changeset = diff_events(master_data[lo:hi], new_window)
+    updated_master = master_data[:lo] + new_window + master_data[hi:]
+    return updated_master, changeset, (min_date, max_date)
+
+def write_changeset(changeset, window, path=CHANGESET_PATH):
+    """Sauvegarde le changeset au format JSON (lisible par une machine)."""
+    payload = {
+        'generated_at': datetime.now().isoformat(),
+        'window': {'start': window[0], 'end': window[1]},
+    }
+    payload.update(changeset.to_dict())
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=4, ensure_ascii=False, default=event_to_json)
+
+def open_store(path):
+    """Ouvre le magasin SQLite ; au premier usage, il est initialisé depuis le master JSON."""
+    store = EventStore(path)
+    if not len(store) and os.path.exists(MASTER_JSON_PATH):
+        count = store.import_json(MASTER_JSON_PATH)
+        print(f"📥 Master JSON importé dans '{path}' ({count} événements)")
+    return store
+
+def run(new_data=None):
+    """
+    Fusionne la mise à jour (new_data en mémoire, sinon NEW_DATA_PATH) dans le master.
+
+    Returns:
+        (changements détectés, master à jour) ; le master est None avec le
+        magasin SQLite (lire EventStore.iter_events()).
+    """
+    metrics.start("merge_and_compare", store=bool(EVENT_STORE_PATH))
+    store = None
+    try:
+        if EVENT_STORE_PATH:
+            store = open_store(EVENT_STORE_PATH)
+        return _run(store, new_data)
+    finally:
+        if store is not None:
+            store.close()
+        metrics.finish()
+
+def _run(store=None, new_data=None):
+    # 1. Charger les données (avec le magasin SQLite, le master n'est pas chargé)
+    with metrics.span("load"):
+        master_data = extract_events(load_json(MASTER_JSON_PATH)) if store is None else None
+        if new_data is None:
+            new_data = extract_events(load_json(NEW_DATA_PATH))
+        # Seuls les doublons exacts de la mise à jour sont retirés (index haché)
+        new_data = list(EventIndex(new_data))
+    metrics.incr("master_events", len(master_data) if store is None else len(store))
+    metrics.incr("new_events", len(new_data))
+    # Dates des semaines que le scraper a ignorées (empreinte inchangée) : pas de fusion
+    keep_dates = load_skipped_dates()
+    if keep_dates:
+        print(f"⏭️ {len(keep_dates)} date(s) de semaines inchangées conservées telles quelles")
 
-    # 5. Insérer les nouveaux événements et trier
-    updated_master = filtered_master + new_data
-    updated_master.sort(key=lambda x: (x.get('date', ''), x.get('start_time', '')))
+    if not new_data:
+        print("Aucune nouvelle donnée scrapée.")
+        # Écrit dans GITHUB_OUTPUT que rien n'a changé
+        write_github_output(changed='false')
+        return False, master_data
+
+    # 2. Remplacer la plage de dates couverte par les nouvelles données
+    with metrics.span("merge"):
+        if store is None:
+            merged = merge_window(master_data, new_data, keep_dates)
+        else:
+            # Lecture, diff et remplacement de la seule fenêtre, en une transaction
+            merged = store.replace_window(new_data, keep_dates)
+    if merged is None:
+        print("Aucune date trouvée dans les nouvelles données.")
+        write_github_output(changed='false')
+        return False, master_data
 
-    # 6. Vérifier si ça a changé
-    new_dump = json.dumps(updated_master, sort_keys=True)
+    if store is None:
+        updated_master, changeset, window = merged
+    else:
+        changeset, window = merged
+    print(f"Plage de mise à jour : {window[0]} → {window[1]}")
 
-    has_changes = original_dump != new_dump
+    # 3. Changeset : ajouts / suppressions / modifications dans la plage
+    write_changeset(changeset, window)
+    summary = changeset.summary()
+    has_changes = changeset.has_changes
+    for name, value in summary.items():
+        metrics.incr(name, value)
 
     if has_changes:
-        print("🔄 Changements détectés !")
+        print(f"🔄 Changements détectés ! +{summary['added']} -{summary['removed']} ~{summary['modified']}")
 
         # Sauvegarder le nouveau master
-        os.makedirs(os.path.dirname(MASTER_JSON_PATH), exist_ok=True)
-        with open(MASTER_JSON_PATH, 'w', encoding='utf-8') as f:
-            json.dump(updated_master, f, indent=4, ensure_ascii=False)
+        if store is None:
+            os.makedirs(os.path.dirname(MASTER_JSON_PATH), exist_ok=True)
+            with metrics.span("write_master"), open(MASTER_JSON_PATH, 'w', encoding='utf-8') as f:
+                json.dump(updated_master, f, indent=4, ensure_ascii=False, default=event_to_json)
+        elif EVENT_STORE_EXPORT:
+            with metrics.span("write_master"):
+                store.export_json(MASTER_JSON_PATH)
     else:
         print("✅ Aucun changement détecté.")
 
-    # 7. Communiquer avec GitHub Actions
-    with open(os.environ['GITHUB_OUTPUT'], 'a') as fh:
-        print(f"changed={str(has_changes).lower()}", file=fh)
+    # 4. Communiquer avec GitHub Actions
+    write_github_output(
+        changed=str(has_changes).lower(),
+        added=summary['added'],
+        removed=summary['removed'],
+        modified=summary['modified'],
+    )
+    return has_changes, updated_master if store is None else None
 
 if __name__ == "__main__":
     run()
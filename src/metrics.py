@@ -0,0 +1,288 @@
+"""
+MÉTRIQUES D'EXÉCUTION DU PIPELINE
+=================================
+Chronométrage par étape (spans nommés, imbricables), compteurs, valeurs
+observées (ex: événements par semaine) et pic mémoire échantillonné.
+Chaque script démarre un run ; les résultats sont écrits en JSON à la
+fin (metrics/<script>.json) et peuvent être affichés en résumé lisible.
+
+Variables d'environnement :
+    METRICS_DIR=metrics     dossier des fichiers JSON ("" pour désactiver l'écriture)
+    METRICS_SUMMARY=1       affiche le résumé en fin d'exécution
+
+Usage:
+    from metrics import metrics
+    metrics.start("html_to_json")
+    with metrics.span("parse", file=name):
+        ...
+    metrics.incr("parse_failures")
+    metrics.observe("events_per_week", len(events))
+    metrics.finish()
+"""
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+METRICS_DIR = os.environ.get('METRICS_DIR', 'metrics')
+METRICS_SUMMARY = os.environ.get('METRICS_SUMMARY', '0') == '1'
+# Intervalle d'échantillonnage de la mémoire résidente (secondes)
+MEMORY_SAMPLE_INTERVAL = 0.25
+
+
+def current_rss():
+    """Mémoire résidente actuelle du processus (octets), ou None si indisponible."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def peak_rss():
+    """Pic de mémoire résidente depuis le démarrage du processus (octets), selon l'OS."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en Kio sous Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemorySampler(threading.Thread):
+    """Échantillonne la mémoire résidente et retient le pic et le span actif à ce moment."""
+
+    def __init__(self, metrics, interval=MEMORY_SAMPLE_INTERVAL):
+        super().__init__(name="metrics-memory", daemon=True)
+        self.metrics = metrics
+        self.interval = interval
+        self.peak = 0
+        self.peak_span = None
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        rss = current_rss()
+        if rss is None:
+            return
+        self.samples += 1
+        if rss > self.peak:
+            self.peak = rss
+            self.peak_span = self.metrics.active_span()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.sample()
+
+
+class Metrics:
+    """Collecteur de métriques d'un run (utilisable depuis plusieurs threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._sampler = None
+        self._reset()
+
+    def _reset(self):
+        """Remet à zéro les valeurs du run (le verrou reste le même pour les autres threads)."""
+        with self._lock:
+            self.script = None
+            self.started_at = None
+            self._started = None
+            self._active = {}
+            self.spans = []
+            self.counters = {}
+            self.observations = {}
+            self.info = {}
+
+    def start(self, script, sample_memory=True, **info):
+        """Démarre un run (remet les métriques à zéro)."""
+        if self._sampler is not None:
+            # Échantillonneur du run précédent (arrêté par finish() ou non) : attendu avant le suivant
+            self._sampler.stop()
+            self._sampler.join()
+            self._sampler = None
+        self._reset()
+        self.script = script
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._started = time.perf_counter()
+        self.info = dict(info)
+        if sample_memory and current_rss() is not None:
+            self._sampler = MemorySampler(self)
+            self._sampler.start()
+        return self
+
+    # --- Spans ---
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def active_span(self):
+        """Chemin du span en cours dans le thread principal (ou le dernier thread actif)."""
+        with self._lock:
+            return next(reversed(self._active.values()), None) if self._active else None
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Chronomètre un bloc. Les spans imbriqués sont nommés par chemin
+        (ex: "week/navigate") ; attrs est conservé avec la mesure.
+        """
+        stack = self._stack()
+        stack.append(name)
+        path = "/".join(stack)
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._active[thread_id] = path
+        started = time.perf_counter()
+        error = None
+        try:
+            yield attrs
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            self.record(path, elapsed, error=error, started=started, **attrs)
+            with self._lock:
+                if stack:
+                    self._active[thread_id] = "/".join(stack)
+                else:
+                    self._active.pop(thread_id, None)
+
+    def record(self, name, seconds, error=None, started=None, **attrs):
+        """Ajoute une mesure déjà chronométrée (ex: attentes du WaitEngine)."""
+        entry = {'name': name, 'seconds': round(seconds, 4)}
+        if self._started is not None:
+            started = time.perf_counter() - seconds if started is None else started
+            entry['at'] = round(started - self._started, 4)
+        if error:
+            entry['error'] = error
+        if attrs:
+            entry['attrs'] = attrs
+        with self._lock:
+            self.spans.append(entry)
+
+    # --- Compteurs et valeurs ---
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        """Enregistre une valeur (ex: événements d'une semaine) pour en donner min/moy/max."""
+        with self._lock:
+            self.observations.setdefault(name, []).append(value)
+
+    # --- Résultats ---
+
+    def summary(self):
+        """Agrège les spans par nom, dans l'ordre de premier démarrage."""
+        stats = {}
+        for s in sorted(self.spans, key=lambda s: (s.get('at', 0), s['name'].count('/'))):
+            agg = stats.setdefault(s['name'], {'count': 0, 'total': 0.0, 'min': None, 'max': 0.0, 'errors': 0})
+            agg['count'] += 1
+            agg['total'] += s['seconds']
+            agg['min'] = s['seconds'] if agg['min'] is None else min(agg['min'], s['seconds'])
+            agg['max'] = max(agg['max'], s['seconds'])
+            if 'error' in s:
+                agg['errors'] += 1
+        for agg in stats.values():
+            agg['total'] = round(agg['total'], 4)
+            agg['mean'] = round(agg['total'] / agg['count'], 4)
+        return stats
+
+    def _observation_stats(self):
+        stats = {}
+        for name, values in self.observations.items():
+            stats[name] = {
+                'count': len(values),
+                'sum': sum(values),
+                'min': min(values),
+                'max': max(values),
+                'mean': round(sum(values) / len(values), 3),
+            }
+        return stats
+
+    def to_dict(self):
+        duration = time.perf_counter() - self._started if self._started is not None else 0.0
+        memory = {'peak_rss_bytes': peak_rss()}
+        if self._sampler is not None:
+            memory.update({
+                'sampled_peak_rss_bytes': self._sampler.peak,
+                'peak_during': self._sampler.peak_span,
+                'samples': self._sampler.samples,
+            })
+        return {
+            'script': self.script,
+            'started_at': self.started_at,
+            'duration_seconds': round(duration, 4),
+            'python': platform.python_version(),
+            'argv': sys.argv[1:],
+            'info': self.info,
+            'stages': self.summary(),
+            'counters': self.counters,
+            'observations': self._observation_stats(),
+            'memory': memory,
+            'spans': self.spans,
+        }
+
+    def print_summary(self, data=None):
+        """Affiche les durées par étape, les compteurs et le pic mémoire."""
+        data = data or self.to_dict()
+        print(f"\n📊 Métriques {data['script']} : {data['duration_seconds']:.2f}s")
+        for name, s in data['stages'].items():
+            indent = "   " + "  " * name.count("/")
+            label = name.rsplit("/", 1)[-1]
+            print(f"{indent}- {label:<18} {s['total']:8.3f}s  ({s['count']}x, max {s['max']:.3f}s"
+                  + (f", {s['errors']} erreur(s))" if s['errors'] else ")"))
+        for name, value in data['counters'].items():
+            print(f"   # {name:<24} {value}")
+        for name, s in data['observations'].items():
+            print(f"   ~ {name:<24} moy {s['mean']} (min {s['min']}, max {s['max']}, n={s['count']})")
+        peak = max(data['memory'].get('sampled_peak_rss_bytes') or 0, data['memory'].get('peak_rss_bytes') or 0)
+        if peak:
+            print(f"   💾 pic mémoire : {peak / (1024 * 1024):.1f} Mio")
+
+    def finish(self, path=None, show_summary=None):
+        """
+        Termine le run : écrit le fichier JSON (par défaut METRICS_DIR/<script>.json)
+        et affiche le résumé si demandé. Retourne le chemin écrit (ou None).
+        """
+        if self._sampler is not None:
+            self._sampler.stop()
+        data = self.to_dict()
+
+        if path is None and METRICS_DIR:
+            path = os.path.join(METRICS_DIR, f"{self.script}.json")
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+
+        if METRICS_SUMMARY if show_summary is None else show_summary:
+            self.print_summary(data)
+        return path
+
+
+# Collecteur partagé par les modules d'un même processus
+metrics = Metrics()
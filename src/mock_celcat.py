@@ -0,0 +1,265 @@
+"""
+SERVEUR CELCAT DE SUBSTITUTION (LOCAL)
+======================================
+Petit serveur HTTP local qui imite CELCAT : page de connexion avec jeton
+anti-CSRF, page du calendrier (redirige vers la connexion sans session)
+et endpoint GetCalendarData avec des événements synthétiques
+déterministes. Permet de tester celcat_api.py et http_backend.py sans
+accès au vrai CELCAT. Les connexions HTTP/1.1 sont persistantes.
+
+Usage:
+    python src/mock_celcat.py --port 8765
+    # URL du calendrier : http://127.0.0.1:8765/calendar/cal?vt=agendaWeek&et=student&fid0=123
+    # Identifiants : student / secret
+"""
+import argparse
+import json
+import secrets
+import threading
+from datetime import datetime, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+SESSION_COOKIE = "CelcatSession"
+SESSION_VALUE = "mock-session"
+CSRF_COOKIE = "__RequestVerificationToken"
+LOGIN_PATH = "/calendar/LdapLogin"
+LOGON_PATH = "/calendar/LdapLogin/Logon"
+DEFAULT_USERNAME = "student"
+DEFAULT_PASSWORD = "secret"
+
+_LOGIN_PAGE = """<!DOCTYPE html><html><head><title>Connexion</title></head><body>
+<form method="post" action="{action}">
+  <input name="__RequestVerificationToken" type="hidden" value="{token}">
+  <input name="ReturnUrl" type="hidden" value="{return_url}">
+  <input id="Name" name="Name" type="text" value="">
+  <input id="Password" name="Password" type="password">
+  <input type="checkbox" name="RememberMe" value="true">
+  <button type="submit">Connexion</button>
+</form>{error}
+</body></html>"""
+
+_CALENDAR_PAGE = """<!DOCTYPE html><html><head><title>Celcat Calendar</title></head><body>
+<div id="calendar" class="fc fc-unthemed fc-ltr"></div>
+<script>/* FullCalendar charge les événements via Home/GetCalendarData */</script>
+</body></html>"""
+
+_SLOTS = [("08:00", "10:00"), ("10:15", "12:15"), ("14:00", "16:00"), ("16:15", "18:15")]
+_COURSES = [
+    ("065", "Anglais", "Salle TD 3", "SMITH John", "TD"),
+    ("066", "Pharmacologie et toxicologie clinique", "Amphi A", "DUPONT Jean", "CM"),
+    ("071", "Anatomie comparée des animaux", "Salle TP 1", "MARTIN Claire", "TP"),
+]
+
+
+def synthetic_calendar_data(start, end):
+    """Génère des événements GetCalendarData déterministes entre start et end (exclu)."""
+    events = []
+    day = start
+    while day < end:
+        if day.weekday() < 5:
+            for slot_idx, (slot_start, slot_end) in enumerate(_SLOTS):
+                if (day.toordinal() + slot_idx) % 3 == 0:
+                    continue
+                code, name, room, teacher, kind = _COURSES[(day.toordinal() + slot_idx) % len(_COURSES)]
+                description = "<br />\r\n\r\n".join([
+                    "Cours", f"{code} {name} [{code}]", room, teacher, kind, "VET3 [VET3]"
+                ])
+                events.append({
+                    'id': f"{day:%Y%m%d}-{slot_idx}",
+                    'start': f"{day:%Y-%m-%d}T{slot_start}:00",
+                    'end': f"{day:%Y-%m-%d}T{slot_end}:00",
+                    'allDay': False,
+                    'description': description,
+                    'eventCategory': kind,
+                })
+        day += timedelta(days=1)
+    return events
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # Connexions persistantes (keep-alive), comme un vrai serveur
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connection_count += 1
+
+    def _send(self, status, body=b"", content_type='text/html; charset=utf-8', headers=()):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json; charset=utf-8')
+
+    def _cookies(self):
+        cookies = {}
+        for part in self.headers.get('Cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name:
+                cookies[name] = value
+        return cookies
+
+    def _authenticated(self):
+        if not self.server.require_cookie:
+            return True
+        return self._cookies().get(SESSION_COOKIE) == SESSION_VALUE
+
+    def _read_form(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return parse_qs(self.rfile.read(length).decode('utf-8'))
+
+    def _login_page(self, return_url, error=""):
+        token = secrets.token_hex(16)
+        body = _LOGIN_PAGE.format(
+            action=LOGON_PATH, token=token, return_url=escape(return_url, quote=True),
+            error=f'<p class="error">{escape(error)}</p>' if error else "",
+        ).encode('utf-8')
+        # Double soumission : le jeton du formulaire doit correspondre au cookie
+        self._send(200, body, headers=[('Set-Cookie', f"{CSRF_COOKIE}={token}; Path=/; HttpOnly")])
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == LOGIN_PATH:
+            return_url = parse_qs(parsed.query).get('ReturnUrl', ['/calendar/cal'])[0]
+            self._login_page(return_url)
+            return
+        if parsed.path.startswith('/calendar/cal'):
+            if not self._authenticated():
+                location = f"{LOGIN_PATH}?ReturnUrl={quote(self.path, safe='')}"
+                self._send(302, headers=[('Location', location)])
+                return
+            self._send(200, _CALENDAR_PAGE.encode('utf-8'))
+            return
+        self._send(404, b"not found")
+
+    def _logon(self):
+        form = {k: v[0] for k, v in self._read_form().items()}
+        return_url = form.get('ReturnUrl') or '/calendar/cal'
+        token_ok = form.get(CSRF_COOKIE) and form.get(CSRF_COOKIE) == self._cookies().get(CSRF_COOKIE)
+        if not token_ok:
+            self._send(400, b"invalid anti-forgery token")
+            return
+        if (form.get('Name'), form.get('Password')) != (self.server.username, self.server.password):
+            self._login_page(return_url, error="Identifiant ou mot de passe incorrect")
+            return
+        self.server.login_count += 1
+        self._send(302, headers=[
+            ('Set-Cookie', f"{SESSION_COOKIE}={SESSION_VALUE}; Path=/; HttpOnly"),
+            ('Location', return_url),
+        ])
+
+    def do_POST(self):
+        if urlparse(self.path).path == LOGON_PATH:
+            self._logon()
+            return
+        if not self.path.rstrip('/').endswith('/Home/GetCalendarData'):
+            self._read_form()
+            self._send_json(404, {'error': 'not found'})
+            return
+        if not self._authenticated():
+            self._read_form()
+            self._send_json(401, {'error': 'unauthorized'})
+            return
+
+        form = self._read_form()
+        try:
+            start = datetime.strptime(form['start'][0], '%Y-%m-%d').date()
+            end = datetime.strptime(form['end'][0], '%Y-%m-%d').date()
+        except (KeyError, ValueError):
+            self._send_json(400, {'error': 'bad range'})
+            return
+
+        self.server.request_count += 1
+        self._send_json(200, synthetic_calendar_data(start, end))
+
+
+class MockCelcatServer:
+    """Serveur local démarré dans un thread (utilisable depuis un script de test)."""
+
+    def __init__(self, host='127.0.0.1', port=0, require_cookie=True,
+                 username=DEFAULT_USERNAME, password=DEFAULT_PASSWORD):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.require_cookie = require_cookie
+        self.httpd.username = username
+        self.httpd.password = password
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self.httpd.login_count = 0
+        self.httpd.connection_count = 0
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def calendar_url(self):
+        return f"{self.base_url}/calendar/cal?vt=agendaWeek&et=student&fid0=123"
+
+    @property
+    def login_url(self):
+        return f"{self.base_url}{LOGIN_PATH}"
+
+    @property
+    def request_count(self):
+        """Nombre de requêtes GetCalendarData servies."""
+        return self.httpd.request_count
+
+    @property
+    def login_count(self):
+        return self.httpd.login_count
+
+    @property
+    def connection_count(self):
+        """Nombre de connexions TCP acceptées (une seule si le keep-alive fonctionne)."""
+        return self.httpd.connection_count
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur CELCAT de substitution pour les tests locaux.")
+    parser.add_argument('--port', type=int, default=8765, help="Port d'écoute (défaut: 8765)")
+    parser.add_argument('--no-auth', action='store_true', help="Ne pas exiger le cookie de session")
+    args = parser.parse_args()
+
+    server = MockCelcatServer(port=args.port, require_cookie=not args.no_auth)
+    print(f"🧪 Mock CELCAT sur {server.calendar_url}")
+    print(f"   Cookie attendu : {SESSION_COOKIE}={SESSION_VALUE}")
+    print(f"   Identifiants   : {DEFAULT_USERNAME} / {DEFAULT_PASSWORD}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
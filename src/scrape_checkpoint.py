@@ -0,0 +1,154 @@
+"""
+POINTS DE REPRISE DU SCRAPING SEMESTRIEL
+========================================
+Après chaque semaine terminée, ses événements et l'état de son archivage
+sont écrits sur disque (écriture atomique). Si le navigateur meurt à la
+semaine 20 sur 26, `--resume` repart de l'exécution interrompue : les
+semaines terminées sont relues depuis le point de reprise, seules les
+suivantes sont scrapées.
+
+Structure :
+    .scrape_checkpoint/state.json               paramètres du run et état par semaine
+    .scrape_checkpoint/week_YYYY-MM-DD.json     événements de la semaine
+
+Une semaine ignorée car inchangée (--skip-unchanged) n'a pas d'événements :
+ses dates sont gardées dans l'état pour être rendues au manifeste
+d'empreintes à la reprise, sinon la fusion la prendrait pour une semaine vide.
+
+Le point de reprise est supprimé quand l'exécution se termine avec succès.
+"""
+import glob
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+from events import event_object_hook, event_to_json
+
+DEFAULT_CHECKPOINT_DIR = os.environ.get('SCRAPER_CHECKPOINT_DIR', '.scrape_checkpoint')
+# Au-delà, un point de reprise est ignoré (ex: cache Actions d'un semestre précédent)
+DEFAULT_MAX_AGE_HOURS = float(os.environ.get('SCRAPER_CHECKPOINT_MAX_AGE', '48'))
+CHECKPOINT_VERSION = 2
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, default=event_to_json)
+    os.replace(tmp_path, path)
+
+
+class ScrapeCheckpoint:
+    """État durable d'un scraping semaine par semaine."""
+
+    def __init__(self, directory=DEFAULT_CHECKPOINT_DIR, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+        self.directory = directory
+        self.state_path = os.path.join(directory, "state.json")
+        self.max_age = timedelta(hours=max_age_hours)
+        self.state = None
+        # Les travailleurs de scrape_parallel enregistrent leurs semaines en parallèle
+        self.lock = threading.Lock()
+
+    def _week_path(self, label):
+        return os.path.join(self.directory, f"week_{label}.json")
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            return state if state.get('version') == CHECKPOINT_VERSION else None
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def begin(self, start_date, nb_weeks, resume=False):
+        """
+        Démarre un run, ou reprend le précédent si resume et qu'il portait sur
+        le même nombre de semaines.
+
+        Returns:
+            Date de début à utiliser (celle du run repris le cas échéant)
+        """
+        previous = self._load_state() if resume else None
+        if previous and datetime.now() - datetime.fromisoformat(previous['started_at']) > self.max_age:
+            print(f"⚠️ Point de reprise du {previous['started_at'][:16]} trop ancien, ignoré")
+            previous = None
+        if previous and previous.get('nb_weeks') == nb_weeks:
+            self.state = previous
+            done = sum(1 for week in previous['weeks'].values() if week['status'] != 'failed')
+            print(f"♻️ Reprise du run du {previous['started_at'][:16]} : {done}/{nb_weeks} semaine(s) déjà terminée(s)")
+            return datetime.strptime(previous['start_date'], '%Y-%m-%d')
+
+        if resume:
+            print("⚠️ Aucun point de reprise compatible, scraping complet")
+        self.clear()
+        os.makedirs(self.directory, exist_ok=True)
+        self.state = {
+            'version': CHECKPOINT_VERSION,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'start_date': start_date.strftime('%Y-%m-%d'),
+            'nb_weeks': nb_weeks,
+            'weeks': {},
+        }
+        _write_json(self.state_path, self.state)
+        return datetime.strptime(self.state['start_date'], '%Y-%m-%d')
+
+    def completed(self, week_date):
+        week = self.state['weeks'].get(week_date.strftime('%Y-%m-%d'))
+        return week is not None and week['status'] != 'failed'
+
+    def week(self, week_date):
+        """État enregistré d'une semaine (dict) ou None."""
+        return self.state['weeks'].get(week_date.strftime('%Y-%m-%d'))
+
+    def load_events(self, week_date):
+        """Événements enregistrés d'une semaine terminée."""
+        with open(self._week_path(week_date.strftime('%Y-%m-%d')), 'r', encoding='utf-8') as f:
+            return json.load(f, object_hook=event_object_hook)
+
+    def record(self, week_date, events, archived, attempts, status='done', dates=None):
+        """
+        Enregistre une semaine terminée (status "done" ou "skipped").
+        dates : dates d'en-tête d'une semaine ignorée, rendues au manifeste à la reprise.
+        """
+        label = week_date.strftime('%Y-%m-%d')
+        events = list(events)
+        # Événements d'abord : l'état ne référence jamais un fichier absent
+        _write_json(self._week_path(label), events)
+        with self.lock:
+            self.state['weeks'][label] = {
+                'status': status,
+                'archived': archived,
+                'events': len(events),
+                'attempts': attempts,
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            if dates:
+                self.state['weeks'][label]['dates'] = list(dates)
+            _write_json(self.state_path, self.state)
+
+    def record_failure(self, week_date, error, attempts):
+        """Note une semaine perdue après toutes ses tentatives (refaite par --resume)."""
+        with self.lock:
+            self.state['weeks'][week_date.strftime('%Y-%m-%d')] = {
+                'status': 'failed',
+                'error': error,
+                'attempts': attempts,
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            _write_json(self.state_path, self.state)
+
+    def failed_weeks(self):
+        return sorted(label for label, week in self.state['weeks'].items() if week['status'] == 'failed')
+
+    def clear(self):
+        """Supprime le point de reprise (run terminé ou nouveau run)."""
+        # Seuls les fichiers du point de reprise sont supprimés, jamais le dossier entier
+        for path in glob.glob(os.path.join(self.directory, "week_*.json")) + [self.state_path]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
@@ -0,0 +1,182 @@
+"""
+PIPELINE DE SCRAPING PRODUCTEUR / CONSOMMATEURS
+===============================================
+Le thread du navigateur ne fait plus que naviguer et capturer page_source ;
+chaque capture passe par une file bornée à des threads qui archivent le
+HTML et en extraient les événements (extract_celcat_data, le parser de
+html_to_json) pendant que la semaine suivante se charge.
+
+La file bornée sert de contre-pression : si l'archivage ou le parsing
+prend du retard, le navigateur attend qu'une place se libère au lieu
+d'accumuler les pages en mémoire.
+
+Les événements sont produits directement au format final de html_to_json
+et le manifeste de conversion est mis à jour : relancer html_to_json sur
+les mêmes archives ne re-parse rien.
+
+Des threads suffisent : pendant le chargement d'une semaine, le thread du
+navigateur attend chromedriver (E/S), et lxml libère le GIL pendant le
+parsing.
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+
+from archive_store import week_filename
+from events import compact_events
+from html_to_json import DEFAULT_BACKEND, MANIFEST_FILENAME, ParseManifest, extract_celcat_data
+from metrics import metrics
+
+DEFAULT_PIPELINE_WORKERS = int(os.environ.get('SCRAPER_PIPELINE_WORKERS', '2'))
+DEFAULT_QUEUE_SIZE = int(os.environ.get('SCRAPER_PIPELINE_QUEUE', '4'))
+STAGES = ('capture', 'archive', 'parse')
+
+_STOP = object()
+
+
+class ScrapePipeline:
+    """File bornée de pages capturées, archivées et parsées par des threads."""
+
+    def __init__(self, scraper, workers=DEFAULT_PIPELINE_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, backend=None):
+        """
+        Args:
+            scraper: CelcatCompleteScraper (archivage par save_week_html)
+            workers: Threads d'archivage / parsing
+            queue_size: Pages en attente au maximum (contre-pression)
+            backend: Backend de parsing (défaut: $CELCAT_PARSER)
+        """
+        self.scraper = scraper
+        self.backend = backend or DEFAULT_BACKEND
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.threads = [
+            threading.Thread(target=self._consume, name=f"pipeline-{i + 1}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        self.lock = threading.Lock()
+        self.results = {}   # week_date -> (nom d'archive, empreinte, événements)
+        self.failed = []
+        self.stats = {stage: {'count': 0, 'seconds': 0.0} for stage in STAGES}
+        self.blocked = 0.0
+        self.max_depth = 0
+        self.started = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def _add(self, stage, seconds):
+        with self.lock:
+            self.stats[stage]['count'] += 1
+            self.stats[stage]['seconds'] += seconds
+
+    # --- Producteur (thread du navigateur) ---
+
+    def submit(self, week_date, html_content, capture_seconds=0.0):
+        """Envoie une page capturée ; bloque tant que la file est pleine."""
+        self._add('capture', capture_seconds)
+        started = time.perf_counter()
+        self.queue.put((week_date, html_content))
+        waited = time.perf_counter() - started
+        with self.lock:
+            self.blocked += waited
+            self.max_depth = max(self.max_depth, self.queue.qsize())
+        metrics.observe("pipeline_queue_depth", self.queue.qsize())
+        if waited > 0.01:
+            metrics.incr("pipeline_backpressure_ms", int(waited * 1000))
+
+    def capture(self, week_date):
+        """Capture page_source de la semaine affichée et l'envoie aux consommateurs."""
+        started = time.perf_counter()
+        html_content = self.scraper.driver.page_source
+        self.submit(week_date, html_content, time.perf_counter() - started)
+
+    # --- Consommateurs ---
+
+    def _consume(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._process(*item)
+            finally:
+                self.queue.task_done()
+
+    def _process(self, week_date, html_content):
+        label = week_date.strftime('%Y-%m-%d')
+        filename = week_filename(week_date)
+        try:
+            with metrics.span("pipeline", week=label):
+                started = time.perf_counter()
+                with metrics.span("archive"):
+                    if not self.scraper.save_week_html(week_date, html_content):
+                        # Sans archive, la semaine ne peut pas entrer dans le manifeste
+                        raise RuntimeError("archivage HTML impossible")
+                archived = time.perf_counter()
+                self._add('archive', archived - started)
+
+                with metrics.span("parse"):
+                    events = compact_events(extract_celcat_data(html_content, self.backend))
+                self._add('parse', time.perf_counter() - archived)
+        except Exception as e:
+            metrics.incr("parse_failures")
+            print(f"   ❌ [pipeline] Semaine du {week_date.strftime('%d/%m/%Y')} : {e}")
+            with self.lock:
+                self.failed.append(week_date)
+            self.scraper.forget_week(week_date)
+            return
+
+        digest = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+        metrics.observe("events_per_week", len(events))
+        print(f"   ⚙️ [pipeline] {filename} : {len(events)} événements extraits")
+        with self.lock:
+            self.results[week_date] = (filename, digest, events)
+
+    # --- Fin ---
+
+    def close(self):
+        """
+        Attend la fin des consommateurs et retourne les événements au format
+        de html_to_json (semaines dans l'ordre, puis tri stable par date et heure).
+        """
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
+
+        events = []
+        for week_date in sorted(self.results):
+            events.extend(self.results[week_date][2])
+        events.sort(key=lambda x: (x.get('date', ''), x.get('start_time', '')))
+        metrics.incr("weeks_failed", len(self.failed))
+        return events
+
+    def update_manifest(self):
+        """Enregistre les événements parsés dans le manifeste de html_to_json (archives ou magasin)."""
+        store = self.scraper.archive_store
+        root = store.root if store is not None else self.scraper.archive_dir
+        manifest = ParseManifest(os.path.join(root, MANIFEST_FILENAME), self.backend)
+        for filename, digest, events in self.results.values():
+            if store is not None:
+                manifest.store(filename, events, digest)
+            else:
+                manifest.store(os.path.join(root, filename), events)
+        manifest.save()
+        return manifest
+
+    def report(self):
+        """Débit de chaque étape (semaines par seconde de travail) et contre-pression."""
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        print(f"\n⚙️ Pipeline : {len(self.results)} semaine(s) en {elapsed:.1f}s "
+              f"({len(self.threads)} thread(s), file de {self.queue.maxsize})")
+        for stage in STAGES:
+            count = self.stats[stage]['count']
+            seconds = self.stats[stage]['seconds']
+            rate = f"{count / seconds:6.1f} sem/s" if seconds > 0 else "      -     "
+            print(f"   - {stage:<8} {count:3d} sem. {seconds:7.2f}s  {rate}")
+            metrics.observe(f"pipeline_seconds.{stage}", round(seconds, 4))
+        print(f"   ⏳ navigateur bloqué par la file pleine : {self.blocked:.2f}s (profondeur max {self.max_depth})")
@@ -5,13 +5,11 @@ Scrape 26 semaines (6 mois) d'emploi du temps
 Stocke les événements en JSON et archive le HTML brut hebdomadaire
 """
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import json
 import time
 from datetime import datetime, timedelta
@@ -22,6 +20,38 @@ import sys
 # Importer les fonctions du scraper original (si nécessaire pour deps externes)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from wait_engine import (
+    WaitEngine, login_form_present, login_form_gone, ajax_idle,
+    calendar_rendered, week_displayed, all_of, any_of, header_dates, covers_date
+)
+from celcat_api import CelcatDataFetcher
+from html_to_json import extract_celcat_data, make_week_soup
+from events import EventIndex, event_to_json
+from archive_store import ArchiveStore, week_filename
+from metrics import metrics
+from lean_driver import DEFAULT_DRIVER_MODE, DRIVER_MODES, create_driver, page_load_stats
+from session_cache import SessionCache, restore_storage
+from http_backend import BACKENDS, CelcatHttpClient
+from scrape_pipeline import DEFAULT_PIPELINE_WORKERS, ScrapePipeline
+from dom_extract import DEFAULT_EXTRACT_MODE, EXTRACT_MODES, extract_client_events
+from week_fingerprint import FingerprintManifest, default_fingerprints_path, week_fingerprint
+from scrape_checkpoint import DEFAULT_CHECKPOINT_DIR, ScrapeCheckpoint
+
+def contiguous_slices(week_dates, size):
+    """
+    Découpe des semaines triées en tranches d'au plus size semaines
+    consécutives : un travailleur charge la première par URL puis avance
+    avec le bouton suivant, une tranche ne peut donc pas sauter de semaine.
+    """
+    slices = []
+    for week_date in week_dates:
+        current = slices[-1] if slices else None
+        if current and len(current) < size and week_date - current[-1] == timedelta(weeks=1):
+            current.append(week_date)
+        else:
+            slices.append([week_date])
+    return slices
+
 class CelcatCompleteScraper:
     def __init__(self, login_url, username, password):
         """
@@ -36,36 +66,56 @@ class CelcatCompleteScraper:
         self.username = username
         self.password = password
         self.driver = None
-        self.all_events = []
+        self.all_events = EventIndex()
+        self.waits = WaitEngine()
+        self.driver_mode = DEFAULT_DRIVER_MODE
+        # "script" : événements lus dans le navigateur (dom_extract), repli sur le parser HTML
+        self.extract_mode = DEFAULT_EXTRACT_MODE
+        # ScrapePipeline : archivage et parsing délégués à des threads (--pipeline)
+        self.pipeline = None
+        # Nouvelles tentatives par semaine (scrape_full_semester)
+        self.week_retries = int(os.environ.get('SCRAPER_WEEK_RETRIES', '2'))
+        self.retry_backoff = float(os.environ.get('SCRAPER_RETRY_BACKOFF', '5'))
+        self.headless = True
+        self.session_cache = None
+        self.last_archived = False
+        # FingerprintManifest : semaines inchangées ignorées (--skip-unchanged)
+        self.fingerprints = None
+        self.fingerprint_dates = {}
+        self.weeks_skipped = 0
         
         # Configuration de l'archivage
         self.archive_dir = "archives_html"
+        # ARCHIVE_STORE=<dossier> : snapshots dédoublonnés et compressés au lieu de fichiers HTML
+        self.archive_store = None
         self._setup_archive_dir()
         
     def _setup_archive_dir(self):
-        """Crée le dossier d'archive s'il n'existe pas"""
+        """Crée le dossier d'archive (ou ouvre le magasin) s'il n'existe pas"""
+        store_dir = os.environ.get("ARCHIVE_STORE")
+        if store_dir:
+            # Une exécution = un run du magasin : html_to_json ne convertit que ses pages
+            self.archive_store = ArchiveStore(store_dir, run_id=datetime.now().isoformat(timespec='seconds'))
+            print(f"📦 Magasin d'archives prêt : {store_dir}")
+            return
         try:
             os.makedirs(self.archive_dir, exist_ok=True)
             print(f"📁 Dossier d'archive prêt : {self.archive_dir}")
         except Exception as e:
             print(f"⚠️ Impossible de créer le dossier d'archive : {e}")
 
-    def setup_driver(self, headless=True):
-        """Configure le navigateur Chrome"""
-        print("🔧 Configuration du navigateur...")
-        
-        options = webdriver.ChromeOptions()
-        
-        if headless:
-            options.add_argument('--headless')
-        
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_argument('--window-size=1920,1080')
+    def setup_driver(self, headless=True, mode=None):
+        """
+        Configure le navigateur Chrome.
+        mode : "full" (navigateur complet) ou "lean" (ressources lourdes bloquées),
+        par défaut $CELCAT_DRIVER.
+        """
+        self.driver_mode = mode or DEFAULT_DRIVER_MODE
+        self.headless = headless
+        print(f"🔧 Configuration du navigateur (mode {self.driver_mode})...")
         
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=options)
+        self.driver = create_driver(headless=headless, mode=self.driver_mode)
+        self.waits.attach(self.driver)
         
         print("✅ Navigateur prêt!")
         return self.driver
@@ -76,7 +126,7 @@ class CelcatCompleteScraper:
         
         try:
             self.driver.get(self.login_url)
-            time.sleep(8)
+            self.waits.wait("login_form", login_form_present, fallback_delay=8)
             
             # Recherche des champs de connexion
             try:
@@ -122,7 +172,7 @@ class CelcatCompleteScraper:
             else:
                 username_field.submit()
             
-            time.sleep(8)
+            self.waits.wait("login_submit", all_of(login_form_gone, ajax_idle), fallback_delay=8)
             
             print("✅ Connexion réussie!")
             return True
@@ -131,49 +181,125 @@ class CelcatCompleteScraper:
             print(f"❌ Erreur lors de la connexion: {e}")
             return False
     
+    def resume_session(self, cache):
+        """
+        Restaure la session chiffrée du cache et vérifie qu'elle est encore
+        acceptée (calendrier affiché plutôt que formulaire de connexion).
+        
+        Returns:
+            True si la session restaurée est valide (login() inutile)
+        """
+        session = cache.load() if cache else None
+        if not session:
+            return False
+        
+        print("\n🔑 Reprise de la session en cache...")
+        try:
+            self.restore_session(session['cookies'])
+            restore_storage(self.driver, session.get('storage'))
+            self.driver.get(self.login_url)
+            self.waits.wait("session_check", any_of(calendar_rendered, login_form_present),
+                            fallback_delay=0, timeout=10)
+            if login_form_present(self.driver) or not calendar_rendered(self.driver):
+                print("♻️ Session expirée côté CELCAT, nouvelle connexion")
+                cache.clear()
+                return False
+        except Exception as e:
+            print(f"⚠️ Reprise de session impossible: {e}")
+            return False
+        
+        print("✅ Session reprise sans connexion")
+        return True
+    
+    def open_session(self, session_cache=None):
+        """
+        Reprend la session en cache ou se connecte, attend le calendrier puis
+        resauvegarde la session (cookies éventuellement renouvelés par CELCAT).
+        
+        Returns:
+            True si le navigateur est authentifié
+        """
+        self.session_cache = session_cache
+        with metrics.span("login"):
+            resumed = self.resume_session(session_cache)
+            logged_in = resumed or self.login()
+        metrics.incr("session_resumed" if resumed else "session_login")
+        if not logged_in:
+            return False
+        
+        calendar_ready = self.waits.wait("calendar_ready", calendar_rendered, fallback_delay=5)
+        if session_cache and calendar_ready:
+            session_cache.save(self.driver)
+        return True
+    
+    def session_expired(self):
+        """True si CELCAT a renvoyé le formulaire de connexion (session expirée)."""
+        try:
+            return login_form_present(self.driver)
+        except Exception:
+            return False
+    
     def navigate_to_week(self, week_date):
-        """Navigate vers une semaine spécifique"""
+        """
+        Charge directement la semaine contenant week_date via le paramètre dt
+        de l'URL, puis vérifie que les en-têtes fc-day-header correspondent.
+        
+        Returns:
+            True si la semaine affichée est bien celle demandée
+        """
         print(f"\n📅 Navigation vers la semaine du {week_date.strftime('%d/%m/%Y')}...")
         
         try:
-            # Cliquer sur le sélecteur de date
-            date_picker = self.driver.find_element(By.CLASS_NAME, "fc-center")
-            date_picker.click()
-            time.sleep(2)
-            
-            # Chercher et cliquer sur la date
-            date_cells = self.driver.find_elements(By.CSS_SELECTOR, "td[data-date]")
-            
-            target_iso = week_date.strftime("%Y-%m-%d")
-            found = False
-            
-            for cell in date_cells:
-                cell_date = cell.get_attribute("data-date")
-                if cell_date == target_iso:
-                    cell.click()
-                    time.sleep(3)
-                    found = True
-                    break
-            
-            if not found:
-                # Fallback si la date n'est pas dans le mois affiché
-                print("   ⚠️ Date non visible directement, utilisation navigation bouton...")
+            with metrics.span("navigate", week=week_date.strftime('%Y-%m-%d'), mode="url",
+                              driver=self.driver_mode) as attrs:
+                self.driver.get(build_week_url(self.login_url, week_date))
+                self.waits.wait("week_load", week_displayed(week_date), fallback_delay=3)
+                self._record_page_load(attrs)
+                
+                dates = header_dates(self.driver)
+                if not covers_date(dates, week_date):
+                    # L'URL a pu ouvrir une autre vue (mois, jour) : repasser en semaine
+                    self.switch_to_week_view()
+                    dates = header_dates(self.driver)
+            if covers_date(dates, week_date):
+                return True
             
-            return True
+            shown = f"{min(dates)} → {max(dates)}" if dates else "aucune date"
+            print(f"   ❌ Semaine affichée inattendue ({shown})")
+            return False
             
         except Exception as e:
-            print(f"⚠️  Navigation manuelle nécessaire: {e}")
-            return True
+            print(f"   ❌ Navigation impossible: {e}")
+            return False
+    
+    def _record_page_load(self, attrs):
+        """Ajoute les temps de chargement de la page (Navigation Timing) au span courant."""
+        stats = page_load_stats(self.driver)
+        attrs.update(stats)
+        if stats.get('load_ms') is not None:
+            metrics.observe(f"page_load_ms.{self.driver_mode}", stats['load_ms'])
+        if stats.get('transfer_bytes') is not None:
+            metrics.incr("bytes_downloaded", stats['transfer_bytes'])
     
-    def save_week_html(self, week_date):
+    def save_week_html(self, week_date, html_content=None):
         """
         Sauvegarde le HTML brut de la semaine courante
+        (ou html_content, page déjà capturée par le pipeline)
         """
         try:
-            filename = f"week_{week_date.strftime('%Y-%m-%d')}.html"
+            filename = week_filename(week_date)
             filepath = os.path.join(self.archive_dir, filename)
             
-            html_content = self.driver.page_source
+            if html_content is None:
+                html_content = self.driver.page_source
+            metrics.incr("bytes_archived", len(html_content.encode("utf-8")))
+            
+            if self.archive_store is not None:
+                result = self.archive_store.put(filename, html_content)
+                metrics.incr("bytes_stored", result['new_bytes'])
+                state = "inchangé" if result['unchanged'] else f"+{result['new_bytes']} octets"
+                print(f"   📦 HTML archivé: {filename} ({state})")
+                return True
             
             with open(filepath, "w", encoding="utf-8") as f:
                 f.write(html_content)
@@ -189,23 +315,25 @@ class CelcatCompleteScraper:
         print(f"🔍 Extraction des événements de la semaine {week_date.strftime('%d/%m/%Y')}...")
         
         page_source = self.driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
+        # Backend choisi par CELCAT_PARSER ("lxml" = parsing restreint à la grille)
+        soup = make_week_soup(page_source)
         
-        events = []
+        events = EventIndex()
         
         # Extraire les dates de la semaine
         dates_map = self.extract_week_dates(soup)
         
         if not dates_map:
             print("❌ Impossible d'extraire les dates")
-            return events
+            return []
         
-        # Extraire les événements
-        content_skeleton = soup.find('div', class_='fc-content-skeleton')
+        # Extraire les événements : squelette de la grille horaire, explicitement (la grille
+        # "toute la journée" a aussi un fc-content-skeleton, placé avant dans la page)
+        content_skeleton = soup.select_one('.fc-time-grid .fc-content-skeleton')
         
         if not content_skeleton:
             print("⚠️  Aucun événement trouvé pour cette semaine")
-            return events
+            return []
         
         event_containers = content_skeleton.find_all('a', class_='fc-time-grid-event')
         
@@ -214,13 +342,15 @@ class CelcatCompleteScraper:
         for event_tag in event_containers:
             try:
                 event = self.parse_event(event_tag, dates_map)
-                if event and event not in events:
-                    events.append(event)
+                if event:
+                    events.add(event)
             except Exception as e:
+                metrics.incr("parse_failures")
                 print(f"   ⚠️  Erreur parsing événement: {e}")
                 continue
         
-        return events
+        metrics.observe("events_per_week", len(events))
+        return list(events)
     
     def extract_week_dates(self, soup):
         """Extrait les dates des colonnes de la semaine"""
@@ -318,58 +448,510 @@ class CelcatCompleteScraper:
         
         return event
     
-    def scrape_full_semester(self, nb_weeks=26):
+    def skip_unchanged_week(self, week_date):
         """
-        Scrape nb_weeks semaines à partir d'aujourd'hui et archive le HTML
+        Compare l'empreinte de la grille affichée avec celle de l'exécution
+        précédente. Retourne True si la semaine est inchangée (ni archivage,
+        ni extraction, ni fusion).
+        """
+        if self.fingerprints is None:
+            return False
+        try:
+            with metrics.span("fingerprint", week=week_date.strftime('%Y-%m-%d')):
+                dates, fingerprint = week_fingerprint(self.driver)
+        except Exception as e:
+            print(f"   ⚠️ Empreinte impossible: {e}")
+            return False
+        if fingerprint is None:
+            return False
+        self.fingerprint_dates[week_date] = dates
+        if self.fingerprints.check(dates, fingerprint):
+            self.weeks_skipped += 1
+            metrics.incr("weeks_skipped")
+            print(f"   ⏭️ Semaine inchangée depuis la dernière exécution, ignorée")
+            return True
+        return False
+    
+    def forget_week(self, week_date):
+        """Retire l'empreinte d'une semaine en échec pour qu'elle soit refaite la prochaine fois."""
+        if self.fingerprints is not None:
+            self.fingerprints.discard(self.fingerprint_dates.pop(week_date, None))
+    
+    def print_skipped_summary(self):
+        """Nombre de semaines ignorées car identiques à la dernière exécution."""
+        if self.fingerprints is not None:
+            print(f"⏭️ {self.weeks_skipped} semaine(s) inchangée(s) ignorée(s)")
+    
+    def extract_week_events_script(self, week_date, html_content):
+        """
+        Extrait les événements dans le navigateur (un seul execute_script,
+        format html_to_json). Repli sur extract_celcat_data(html_content)
+        si le script échoue ou ne trouve pas la grille.
+        """
+        print(f"🔍 Extraction des événements de la semaine {week_date.strftime('%d/%m/%Y')} (script)...")
+        try:
+            week_events = extract_client_events(self.driver)
+        except Exception as e:
+            print(f"   ⚠️ Extraction par script impossible: {e}")
+            week_events = None
+        
+        if week_events is None:
+            metrics.incr("script_extract_fallbacks")
+            print("   ↩️ Repli sur le parser HTML")
+            week_events = extract_celcat_data(html_content)
+        
+        events = EventIndex(week_events)
+        print(f"   📌 {len(events)} événements trouvés")
+        metrics.observe("events_per_week", len(events))
+        return list(events)
+    
+    def scrape_week(self, week_date):
+        """Archive le HTML de la semaine affichée puis en extrait les événements"""
+        with metrics.span("week", week=week_date.strftime('%Y-%m-%d')):
+            if self.extract_mode == 'script':
+                # page_source n'est transféré qu'une fois, pour l'archive (et le repli)
+                html_content = self.driver.page_source
+                with metrics.span("archive"):
+                    self.last_archived = self.save_week_html(week_date, html_content)
+                with metrics.span("extract", mode="script"):
+                    return self.extract_week_events_script(week_date, html_content)
+            
+            # --- NOUVEAUTÉ : Archivage HTML ---
+            with metrics.span("archive"):
+                self.last_archived = self.save_week_html(week_date)
+            # ----------------------------------
+            
+            # Extraction
+            with metrics.span("extract"):
+                return self.extract_week_events(week_date)
+    
+    def switch_to_week_view(self):
+        """Passe le calendrier en vue hebdomadaire (agendaWeek)"""
+        try:
+            week_button = self.driver.find_element(By.CSS_SELECTOR, "button.fc-agendaWeek-button")
+            week_button.click()
+            self.waits.wait("week_view", calendar_rendered, fallback_delay=3)
+        except Exception:
+            pass
+    
+    def restore_session(self, cookies):
+        """Injecte les cookies d'une session authentifiée dans ce navigateur"""
+        # Selenium n'accepte les cookies que pour le domaine de la page courante
+        self.driver.get(self.login_url)
+        for cookie in cookies:
+            cookie = {k: v for k, v in cookie.items() if k in ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry')}
+            try:
+                self.driver.add_cookie(cookie)
+            except Exception as e:
+                print(f"   ⚠️ Cookie {cookie.get('name')} ignoré: {e}")
+    
+    def _scrape_slice(self, worker_id, cookies, week_dates, results, headless, checkpoint=None):
+        """
+        Travailleur : ouvre son propre Chrome avec les cookies de la session,
+        charge la première semaine de sa tranche par URL puis avance semaine par semaine.
+        Les événements de chaque semaine terminée sont rangés dans results[week_date].
+        """
+        worker = CelcatCompleteScraper(self.login_url, self.username, self.password)
+        worker.archive_dir = self.archive_dir
+        # Un seul ArchiveStore pour tous les travailleurs : index.json est réécrit
+        # sous son verrou, aucune semaine d'un autre travailleur n'est perdue
+        worker.archive_store = self.archive_store
+        worker.extract_mode = self.extract_mode
+        worker.fingerprints = self.fingerprints
+        try:
+            with metrics.span("worker_setup", worker=worker_id):
+                worker.setup_driver(headless=headless, mode=self.driver_mode)
+                worker.restore_session(cookies)
+            if not worker.navigate_to_week(week_dates[0]):
+                raise RuntimeError(f"semaine du {week_dates[0].strftime('%d/%m/%Y')} inaccessible")
+            
+            for idx, week_date in enumerate(week_dates):
+                if idx > 0:
+                    with metrics.span("navigate", week=week_date.strftime('%Y-%m-%d'), mode="next"):
+                        worker.driver.find_element(By.CLASS_NAME, "fc-next-button").click()
+                        worker.waits.wait("week_load", week_displayed(week_date), fallback_delay=3)
+                print(f"   👷 [worker {worker_id}] Semaine du {week_date.strftime('%d/%m/%Y')}")
+                if worker.skip_unchanged_week(week_date):
+                    results[week_date] = []
+                    if checkpoint is not None:
+                        checkpoint.record(week_date, [], False, 1, status="skipped",
+                                          dates=worker.fingerprint_dates.get(week_date))
+                    continue
+                try:
+                    results[week_date] = worker.scrape_week(week_date)
+                except Exception:
+                    worker.forget_week(week_date)
+                    raise
+                if checkpoint is not None:
+                    checkpoint.record(week_date, results[week_date], worker.last_archived, 1)
+        finally:
+            self.weeks_skipped += worker.weeks_skipped
+            self.waits.timings.extend(worker.waits.timings)
+            worker.close()
+    
+    def scrape_parallel(self, nb_weeks=26, workers=2, max_retries=2, headless=True, checkpoint=None, resume=False):
+        """
+        Scrape nb_weeks semaines avec un pool de navigateurs authentifiés.
+        
+        La session de ce scraper (déjà connecté) est copiée dans chaque
+        travailleur ; chacun traite une tranche contiguë de semaines. En cas
+        d'échec, seules les semaines non terminées de la tranche concernée
+        sont relancées. Les événements sont fusionnés dans l'ordre des semaines.
+        Avec un ScrapeCheckpoint, chaque semaine terminée par un travailleur est
+        enregistrée ; resume=True ne relance que les semaines non terminées.
+        
+        Returns:
+            Liste des dates de semaines perdues après toutes les tentatives
         """
         print(f"\n{'='*70}")
-        print(f"🎓 SCRAPING COMPLET - {nb_weeks} SEMAINES + ARCHIVAGE")
+        print(f"🎓 SCRAPING PARALLÈLE - {nb_weeks} SEMAINES / {workers} NAVIGATEURS")
         print(f"{'='*70}\n")
         
-        start_date = datetime.now()
+        start_date = self._begin_checkpoint(checkpoint, nb_weeks, resume)
+        week_dates = [start_date + timedelta(weeks=i) for i in range(nb_weeks)]
         
-        for week_num in range(nb_weeks):
+        results = {}
+        for week_date in week_dates:
+            saved_events = self._restore_checkpoint_week(checkpoint, week_date)
+            if saved_events is not None:
+                results[week_date] = saved_events
+        if results:
+            print(f"♻️ {len(results)} semaine(s) reprise(s) du point de reprise")
+        
+        todo = [d for d in week_dates if d not in results]
+        workers = max(1, min(workers, len(todo) or 1))
+        size = -(-len(todo) // workers) if todo else 1
+        pending = contiguous_slices(todo, size)
+        
+        cookies = self.driver.get_cookies()
+        
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            if attempt > 0:
+                print(f"\n🔁 Nouvelle tentative ({attempt}/{max_retries}) pour {len(pending)} tranche(s)")
+            
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = [
+                    (week_slice, executor.submit(self._scrape_slice, i + 1, cookies, week_slice, results,
+                                                 headless, checkpoint))
+                    for i, week_slice in enumerate(pending)
+                ]
+            
+            failed = []
+            for week_slice, future in futures:
+                error = future.exception()
+                if error is None:
+                    continue
+                remaining = [d for d in week_slice if d not in results]
+                print(f"❌ Échec d'un travailleur ({error}), {len(remaining)} semaine(s) à refaire")
+                if remaining:
+                    failed.append(remaining)
+            pending = failed
+        
+        lost = [d for week_slice in pending for d in week_slice]
+        for week_date in lost:
+            metrics.incr("weeks_failed")
+            if checkpoint is not None:
+                checkpoint.record_failure(week_date, "travailleur en échec", max_retries + 1)
+            print(f"❌ Semaine du {week_date.strftime('%d/%m/%Y')} perdue après {max_retries} tentatives")
+        
+        # Fusion déterministe : ordre chronologique des semaines
+        for week_date in week_dates:
+            for event in results.get(week_date, []):
+                self.all_events.add(event)
+        
+        print(f"\n{'='*70}")
+        print(f"✅ SCRAPING PARALLÈLE TERMINÉ")
+        print(f"📊 {len(results)}/{nb_weeks} semaines, {len(self.all_events)} événements")
+        self.print_skipped_summary()
+        self.waits.print_summary()
+        print(f"{'='*70}\n")
+        return lost
+    
+    def scrape_weeks(self, week_dates):
+        """
+        Scrape un ensemble arbitraire de semaines en chargeant chacune
+        directement par URL, sans parcourir les semaines intermédiaires.
+        
+        Returns:
+            Liste des dates de semaines qui n'ont pas pu être scrapées
+        """
+        week_dates = sorted(week_dates)
+        print(f"\n{'='*70}")
+        print(f"🎯 SCRAPING CIBLÉ - {len(week_dates)} SEMAINE(S)")
+        print(f"{'='*70}\n")
+        
+        failed = []
+        for week_date in week_dates:
+            if not self.navigate_to_week(week_date):
+                failed.append(week_date)
+                continue
             try:
-                # Calculer la date de la semaine
-                week_date = start_date + timedelta(weeks=week_num)
-                
-                print(f"\n📅 Semaine {week_num + 1}/{nb_weeks} - {week_date.strftime('%d/%m/%Y')}")
-                print("-" * 50)
+                if self.skip_unchanged_week(week_date):
+                    continue
+                if self.pipeline is not None:
+                    self.pipeline.capture(week_date)
+                    continue
+                for event in self.scrape_week(week_date):
+                    self.all_events.add(event)
+            except Exception as e:
+                print(f"❌ Erreur semaine du {week_date.strftime('%d/%m/%Y')}: {e}")
+                self.forget_week(week_date)
+                failed.append(week_date)
+        metrics.incr("weeks_failed", len(failed))
+        
+        print(f"\n✅ {len(week_dates) - len(failed)}/{len(week_dates)} semaines, {len(self.all_events)} événements")
+        self.print_skipped_summary()
+        self.waits.print_summary()
+        return failed
+    
+    def recover(self):
+        """
+        Remet le navigateur en état après un échec : Chrome neuf s'il ne
+        répond plus, reconnexion si CELCAT a renvoyé le formulaire de connexion.
+        
+        Returns:
+            True si le navigateur est de nouveau authentifié
+        """
+        try:
+            self.driver.current_url
+        except Exception as e:
+            print(f"   ⚠️ Navigateur indisponible ({e}), redémarrage...")
+            metrics.incr("browser_restarts")
+            try:
+                self.driver.quit()
+            except Exception:
+                pass
+            with metrics.span("setup_driver"):
+                self.setup_driver(headless=self.headless, mode=self.driver_mode)
+            return self.open_session(self.session_cache)
+        
+        if self.session_expired():
+            print("   ♻️ Session CELCAT expirée, reconnexion...")
+            metrics.incr("relogins")
+            if self.session_cache:
+                self.session_cache.clear()
+            return self.open_session(self.session_cache)
+        return True
+    
+    def _scrape_week_attempts(self, week_date, navigation):
+        """
+        Charge et scrape une semaine avec nouvelles tentatives : attente
+        exponentielle (SCRAPER_RETRY_BACKOFF, doublée à chaque essai) et
+        recover() avant chaque nouvel essai, qui recharge la semaine par URL.
+        
+        Args:
+            navigation: "current" (semaine déjà affichée), "next" (bouton suivant) ou "url"
+        
+        Returns:
+            (événements, archivée, statut, tentatives) ; statut "done",
+            "skipped" (inchangée) ou "captured" (confiée au pipeline)
+        """
+        delay = self.retry_backoff
+        error = None
+        for attempt in range(self.week_retries + 1):
+            if attempt > 0:
+                print(f"   🔁 Nouvelle tentative {attempt}/{self.week_retries} dans {delay:.0f}s...")
+                metrics.incr("week_retries")
+                self.waits.sleep("retry_backoff", delay)
+                delay *= 2
+                navigation = "url"
+            try:
+                if attempt > 0 and not self.recover():
+                    raise RuntimeError("reconnexion à CELCAT impossible")
                 
-                # Navigation
-                if week_num > 0:
-                    try:
+                if navigation == "next":
+                    with metrics.span("navigate", week=week_date.strftime('%Y-%m-%d'), mode="next"):
                         next_button = self.driver.find_element(By.CLASS_NAME, "fc-next-button")
                         next_button.click()
-                        time.sleep(3) # Attente chargement AJAX
-                    except Exception as e:
-                        print(f"⚠️  Impossible de naviguer: {e}")
-                
-                # --- NOUVEAUTÉ : Archivage HTML ---
-                self.save_week_html(week_date)
-                # ----------------------------------
-                
-                # Extraction
-                week_events = self.extract_week_events(week_date)
-                
-                for event in week_events:
-                    if event not in self.all_events:
-                        self.all_events.append(event)
-                
-                print(f"✅ {len(week_events)} événements extraits")
-                print(f"📊 Total actuel: {len(self.all_events)} événements")
-                
-                time.sleep(2)
+                        # Attente chargement AJAX de la semaine demandée
+                        self.waits.wait("week_load", week_displayed(week_date), fallback_delay=3)
+                elif navigation == "current" and not covers_date(header_dates(self.driver), week_date):
+                    # Page d'accueil sur une autre semaine (run repris d'un jour précédent)
+                    print("   ↪️ Semaine affichée différente, chargement par URL")
+                    if not self.navigate_to_week(week_date):
+                        raise RuntimeError("semaine affichée inattendue")
+                elif navigation == "url" and not self.navigate_to_week(week_date):
+                    raise RuntimeError("semaine affichée inattendue")
                 
+                if self.skip_unchanged_week(week_date):
+                    return [], False, "skipped", attempt + 1
+                if self.pipeline is not None:
+                    # Archivage et extraction en arrière-plan pendant le chargement de la suivante
+                    self.pipeline.capture(week_date)
+                    print("📸 Page capturée")
+                    return [], True, "captured", attempt + 1
+                week_events = self.scrape_week(week_date)
+                return week_events, self.last_archived, "done", attempt + 1
+            except Exception as e:
+                self.forget_week(week_date)
+                error = str(e) or type(e).__name__
+                print(f"❌ Erreur semaine du {week_date.strftime('%d/%m/%Y')} (essai {attempt + 1}): {error}")
+        raise RuntimeError(error)
+    
+    def _begin_checkpoint(self, checkpoint, nb_weeks, resume):
+        """
+        Démarre (ou reprend) le point de reprise et retourne la date de début.
+        Le magasin d'archives prend l'identifiant du run du point de reprise :
+        après --resume, les pages des semaines reprises restent dans le run converti.
+        """
+        start_date = datetime.now()
+        if checkpoint is None:
+            return start_date
+        start_date = checkpoint.begin(start_date, nb_weeks, resume=resume)
+        if self.archive_store is not None:
+            self.archive_store.run_id = checkpoint.state['started_at']
+        return start_date
+    
+    def _restore_checkpoint_week(self, checkpoint, week_date):
+        """
+        Événements d'une semaine terminée d'après le point de reprise, ou None
+        si elle est à scraper. Une semaine ignorée (inchangée) est rendue au
+        manifeste d'empreintes ; sans manifeste, la fusion ne saurait pas
+        qu'elle est à conserver : elle est scrapée à nouveau.
+        """
+        saved = checkpoint.week(week_date) if checkpoint is not None else None
+        if saved is None or saved['status'] == 'failed':
+            return None
+        if saved['status'] == 'skipped':
+            if self.fingerprints is None:
+                return None
+            self.fingerprints.restore_skipped(saved.get('dates'))
+            self.weeks_skipped += 1
+        return checkpoint.load_events(week_date)
+    
+    def scrape_full_semester(self, nb_weeks=26, checkpoint=None, resume=False):
+        """
+        Scrape nb_weeks semaines à partir d'aujourd'hui et archive le HTML.
+        
+        Avec un ScrapeCheckpoint, chaque semaine terminée est enregistrée au
+        fil de l'eau ; resume=True reprend le run interrompu (semaines déjà
+        terminées relues depuis le point de reprise).
+        
+        Returns:
+            Liste des dates de semaines perdues après toutes les tentatives
+        """
+        print(f"\n{'='*70}")
+        print(f"🎓 SCRAPING COMPLET - {nb_weeks} SEMAINES + ARCHIVAGE")
+        print(f"{'='*70}\n")
+        
+        start_date = self._begin_checkpoint(checkpoint, nb_weeks, resume)
+        
+        failed = []
+        resumed = 0
+        # La première semaine est celle affichée ; après une reprise ou un échec, chargement par URL
+        navigation = "current"
+        for week_num in range(nb_weeks):
+            # Calculer la date de la semaine
+            week_date = start_date + timedelta(weeks=week_num)
+            
+            print(f"\n📅 Semaine {week_num + 1}/{nb_weeks} - {week_date.strftime('%d/%m/%Y')}")
+            print("-" * 50)
+            
+            saved_events = self._restore_checkpoint_week(checkpoint, week_date)
+            if saved_events is not None:
+                for event in saved_events:
+                    self.all_events.add(event)
+                resumed += 1
+                print("♻️ Semaine reprise du point de reprise")
+                navigation = "url"
+                continue
+            
+            try:
+                week_events, archived, status, attempts = self._scrape_week_attempts(week_date, navigation)
             except Exception as e:
-                print(f"❌ Erreur semaine {week_num + 1}: {e}")
+                metrics.incr("weeks_failed")
+                failed.append(week_date)
+                if checkpoint is not None:
+                    checkpoint.record_failure(week_date, str(e), self.week_retries + 1)
+                print(f"❌ Semaine {week_num + 1} perdue après {self.week_retries + 1} essai(s)")
+                navigation = "url"
                 continue
+            navigation = "next"
+            
+            for event in week_events:
+                self.all_events.add(event)
+            if checkpoint is not None and status != "captured":
+                checkpoint.record(week_date, week_events, archived, attempts, status=status,
+                                  dates=self.fingerprint_dates.get(week_date) if status == "skipped" else None)
+            
+            if status == "done":
+                print(f"✅ {len(week_events)} événements extraits")
+                print(f"📊 Total actuel: {len(self.all_events)} événements")
+            
+            self.waits.pause("week_pause", 2)
         
         print(f"\n{'='*70}")
         print(f"✅ SCRAPING TERMINÉ")
         print(f"📊 Total final: {len(self.all_events)} événements")
+        if resumed:
+            print(f"♻️ {resumed} semaine(s) reprise(s) du point de reprise")
+        if failed:
+            print(f"❌ {len(failed)} semaine(s) perdue(s) : " + ", ".join(d.strftime('%d/%m/%Y') for d in failed))
         print(f"📁 Archives HTML disponibles dans : {self.archive_dir}/")
+        self.print_skipped_summary()
+        self.waits.print_summary()
+        print(f"{'='*70}\n")
+        return failed
+    
+    def scrape_calendar_data(self, nb_weeks=26):
+        """
+        Récupère nb_weeks semaines directement depuis l'endpoint GetCalendarData
+        (sans rendu FullCalendar ni parsing HTML), avec les cookies de la session.
+        """
+        print(f"\n{'='*70}")
+        print(f"🌐 INGESTION DIRECTE CELCAT - {nb_weeks} SEMAINES")
+        print(f"{'='*70}\n")
+        
+        calendar_url = self.driver.current_url if 'fid' in self.driver.current_url else self.login_url
+        fetcher = CelcatDataFetcher.from_driver(self.driver, calendar_url)
+        
+        started = time.perf_counter()
+        events = fetcher.fetch_events(datetime.now(), nb_weeks)
+        
+        for event in events:
+            self.all_events.add(event)
+        
+        print(f"✅ {len(self.all_events)} événements récupérés en {time.perf_counter() - started:.1f}s")
+    
+    def scrape_http(self, nb_weeks=26, week_dates=None, session_cache=None):
+        """
+        Backend sans navigateur : connexion par POST du formulaire puis
+        récupération des données GetCalendarData sur une session HTTP persistante.
+        
+        Returns:
+            True si la connexion et la récupération ont réussi
+        """
+        print(f"\n{'='*70}")
+        print(f"🌐 SCRAPING HTTP (SANS NAVIGATEUR)")
         print(f"{'='*70}\n")
+        
+        client = CelcatHttpClient(self.login_url, self.username, self.password)
+        try:
+            session = session_cache.load() if session_cache else None
+            if session:
+                # Cookies du cache : login() ne reposte le formulaire que s'ils sont refusés
+                client.restore_cookies(session['cookies'])
+            with metrics.span("login", backend="http"):
+                if not client.login():
+                    return False
+            if session_cache:
+                session_cache.save(client)
+            
+            fetcher = client.data_fetcher()
+            started = time.perf_counter()
+            with metrics.span("fetch_calendar_data"):
+                if week_dates:
+                    for week_date in sorted(week_dates):
+                        self.all_events.extend(fetcher.fetch_events(week_date, 1))
+                else:
+                    self.all_events.extend(fetcher.fetch_events(datetime.now(), nb_weeks))
+            
+            print(f"✅ {len(self.all_events)} événements récupérés en {time.perf_counter() - started:.1f}s")
+            return True
+        finally:
+            client.close()
     
     def save_events(self, filename='emploi_du_temps_complet.json'):
         """Sauvegarde tous les événements dans un fichier JSON"""
@@ -377,7 +959,7 @@ class CelcatCompleteScraper:
             print("⚠️  Aucun événement à sauvegarder")
             return
         
-        self.all_events.sort(key=lambda x: (x['date'], x['start_time']))
+        events = sorted(self.all_events, key=lambda x: (x['date'], x['start_time']))
         
         output = {
             'metadata': {
@@ -385,12 +967,13 @@ class CelcatCompleteScraper:
                 'total_events': len(self.all_events),
                 'archive_dir': self.archive_dir
             },
-            'events': self.all_events
+            'events': events
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        with metrics.span("save_events"), open(filename, 'w', encoding='utf-8') as f:
+            json.dump(output, f, indent=2, ensure_ascii=False, default=event_to_json)
         
+        metrics.incr("events", len(events))
         print(f"✅ JSON sauvegardé dans {filename}")
     
     def close(self):
@@ -398,21 +981,18 @@ class CelcatCompleteScraper:
         if self.driver:
             self.driver.quit()
             print("🔒 Navigateur fermé")
-def update_celcat_url_with_today(url):
+def build_week_url(url, week_date):
     """
-    Remplace ou ajoute le paramètre dt=YYYY-MM-DD avec la date du jour
+    Remplace ou ajoute le paramètre dt=YYYY-MM-DD avec la date donnée
     """
-    today = datetime.now().strftime("%Y-%m-%d")
-
     parsed = urlparse(url)
     query = parse_qs(parsed.query)
 
-    # Forcer la date du jour
-    query["dt"] = [today]
+    query["dt"] = [week_date.strftime("%Y-%m-%d")]
 
     new_query = urlencode(query, doseq=True)
 
-    updated_url = urlunparse((
+    return urlunparse((
         parsed.scheme,
         parsed.netloc,
         parsed.path,
@@ -421,12 +1001,70 @@ def update_celcat_url_with_today(url):
         parsed.fragment
     ))
 
-    print(f"📅 URL mise à jour avec la date du jour : {today}")
+
+def update_celcat_url_with_today(url):
+    """
+    Remplace ou ajoute le paramètre dt=YYYY-MM-DD avec la date du jour
+    """
+    today = datetime.now()
+    updated_url = build_week_url(url, today)
+
+    print(f"📅 URL mise à jour avec la date du jour : {today.strftime('%Y-%m-%d')}")
     return updated_url
 
 
 def main():
     """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Scrape l'emploi du temps CELCAT et archive le HTML.")
+    parser.add_argument(
+        '--workers', type=int, default=int(os.environ.get('SCRAPER_WORKERS', '1')),
+        help="Nombre de navigateurs en parallèle (défaut: $SCRAPER_WORKERS ou 1)"
+    )
+    parser.add_argument(
+        '--dates', default=os.environ.get('SCRAPE_DATES', ''),
+        help="Semaines précises à scraper, ex: 2025-03-03,2025-04-14 (défaut: $SCRAPE_DATES)"
+    )
+    parser.add_argument(
+        '--driver', choices=DRIVER_MODES, default=DEFAULT_DRIVER_MODE,
+        help="Navigateur complet ou allégé (ressources lourdes bloquées) (défaut: $CELCAT_DRIVER ou full)"
+    )
+    parser.add_argument(
+        '--backend', choices=BACKENDS, default=os.environ.get('CELCAT_BACKEND', 'browser'),
+        help="browser : Chrome + Selenium ; http : client HTTP sans navigateur (défaut: $CELCAT_BACKEND ou browser)"
+    )
+    parser.add_argument(
+        '--extract', choices=EXTRACT_MODES, default=DEFAULT_EXTRACT_MODE,
+        help="html : page_source + parser ; script : événements lus dans le navigateur, "
+             "au format de html_to_json (défaut: $CELCAT_EXTRACT ou html)"
+    )
+    parser.add_argument(
+        '--skip-unchanged', action='store_true', default=os.environ.get('SCRAPER_SKIP_UNCHANGED', '') == '1',
+        help="Ignorer les semaines dont la grille n'a pas changé depuis la dernière exécution "
+             "(empreintes dans $WEEK_FINGERPRINTS ou <archives>/fingerprints.json) (défaut: $SCRAPER_SKIP_UNCHANGED=1)"
+    )
+    parser.add_argument(
+        '--resume', action='store_true', default=os.environ.get('SCRAPER_RESUME', '') == '1',
+        help="Reprendre le scraping semestriel interrompu depuis son point de reprise (défaut: $SCRAPER_RESUME=1)"
+    )
+    parser.add_argument(
+        '--checkpoint-dir', default=DEFAULT_CHECKPOINT_DIR,
+        help=f"Dossier du point de reprise, vide pour désactiver (défaut: $SCRAPER_CHECKPOINT_DIR ou {DEFAULT_CHECKPOINT_DIR})"
+    )
+    parser.add_argument(
+        '--pipeline', action='store_true', default=os.environ.get('SCRAPER_PIPELINE', '') == '1',
+        help="Archivage et extraction dans des threads pendant la navigation (défaut: $SCRAPER_PIPELINE=1)"
+    )
+    parser.add_argument(
+        '--pipeline-workers', type=int, default=DEFAULT_PIPELINE_WORKERS,
+        help=f"Threads d'archivage / parsing du pipeline (défaut: $SCRAPER_PIPELINE_WORKERS ou {DEFAULT_PIPELINE_WORKERS})"
+    )
+    parser.add_argument(
+        '--events-output', default='emploi_du_temps_complet.json',
+        help="Événements extraits par le pipeline, au format de html_to_json (défaut: emploi_du_temps_complet.json)"
+    )
+    args = parser.parse_args()
+    target_weeks = [datetime.strptime(d.strip(), "%Y-%m-%d") for d in args.dates.split(',') if d.strip()]
+    
     print("""
     ╔══════════════════════════════════════════════════════════╗
     ║                                                          ║
@@ -450,28 +1088,87 @@ def main():
     PASSWORD = config.get("password", "").strip()
     
     NB_WEEKS = int(os.environ.get('NB_WEEKS', '26'))
+    # "dom" : rendu FullCalendar + archivage HTML ; "api" : endpoint GetCalendarData
+    SOURCE = os.environ.get('CELCAT_SOURCE', 'dom').strip().lower()
     
+    metrics.start("scraper_complet", backend=args.backend, source=SOURCE, driver=args.driver, extract=args.extract,
+                  nb_weeks=NB_WEEKS, workers=args.workers,
+                  dates=[d.strftime('%Y-%m-%d') for d in target_weeks])
     scraper = CelcatCompleteScraper(LOGIN_URL, USERNAME, PASSWORD)
+    scraper.extract_mode = args.extract
+    if args.skip_unchanged:
+        scraper.fingerprints = FingerprintManifest(default_fingerprints_path())
     
     try:
-        scraper.setup_driver(headless=True)  # HEADLESS pour GitHub Actions
+        session_cache = SessionCache.from_env(USERNAME, PASSWORD, RAW_LOGIN_URL)
+        
+        if args.backend == 'http':
+            if scraper.scrape_http(nb_weeks=NB_WEEKS, week_dates=target_weeks, session_cache=session_cache):
+                scraper.save_events('emploi_du_temps_complet.json')
+            else:
+                print("\n❌ Échec de la connexion")
+            return
+        
+        with metrics.span("setup_driver"):
+            scraper.setup_driver(headless=True, mode=args.driver)  # HEADLESS pour GitHub Actions
         
-        if not scraper.login():
+        if not scraper.open_session(session_cache):
             print("\n❌ Échec de la connexion")
             return
         
-        time.sleep(5)
+        if SOURCE == 'api':
+            try:
+                with metrics.span("fetch_calendar_data"):
+                    scraper.scrape_calendar_data(nb_weeks=NB_WEEKS)
+                scraper.save_events('emploi_du_temps_complet.json')
+                return
+            except Exception as e:
+                print(f"⚠️ Ingestion directe impossible ({e}), repli sur le scraping du DOM")
         
         print("\n🔄 Passage en vue hebdomadaire...")
-        try:
-            week_button = scraper.driver.find_element(By.CSS_SELECTOR, "button.fc-agendaWeek-button")
-            week_button.click()
-            time.sleep(3)
-        except Exception:
-            pass
+        scraper.switch_to_week_view()
+        
+        # Le pipeline s'applique au navigateur unique (les workers ont chacun leur navigateur)
+        if args.pipeline and (target_weeks or args.workers <= 1):
+            scraper.pipeline = ScrapePipeline(scraper, workers=args.pipeline_workers).start()
         
-        scraper.scrape_full_semester(nb_weeks=NB_WEEKS)
-        scraper.save_events('emploi_du_temps_complet.json')
+        # Point de reprise du scraping semestriel, séquentiel ou parallèle (les événements du pipeline n'y passent pas)
+        checkpoint = None
+        if args.checkpoint_dir and not target_weeks and scraper.pipeline is None:
+            checkpoint = ScrapeCheckpoint(args.checkpoint_dir)
+        
+        failed = []
+        with metrics.span("scrape"):
+            if target_weeks:
+                scraper.scrape_weeks(target_weeks)
+            elif args.workers > 1:
+                failed = scraper.scrape_parallel(nb_weeks=NB_WEEKS, workers=args.workers,
+                                                 checkpoint=checkpoint, resume=args.resume)
+            else:
+                failed = scraper.scrape_full_semester(nb_weeks=NB_WEEKS, checkpoint=checkpoint, resume=args.resume)
+        
+        if scraper.pipeline is not None:
+            pipeline, scraper.pipeline = scraper.pipeline, None
+            with metrics.span("pipeline_drain"):
+                events = pipeline.close()
+            pipeline.update_manifest()
+            pipeline.report()
+            with open(args.events_output, 'w', encoding='utf-8') as f:
+                json.dump(events, f, indent=4, ensure_ascii=False, default=event_to_json)
+            metrics.incr("events", len(events))
+            print(f"\n💾 {len(events)} événements sauvegardés dans '{args.events_output}' (manifeste de html_to_json à jour)")
+        else:
+            scraper.save_events('emploi_du_temps_complet.json')
+        
+        # Empreintes enregistrées seulement si les semaines ont bien été sauvegardées
+        if scraper.fingerprints is not None:
+            scraper.fingerprints.save()
+        
+        if checkpoint is not None:
+            if failed:
+                print(f"💾 Point de reprise conservé dans '{args.checkpoint_dir}' : relancer avec --resume")
+            else:
+                checkpoint.clear()
         
     except Exception as e:
         print(f"\n❌ Erreur: {e}")
@@ -482,6 +1179,7 @@ def main():
         # Input supprimé pour GitHub Actions
         # input("\n⏸️  Appuyez sur Entrée pour fermer...")
         scraper.close()
+        metrics.finish()
 
 if __name__ == "__main__":
     main()
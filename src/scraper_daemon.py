@@ -0,0 +1,511 @@
+"""
+DÉMON DE SCRAPING CELCAT
+========================
+Garde un navigateur Chrome ouvert et authentifié entre deux scrapings :
+le démarrage de Chrome et login() ne sont payés qu'une fois, ce qui permet
+de surveiller l'emploi du temps toutes les 15 minutes.
+
+Le démon écoute sur une adresse HTTP locale (127.0.0.1 par défaut) et
+accepte des jobs "semaines X..Y". Les semaines sont mises en file une par
+une : une semaine déjà en attente ou en cours de scraping est partagée
+entre les jobs qui la demandent (coalescence). Un seul thread pilote le
+navigateur ; si CELCAT renvoie le formulaire de connexion, le démon se
+reconnecte et rejoue la semaine, et relance Chrome s'il a planté.
+
+Usage:
+    python src/scraper_daemon.py serve
+    python src/scraper_daemon.py scrape --start 2025-03-03 --weeks 2 --output emploi_du_temps_complet.json
+    python src/scraper_daemon.py status
+    python src/scraper_daemon.py stop
+
+API (JSON) :
+    POST /scrape    {"start": "2025-03-03", "end": "2025-03-17"} ou {"start": ..., "weeks": 2}
+                    ou {"dates": ["2025-03-03", ...]} -> événements des semaines demandées
+    GET  /health    état du démon (file, connexion, statistiques)
+    POST /shutdown  arrêt propre
+
+Variables d'environnement :
+    CELCAT_DAEMON_ADDR=127.0.0.1:8787      adresse d'écoute / du démon
+    CELCAT_DAEMON_TOKEN=...                 jeton exigé dans l'en-tête X-Celcat-Token
+    CELCAT_DAEMON_JOB_TIMEOUT=1800          attente maximale d'un job (secondes)
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from events import clear_interned, event_to_json
+from metrics import metrics
+
+DEFAULT_ADDR = os.environ.get('CELCAT_DAEMON_ADDR', '127.0.0.1:8787')
+DAEMON_TOKEN = os.environ.get('CELCAT_DAEMON_TOKEN', '')
+JOB_TIMEOUT = float(os.environ.get('CELCAT_DAEMON_JOB_TIMEOUT', '1800'))
+TOKEN_HEADER = 'X-Celcat-Token'
+MAX_WEEKS_PER_JOB = 60
+
+
+def week_monday(day):
+    """Lundi (à minuit) de la semaine contenant day."""
+    day = datetime(day.year, day.month, day.day)
+    return day - timedelta(days=day.weekday())
+
+
+def parse_job(payload, today=None):
+    """
+    Semaines (lundis) d'une requête de job.
+
+    Accepte {"dates": [...]}, {"start": X, "end": Y} (bornes incluses) ou
+    {"start": X, "weeks": N}. Sans start, la semaine courante.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("corps JSON attendu : objet")
+
+    limit_error = ValueError(f"entre 1 et {MAX_WEEKS_PER_JOB} semaines par job")
+    # Le nombre de semaines est vérifié avant de construire l'ensemble des lundis
+    if payload.get('dates'):
+        dates = payload['dates']
+        if not isinstance(dates, list) or len(dates) > MAX_WEEKS_PER_JOB * 7:
+            raise limit_error
+        mondays = {week_monday(datetime.strptime(d, '%Y-%m-%d')) for d in dates}
+    else:
+        start = payload.get('start')
+        start = datetime.strptime(start, '%Y-%m-%d') if start else (today or datetime.now())
+        first = week_monday(start)
+        if payload.get('end'):
+            last = week_monday(datetime.strptime(payload['end'], '%Y-%m-%d'))
+            if last < first:
+                raise ValueError("fin antérieure au début")
+            nb_weeks = (last - first).days // 7 + 1
+        else:
+            nb_weeks = int(payload.get('weeks', 1))
+        if not 1 <= nb_weeks <= MAX_WEEKS_PER_JOB:
+            raise limit_error
+        mondays = {first + timedelta(weeks=i) for i in range(nb_weeks)}
+
+    if not mondays or len(mondays) > MAX_WEEKS_PER_JOB:
+        raise limit_error
+    return sorted(mondays)
+
+
+class WeekTask:
+    """Scraping d'une semaine, partagé par tous les jobs qui la demandent."""
+
+    def __init__(self, monday):
+        self.monday = monday
+        self.done = threading.Event()
+        self.events = []
+        self.error = None
+
+
+class ScraperDaemon:
+    """File de semaines servie par un unique navigateur authentifié."""
+
+    def __init__(self, scraper, session_cache=None, headless=True, driver_mode=None, max_retries=1):
+        """
+        Args:
+            scraper: CelcatCompleteScraper (navigateur démarré à la demande)
+            session_cache: SessionCache pour reprendre / sauvegarder la session
+            max_retries: Nouvelles tentatives d'une semaine après reconnexion
+        """
+        self.scraper = scraper
+        self.session_cache = session_cache
+        self.headless = headless
+        self.driver_mode = driver_mode
+        self.max_retries = max_retries
+
+        self.cond = threading.Condition()
+        self.queue = deque()   # WeekTask en attente
+        self.tasks = {}        # lundi -> WeekTask en attente ou en cours
+        self.current = None
+        self.running = True
+        self.logged_in = False
+        self.started_at = time.time()
+        self.stats = {'jobs': 0, 'weeks_requested': 0, 'weeks_coalesced': 0, 'weeks_scraped': 0,
+                      'weeks_failed': 0, 'logins': 0, 'relogins': 0, 'driver_starts': 0}
+        self.worker = threading.Thread(target=self._run, name="celcat-daemon-worker", daemon=True)
+
+    def start(self):
+        self.worker.start()
+        return self
+
+    # --- Jobs ---
+
+    def submit(self, mondays):
+        """Met en file les semaines absentes de la file. Retourne (tâches, nb coalescées)."""
+        tasks = []
+        coalesced = 0
+        with self.cond:
+            if not self.running:
+                raise RuntimeError("démon en cours d'arrêt")
+            for monday in mondays:
+                task = self.tasks.get(monday)
+                if task is None:
+                    task = self.tasks[monday] = WeekTask(monday)
+                    self.queue.append(task)
+                else:
+                    coalesced += 1
+                tasks.append(task)
+            self._count('jobs')
+            self._count('weeks_requested', len(mondays))
+            self._count('weeks_coalesced', coalesced)
+            self.cond.notify()
+        return tasks, coalesced
+
+    def _count(self, name, value=1):
+        """Incrémente une statistique (threads HTTP et thread navigateur : sous self.cond)."""
+        with self.cond:
+            self.stats[name] += value
+
+    def run_job(self, mondays, timeout=JOB_TIMEOUT):
+        """Scrape les semaines demandées et attend le résultat (dict sérialisable en JSON)."""
+        started = time.perf_counter()
+        tasks, coalesced = self.submit(mondays)
+        deadline = time.monotonic() + timeout
+        for task in tasks:
+            if not task.done.wait(max(0.0, deadline - time.monotonic())):
+                raise TimeoutError(f"job non terminé après {timeout:.0f}s")
+
+        events = [event for task in tasks for event in task.events]
+        events.sort(key=lambda x: (x['date'], x['start_time']))
+        return {
+            'weeks': [t.monday.strftime('%Y-%m-%d') for t in tasks],
+            'failed': {t.monday.strftime('%Y-%m-%d'): t.error for t in tasks if t.error},
+            'coalesced': coalesced,
+            'seconds': round(time.perf_counter() - started, 3),
+            'events': events,
+        }
+
+    def health(self):
+        with self.cond:
+            return {
+                'running': self.running,
+                'logged_in': self.logged_in,
+                'browser': self.scraper.driver is not None,
+                'queue': len(self.queue),
+                'current': self.current.strftime('%Y-%m-%d') if self.current else None,
+                'uptime': round(time.time() - self.started_at),
+                'stats': dict(self.stats),
+            }
+
+    def stop(self):
+        """Arrête le thread navigateur ; les semaines encore en file échouent."""
+        with self.cond:
+            self.running = False
+            pending = list(self.queue)
+            self.queue.clear()
+            self.cond.notify_all()
+        for task in pending:
+            task.error = "démon arrêté"
+            task.done.set()
+        self.worker.join()
+
+    # --- Thread navigateur ---
+
+    def _run(self):
+        try:
+            while True:
+                with self.cond:
+                    while self.running and not self.queue:
+                        self.cond.wait()
+                    if not self.running:
+                        return
+                    task = self.queue.popleft()
+                    self.current = task.monday
+
+                try:
+                    task.events = self._scrape(task.monday)
+                    self._count('weeks_scraped')
+                except Exception as e:
+                    task.error = str(e) or type(e).__name__
+                    self._count('weeks_failed')
+                    print(f"❌ Semaine du {task.monday.strftime('%d/%m/%Y')} : {task.error}")
+                finally:
+                    with self.cond:
+                        self.tasks.pop(task.monday, None)
+                        self.current = None
+                        idle = not self.queue
+                    task.done.set()
+
+                if idle:
+                    self._flush_metrics()
+        finally:
+            self.scraper.close()
+            self.scraper.driver = None
+
+    def _ensure_session(self):
+        """Démarre Chrome et se connecte si nécessaire."""
+        if self.scraper.driver is None:
+            with metrics.span("setup_driver"):
+                self.scraper.setup_driver(headless=self.headless, mode=self.driver_mode)
+            self._count('driver_starts')
+            self.logged_in = False
+        if not self.logged_in:
+            if not self.scraper.open_session(self.session_cache):
+                raise RuntimeError("connexion à CELCAT impossible")
+            self._count('logins')
+            self.logged_in = True
+
+    def _restart_browser(self):
+        try:
+            self.scraper.close()
+        except Exception:
+            pass
+        self.scraper.driver = None
+        self.logged_in = False
+
+    def _scrape(self, monday):
+        """Scrape une semaine ; reconnexion (ou redémarrage de Chrome) puis nouvel essai si besoin."""
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._ensure_session()
+                if self.scraper.navigate_to_week(monday):
+                    return list(self.scraper.scrape_week(monday))
+                last_error = "semaine affichée inattendue"
+                if self.scraper.session_expired():
+                    print("♻️ Session CELCAT expirée, reconnexion...")
+                    if self.session_cache:
+                        self.session_cache.clear()
+                    self.logged_in = False
+                    self._count('relogins')
+            except Exception as e:
+                # Chrome planté ou déconnecté : on repart d'un navigateur neuf
+                last_error = str(e) or type(e).__name__
+                print(f"⚠️ Navigateur indisponible ({last_error}), redémarrage...")
+                self._restart_browser()
+        raise RuntimeError(last_error)
+
+    def _flush_metrics(self):
+        """Écrit les métriques du lot terminé et repart de zéro (mémoire bornée)."""
+        with self.cond:
+            metrics.info['daemon'] = dict(self.stats)
+        metrics.finish()
+        metrics.start(metrics.script or "scraper_daemon", **{k: v for k, v in metrics.info.items() if k != 'daemon'})
+        self.scraper.waits.timings.clear()
+        # Chaînes internées des semaines du lot : libérées avec leurs événements
+        clear_interned()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False, default=event_to_json).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        raw = self.rfile.read(length) if length else b''
+        return json.loads(raw) if raw else {}
+
+    def _authorized(self):
+        token = self.server.token
+        return not token or self.headers.get(TOKEN_HEADER) == token
+
+    def do_GET(self):
+        if not self._authorized():
+            self._send_json(401, {'error': 'jeton invalide'})
+            return
+        if self.path.rstrip('/') == '/health':
+            self._send_json(200, self.server.scraper_daemon.health())
+            return
+        self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_json(400, {'error': 'JSON invalide'})
+            return
+        if not self._authorized():
+            self._send_json(401, {'error': 'jeton invalide'})
+            return
+
+        path = self.path.rstrip('/')
+        if path == '/shutdown':
+            self._send_json(200, {'stopping': True})
+            # shutdown() attend la fin de serve_forever : depuis un autre thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+        if path != '/scrape':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            mondays = parse_job(payload)
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            self._send_json(200, self.server.scraper_daemon.run_job(mondays))
+        except TimeoutError as e:
+            self._send_json(504, {'error': str(e)})
+        except RuntimeError as e:
+            self._send_json(503, {'error': str(e)})
+
+
+def split_addr(addr):
+    host, _, port = addr.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def make_server(daemon, addr=DEFAULT_ADDR, token=DAEMON_TOKEN):
+    """Serveur HTTP local du démon (daemon déjà démarré ou non)."""
+    httpd = ThreadingHTTPServer(split_addr(addr), _Handler)
+    httpd.daemon_threads = True
+    httpd.scraper_daemon = daemon
+    httpd.token = token
+    return httpd
+
+
+# --- Commandes ---
+
+def serve(args):
+    from scraper_complet import CelcatCompleteScraper, update_celcat_url_with_today
+    from session_cache import SessionCache
+
+    try:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    except FileNotFoundError:
+        print(f"❌ Erreur : Le fichier '{args.config}' est introuvable.")
+        return 1
+
+    raw_login_url = config.get("login_url", "").strip()
+    username = config.get("username", "").strip()
+    password = config.get("password", "").strip()
+
+    metrics.start("scraper_daemon", driver=args.driver, addr=args.addr)
+    scraper = CelcatCompleteScraper(update_celcat_url_with_today(raw_login_url), username, password)
+    daemon = ScraperDaemon(
+        scraper, session_cache=SessionCache.from_env(username, password, raw_login_url),
+        headless=True, driver_mode=args.driver,
+    ).start()
+    httpd = make_server(daemon, args.addr)
+
+    host, port = httpd.server_address[:2]
+    print(f"🛰️ Démon CELCAT à l'écoute sur http://{host}:{port}")
+    if args.warm:
+        # Chrome démarré et connecté avant le premier job
+        daemon.submit([week_monday(datetime.now())])
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        daemon.stop()
+        metrics.info['daemon'] = dict(daemon.stats)
+        metrics.finish()
+        print("🛑 Démon arrêté")
+    return 0
+
+
+def _request(method, args, path, payload=None, timeout=10):
+    headers = {TOKEN_HEADER: DAEMON_TOKEN} if DAEMON_TOKEN else {}
+    return requests.request(method, f"http://{args.addr}{path}", json=payload, headers=headers, timeout=timeout)
+
+
+def scrape(args):
+    """Client : envoie un job au démon et écrit le JSON au format du scraper."""
+    if args.dates:
+        payload = {'dates': [d.strip() for d in args.dates.split(',') if d.strip()]}
+    else:
+        payload = {'start': args.start or datetime.now().strftime('%Y-%m-%d'), 'weeks': args.weeks}
+
+    try:
+        response = _request('POST', args, '/scrape', payload, timeout=JOB_TIMEOUT + 30)
+    except requests.RequestException as e:
+        print(f"❌ Démon injoignable sur {args.addr} : {e}")
+        return 2
+    result = response.json()
+    if response.status_code != 200:
+        print(f"❌ Job refusé ({response.status_code}) : {result.get('error')}")
+        return 1
+
+    output = {
+        'metadata': {
+            'scrape_date': datetime.now().isoformat(),
+            'total_events': len(result['events']),
+            'weeks': result['weeks'],
+            'source': 'daemon',
+        },
+        'events': result['events'],
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ {len(result['events'])} événements ({len(result['weeks'])} semaines, "
+          f"{result['coalesced']} partagées) en {result['seconds']:.1f}s → {args.output}")
+    for week, error in result['failed'].items():
+        print(f"   ❌ {week} : {error}")
+    return 1 if result['failed'] else 0
+
+
+def status(args):
+    try:
+        response = _request('GET', args, '/health')
+    except requests.RequestException as e:
+        print(f"❌ Démon injoignable sur {args.addr} : {e}")
+        return 2
+    print(json.dumps(response.json(), indent=2, ensure_ascii=False))
+    return 0 if response.status_code == 200 else 1
+
+
+def stop(args):
+    try:
+        _request('POST', args, '/shutdown')
+    except requests.RequestException as e:
+        print(f"❌ Démon injoignable sur {args.addr} : {e}")
+        return 2
+    print("🛑 Arrêt demandé")
+    return 0
+
+
+def main(argv=None):
+    from lean_driver import DEFAULT_DRIVER_MODE, DRIVER_MODES
+
+    parser = argparse.ArgumentParser(description="Démon de scraping CELCAT (navigateur gardé ouvert) et son client.")
+    parser.add_argument('--addr', default=DEFAULT_ADDR, help="Adresse du démon (défaut: $CELCAT_DAEMON_ADDR ou 127.0.0.1:8787)")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_serve = sub.add_parser('serve', help="Démarre le démon")
+    p_serve.add_argument('--config', default='reponse.json', help="Fichier d'identifiants (défaut: reponse.json)")
+    p_serve.add_argument('--driver', choices=DRIVER_MODES, default=DEFAULT_DRIVER_MODE,
+                         help="Navigateur complet ou allégé (défaut: $CELCAT_DRIVER ou full)")
+    p_serve.add_argument('--warm', action='store_true', help="Démarre Chrome et se connecte dès le lancement")
+    p_serve.set_defaults(func=serve)
+
+    p_scrape = sub.add_parser('scrape', help="Envoie un job au démon")
+    p_scrape.add_argument('--start', help="Première semaine (YYYY-MM-DD, défaut: aujourd'hui)")
+    p_scrape.add_argument('--weeks', type=int, default=int(os.environ.get('NB_WEEKS', '2')),
+                          help="Nombre de semaines (défaut: $NB_WEEKS ou 2)")
+    p_scrape.add_argument('--dates', help="Semaines précises, ex: 2025-03-03,2025-04-14")
+    p_scrape.add_argument('--output', default='emploi_du_temps_complet.json', help="Fichier JSON de sortie")
+    p_scrape.set_defaults(func=scrape)
+
+    sub.add_parser('status', help="État du démon").set_defaults(func=status)
+    sub.add_parser('stop', help="Arrête le démon").set_defaults(func=stop)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+CACHE CHIFFRÉ DE LA SESSION CELCAT
+==================================
+Après une connexion réussie, les cookies et le stockage web (localStorage,
+sessionStorage) du navigateur sont sauvegardés dans un fichier chiffré
+(Fernet : AES-128-CBC + HMAC-SHA256). À l'exécution suivante, la session
+est restaurée et vérifiée en un seul chargement de page ; login() n'est
+rejoué que si elle a expiré.
+
+La clé est dérivée (PBKDF2, sel aléatoire stocké dans le fichier) de
+CELCAT_SESSION_KEY, ou à défaut des identifiants CELCAT : un changement
+de mot de passe invalide donc le cache.
+
+Variables d'environnement :
+    CELCAT_SESSION_CACHE=.celcat_session    fichier du cache ("" pour désactiver)
+    CELCAT_SESSION_KEY=...                  phrase secrète du chiffrement
+    CELCAT_SESSION_MAX_AGE=12               durée de validité maximale (heures)
+"""
+import base64
+import json
+import os
+import time
+from urllib.parse import urlparse
+
+from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+DEFAULT_CACHE_PATH = os.environ.get('CELCAT_SESSION_CACHE', '.celcat_session')
+DEFAULT_MAX_AGE_HOURS = float(os.environ.get('CELCAT_SESSION_MAX_AGE', '12'))
+CACHE_VERSION = 1
+KDF_ITERATIONS = 200_000
+
+_STORAGE_DUMP_JS = """
+function dump(storage) {
+    var out = {};
+    for (var i = 0; i < storage.length; i++) {
+        var key = storage.key(i);
+        out[key] = storage.getItem(key);
+    }
+    return out;
+}
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_STORAGE_RESTORE_JS = """
+var data = arguments[0];
+Object.keys(data.local || {}).forEach(function (k) { window.localStorage.setItem(k, data.local[k]); });
+Object.keys(data.session || {}).forEach(function (k) { window.sessionStorage.setItem(k, data.session[k]); });
+"""
+
+
+def derive_key(secret, salt):
+    """Clé Fernet dérivée d'une phrase secrète (PBKDF2-HMAC-SHA256)."""
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=KDF_ITERATIONS)
+    return base64.urlsafe_b64encode(kdf.derive(secret.encode('utf-8')))
+
+
+class SessionCache:
+    """Session authentifiée (cookies + stockage web) chiffrée sur disque."""
+
+    def __init__(self, secret, path=DEFAULT_CACHE_PATH, max_age_hours=DEFAULT_MAX_AGE_HOURS):
+        if not secret:
+            raise ValueError("SessionCache : phrase secrète vide")
+        self.secret = secret
+        self.path = path
+        self.max_age = max_age_hours * 3600
+
+    @classmethod
+    def from_env(cls, username, password, login_url=""):
+        """Cache configuré par l'environnement, ou None s'il est désactivé."""
+        if not DEFAULT_CACHE_PATH:
+            return None
+        secret = os.environ.get('CELCAT_SESSION_KEY') or f"{urlparse(login_url).netloc}:{username}:{password}"
+        return cls(secret)
+
+    def save(self, driver):
+        """
+        Chiffre et sauvegarde la session du navigateur (driver Selenium ou
+        CelcatHttpClient, qui n'a que des cookies). Retourne True si écrite.
+        """
+        storage = {}
+        if isinstance(driver, WebDriver):
+            try:
+                storage = driver.execute_script(_STORAGE_DUMP_JS) or {}
+            except WebDriverException as e:
+                print(f"   ⚠️ Stockage web non sauvegardé : {e}")
+        payload = {
+            'saved_at': time.time(),
+            'url': driver.current_url,
+            'cookies': driver.get_cookies(),
+            'storage': storage,
+        }
+
+        salt = os.urandom(16)
+        token = Fernet(derive_key(self.secret, salt)).encrypt(json.dumps(payload).encode('utf-8'))
+        document = {
+            'version': CACHE_VERSION,
+            'salt': base64.b64encode(salt).decode('ascii'),
+            'token': token.decode('ascii'),
+        }
+
+        try:
+            tmp_path = f"{self.path}.tmp"
+            # Fichier lisible uniquement par l'utilisateur courant
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(document, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            print(f"⚠️ Impossible d'écrire le cache de session : {e}")
+            return False
+
+    def load(self):
+        """
+        Session déchiffrée (dict cookies/storage) si elle est encore valide,
+        sinon None : fichier absent, clé différente, trop ancienne ou cookie expiré.
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                document = json.load(f)
+            if document.get('version') != CACHE_VERSION:
+                return None
+            salt = base64.b64decode(document['salt'])
+            # ttl : Fernet refuse les jetons plus anciens que max_age
+            data = Fernet(derive_key(self.secret, salt)).decrypt(
+                document['token'].encode('ascii'), ttl=int(self.max_age)
+            )
+            payload = json.loads(data)
+        except FileNotFoundError:
+            return None
+        except (InvalidToken, ValueError, KeyError, OSError) as e:
+            print(f"♻️ Cache de session invalide ou expiré ({type(e).__name__})")
+            return None
+
+        now = time.time()
+        if any(c.get('expiry') is not None and c['expiry'] <= now for c in payload.get('cookies', [])):
+            print("♻️ Cookies de session expirés")
+            return None
+        return payload
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def restore_storage(driver, storage):
+    """Réinjecte localStorage / sessionStorage sur la page courante."""
+    if not storage:
+        return
+    try:
+        driver.execute_script(_STORAGE_RESTORE_JS, storage)
+    except Exception as e:
+        print(f"   ⚠️ Stockage web non restauré : {e}")
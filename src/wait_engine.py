@@ -0,0 +1,202 @@
+"""
+MOTEUR D'ATTENTE - CONDITIONS DE DISPONIBILITÉ CELCAT
+=====================================================
+Remplace les time.sleep() fixes du scraper par des attentes sur de vrais
+signaux (formulaire de connexion présent, AJAX FullCalendar terminé,
+grille de la semaine rendue...) avec timeout configurable, repli sur
+l'ancien délai fixe et mesure de la durée de chaque attente.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from metrics import metrics
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+# Timeout par défaut d'une attente (secondes), surchargeable par variable d'environnement
+DEFAULT_TIMEOUT = float(os.environ.get('CELCAT_WAIT_TIMEOUT', '20'))
+# Intervalle entre deux évaluations d'une condition
+DEFAULT_POLL = 0.2
+# CELCAT_LEGACY_WAITS=1 restaure les anciens délais fixes (débogage)
+LEGACY_WAITS = os.environ.get('CELCAT_LEGACY_WAITS', '0') == '1'
+
+_AJAX_IDLE_JS = """
+return document.readyState === 'complete'
+    && (typeof window.jQuery === 'undefined' || window.jQuery.active === 0);
+"""
+
+_HEADER_DATES_JS = """
+return Array.prototype.map.call(
+    document.querySelectorAll('th.fc-day-header[data-date]'),
+    function (th) { return th.getAttribute('data-date'); }
+);
+"""
+
+
+# --- Conditions (callables driver -> bool, utilisables avec WebDriverWait) ---
+
+def login_form_present(driver):
+    """Le champ mot de passe du formulaire de connexion est affiché."""
+    return len(driver.find_elements(By.CSS_SELECTOR, "input[type='password']")) > 0
+
+
+def login_form_gone(driver):
+    """Le formulaire de connexion a disparu (connexion soumise et acceptée)."""
+    return not login_form_present(driver)
+
+
+def ajax_idle(driver):
+    """Document chargé et aucune requête jQuery/AJAX en cours."""
+    return bool(driver.execute_script(_AJAX_IDLE_JS))
+
+
+def calendar_rendered(driver):
+    """La grille horaire FullCalendar est rendue et plus aucun AJAX n'est en cours."""
+    skeletons = driver.find_elements(By.CSS_SELECTOR, ".fc-time-grid .fc-content-skeleton")
+    return len(skeletons) > 0 and ajax_idle(driver)
+
+
+def header_dates(driver):
+    """Dates (YYYY-MM-DD) des en-têtes fc-day-header actuellement rendus."""
+    return [d for d in (driver.execute_script(_HEADER_DATES_JS) or []) if d]
+
+
+def week_monday(day):
+    """Lundi (à minuit) de la semaine contenant day."""
+    return datetime(day.year, day.month, day.day) - timedelta(days=day.weekday())
+
+
+def covers_date(dates, week_date):
+    """
+    Vrai si les dates d'en-tête couvrent la semaine de week_date. La cible
+    est le lundi de la semaine : un samedi ou un dimanche (now() + N
+    semaines) est couvert même si CELCAT masque le week-end.
+    """
+    target = week_monday(week_date).strftime('%Y-%m-%d')
+    return bool(dates) and min(dates) <= target <= max(dates)
+
+
+def week_displayed(week_date):
+    """
+    Construit une condition vraie quand les en-têtes fc-day-header couvrent
+    la date demandée et que les événements de la semaine sont rendus.
+    """
+    def _condition(driver):
+        if not covers_date(header_dates(driver), week_date):
+            return False
+        return calendar_rendered(driver)
+
+    return _condition
+
+
+def all_of(*conditions):
+    """Combine plusieurs conditions (toutes doivent être vraies)."""
+    def _condition(driver):
+        return all(cond(driver) for cond in conditions)
+    return _condition
+
+
+def any_of(*conditions):
+    """Combine plusieurs conditions (au moins une doit être vraie)."""
+    def _condition(driver):
+        return any(cond(driver) for cond in conditions)
+    return _condition
+
+
+class WaitEngine:
+    """Attentes conditionnelles avec repli sur délai fixe et chronométrage."""
+
+    def __init__(self, timeout=None, poll=DEFAULT_POLL, legacy=None):
+        """
+        Args:
+            timeout: Timeout par défaut de chaque attente (secondes)
+            poll: Intervalle entre deux évaluations de la condition
+            legacy: True pour n'utiliser que les anciens délais fixes
+        """
+        self.driver = None
+        self.timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+        self.poll = poll
+        self.legacy = LEGACY_WAITS if legacy is None else legacy
+        self.timings = []
+
+    def attach(self, driver):
+        """Associe le moteur au navigateur Selenium."""
+        self.driver = driver
+
+    def _record(self, name, started, outcome):
+        elapsed = time.perf_counter() - started
+        self.timings.append({'name': name, 'seconds': round(elapsed, 3), 'outcome': outcome})
+        metrics.record(f"wait/{name}", elapsed, outcome=outcome)
+        return elapsed
+
+    def wait(self, name, condition, fallback_delay, timeout=None):
+        """
+        Attend que condition(driver) soit vraie.
+
+        Si la condition n'est pas remplie avant le timeout (ou ne peut pas
+        être évaluée), on complète jusqu'à l'ancien délai fixe fallback_delay
+        pour ne jamais être moins prudent qu'avant.
+
+        Returns:
+            True si la condition a été observée, False sinon
+        """
+        started = time.perf_counter()
+
+        if self.legacy:
+            time.sleep(fallback_delay)
+            self._record(name, started, 'legacy')
+            return True
+
+        try:
+            WebDriverWait(self.driver, self.timeout if timeout is None else timeout,
+                          poll_frequency=self.poll).until(condition)
+            self._record(name, started, 'ok')
+            return True
+        except (TimeoutException, WebDriverException) as e:
+            remaining = fallback_delay - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+            outcome = 'timeout' if isinstance(e, TimeoutException) else 'fallback'
+            self._record(name, started, outcome)
+            print(f"   ⚠️ Attente '{name}' non satisfaite ({outcome}), repli sur délai fixe")
+            return False
+
+    def pause(self, name, delay):
+        """Pause fixe conservée uniquement en mode legacy."""
+        if not self.legacy:
+            return
+        started = time.perf_counter()
+        time.sleep(delay)
+        self._record(name, started, 'legacy')
+
+    def sleep(self, name, delay):
+        """Pause réelle et chronométrée (attente avant une nouvelle tentative)."""
+        started = time.perf_counter()
+        time.sleep(delay)
+        self._record(name, started, 'sleep')
+
+    def summary(self):
+        """Agrège les durées par nom d'attente, triées par temps total décroissant."""
+        stats = {}
+        for t in self.timings:
+            s = stats.setdefault(t['name'], {'count': 0, 'total': 0.0, 'max': 0.0, 'timeouts': 0})
+            s['count'] += 1
+            s['total'] += t['seconds']
+            s['max'] = max(s['max'], t['seconds'])
+            if t['outcome'] in ('timeout', 'fallback'):
+                s['timeouts'] += 1
+        return dict(sorted(stats.items(), key=lambda kv: kv[1]['total'], reverse=True))
+
+    def print_summary(self):
+        """Affiche le temps passé dans chaque type d'attente."""
+        stats = self.summary()
+        if not stats:
+            return
+        total = sum(s['total'] for s in stats.values())
+        print(f"\n⏱️  Temps d'attente total : {total:.1f}s")
+        for name, s in stats.items():
+            print(f"   - {name:<16} {s['total']:7.2f}s  ({s['count']}x, max {s['max']:.2f}s, "
+                  f"{s['timeouts']} repli(s))")
@@ -0,0 +1,125 @@
+"""
+EMPREINTES DES SEMAINES AFFICHÉES
+=================================
+Empreinte peu coûteuse de la grille rendue (.fc-content-skeleton) et des
+dates d'en-tête d'une semaine, calculée sur un extrait renvoyé par le
+navigateur (pas de page_source). Le manifeste garde l'empreinte de chaque
+semaine de l'exécution précédente : une semaine identique n'est ni
+archivée ni extraite, et n'entre pas dans la fusion.
+
+Les dates des semaines ignorées sont notées dans le manifeste :
+merge_and_compare conserve les événements du master sur ces dates même
+quand elles tombent dans la plage remplacée.
+"""
+import hashlib
+import json
+import os
+import threading
+
+FINGERPRINTS_FILENAME = "fingerprints.json"
+FINGERPRINTS_VERSION = 1
+
+_SKELETON_JS = """
+var dates = Array.prototype.map.call(
+    document.querySelectorAll('th.fc-day-header[data-date]'),
+    function (th) { return th.getAttribute('data-date'); }
+);
+var grid = Array.prototype.map.call(
+    document.querySelectorAll('.fc-time-grid .fc-content-skeleton'),
+    function (el) { return el.outerHTML; }
+);
+return {dates: dates, grid: grid.join('\\n')};
+"""
+
+
+def default_fingerprints_path():
+    """$WEEK_FINGERPRINTS, sinon fingerprints.json à la racine des archives (dossier ou magasin)."""
+    return os.environ.get('WEEK_FINGERPRINTS') or os.path.join(
+        os.environ.get('ARCHIVE_STORE') or "archives_html", FINGERPRINTS_FILENAME
+    )
+
+
+def week_fingerprint(driver):
+    """
+    Empreinte de la semaine affichée.
+
+    Returns:
+        (dates d'en-tête, empreinte SHA-256), ou (dates, None) si la grille n'est pas rendue.
+    """
+    snapshot = driver.execute_script(_SKELETON_JS) or {}
+    dates = [d for d in snapshot.get('dates') or [] if d]
+    if not dates or not snapshot.get('grid'):
+        return dates, None
+    canonical = "\n".join(dates) + "\n" + snapshot['grid']
+    return dates, hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class FingerprintManifest:
+    """Empreintes par semaine (clé : première date d'en-tête) et dates des semaines ignorées."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.weeks = {}
+        self.skipped = {}   # première date -> dates de la semaine ignorée (exécution courante)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == FINGERPRINTS_VERSION:
+                self.weeks = data.get('weeks', {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def check(self, dates, fingerprint):
+        """
+        Compare l'empreinte à celle de l'exécution précédente.
+        Retourne True si la semaine est inchangée (elle est alors notée comme
+        ignorée) ; sinon la nouvelle empreinte est enregistrée.
+        """
+        key = dates[0]
+        with self.lock:
+            if self.weeks.get(key) == fingerprint:
+                self.skipped[key] = list(dates)
+                return True
+            self.weeks[key] = fingerprint
+            return False
+
+    def restore_skipped(self, dates):
+        """Note comme ignorée une semaine sautée par le run repris (point de reprise)."""
+        if dates:
+            with self.lock:
+                self.skipped[dates[0]] = list(dates)
+
+    def discard(self, dates):
+        """Oublie l'empreinte d'une semaine dont le traitement a échoué (elle sera refaite)."""
+        if dates:
+            with self.lock:
+                self.weeks.pop(dates[0], None)
+
+    def skipped_dates(self):
+        return sorted(d for dates in self.skipped.values() for d in dates)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.lock:
+            data = {
+                'version': FINGERPRINTS_VERSION,
+                'weeks': dict(sorted(self.weeks.items())),
+                'skipped': self.skipped_dates(),
+            }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def load_skipped_dates(path=None):
+    """Dates des semaines ignorées par la dernière exécution du scraper (ensemble vide sinon)."""
+    try:
+        with open(path or default_fingerprints_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return set(data.get('skipped', []))
+    except (OSError, ValueError, AttributeError):
+        return set()